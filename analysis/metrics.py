@@ -1,57 +1,271 @@
 """Calcolo di metriche descrittive sugli incidenti."""
 from __future__ import annotations
 
+import hashlib
 import json
 import pathlib
-from collections import Counter, defaultdict
-from typing import Sequence
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
+import pyarrow.compute as pc
 
+from incidenti_scraping.models import Incident
+from incidenti_scraping.parquet_store import read_incidents
+from incidenti_scraping.serialization import read_json, write_json
 
-def build_metrics(records: Sequence[dict]) -> dict:
-    df = pd.DataFrame(records)
-    if df.empty:
+METRIC_COLUMNS = ("id", "date", "severity", "roads", "cities")
+TOP_N = 10
+STATE_VERSION = 2
+DIGEST_MASK = (1 << 64) - 1
+
+
+def _records_frame(records: Sequence[dict]) -> pd.DataFrame:
+    """DataFrame con le sole colonne di :data:`METRIC_COLUMNS`, da dict o da :class:`Incident`."""
+    if records and isinstance(records[0], Incident):
+        # attributi diretti: niente dict per record né campi derivati non usati
+        columns = {
+            "id": [record.id for record in records],
+            "date": [record.datetime[:10] for record in records],
+            "severity": [record.severity for record in records],
+            "roads": [record.roads for record in records],
+            "cities": [record.cities for record in records],
+        }
+    else:
+        columns = {column: [record[column] for record in records] for column in METRIC_COLUMNS}
+    # dtype object: le colonne servono solo a raggruppare, la conversione in stringhe Arrow non ripaga
+    return pd.DataFrame({column: pd.Series(values, dtype=object) for column, values in columns.items()})
+
+
+def _ranked(counts: Mapping[str, int], n: int | None = None) -> List[Tuple[str, int]]:
+    """Coppie ``(valore, conteggio)`` per conteggio decrescente e, a pari merito, in ordine alfabetico.
+
+    L'ordine dipende solo dai conteggi, non da quello dei record: è lo stesso
+    per un ricalcolo completo, per lo stato incrementale e per il Parquet
+    partizionato (letto per anno).
+    """
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return ranked if n is None else ranked[:n]
+
+
+def _name_counts(values: pd.Series) -> Dict[str, int]:
+    """Conteggi per nome normalizzato (strip/title) degli elementi già appiattiti di una colonna di liste.
+
+    I valori distinti sono pochi rispetto alle occorrenze: si contano i valori
+    grezzi e la normalizzazione viene applicata solo ai distinti.
+    """
+    values = values.dropna()
+    if values.empty:
         return {}
+    codes, uniques = pd.factorize(values.astype(object))
+    raw_counts = pd.Series(np.bincount(codes, minlength=len(uniques)))
+    names = pd.Series(uniques, dtype=object).str.strip().str.title()
+    return {name: int(count) for name, count in raw_counts.groupby(names.values).sum().items()}
+
+
+def _record_digest(record) -> int:
+    """Impronta a 64 bit dei campi che contribuiscono alle metriche."""
+    severity = record["severity"]
+    payload = json.dumps(
+        [record["id"], record["date"][:10], getattr(severity, "value", severity), list(record["roads"] or ()), list(record["cities"] or ())],
+        ensure_ascii=False,
+    )
+    return int.from_bytes(hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def records_digest(records: Iterable) -> int:
+    """Impronta di un insieme di record, indipendente dall'ordine (somma modulo 2**64).
+
+    È quella mantenuta da :class:`MetricsState`: confrontarle dice se lo stato
+    corrisponde al dataset anche quando il numero di record non cambia.
+    """
+    return sum(_record_digest(record) for record in records) & DIGEST_MASK
+
+
+class MetricsState:
+    """Aggregati da cui si ricava ``metrics.json`` senza rileggere i record.
+
+    Conta i record per giorno (da cui anni, mesi e periodo, che restano
+    corretti anche quando si rimuove il primo o l'ultimo giorno), per
+    severità e per strada e città normalizzate. Inserimenti, modifiche e
+    rimozioni si applicano con :meth:`apply` come differenze; ``digest``
+    (:func:`records_digest`) segue gli stessi aggiornamenti.
+    """
+
+    def __init__(
+        self,
+        *,
+        total: int = 0,
+        per_day: Mapping[str, int] | None = None,
+        per_severity: Mapping[str, int] | None = None,
+        roads: Mapping[str, int] | None = None,
+        cities: Mapping[str, int] | None = None,
+        digest: int = 0,
+    ) -> None:
+        self.total = total
+        self.digest = digest
+        self.per_day: Counter = Counter(per_day or {})
+        self.per_severity: Counter = Counter(per_severity or {})
+        self.roads: Counter = Counter(roads or {})
+        self.cities: Counter = Counter(cities or {})
+
+    def _update(self, record, sign: int) -> None:
+        self.total += sign
+        self.digest = (self.digest + sign * _record_digest(record)) & DIGEST_MASK
+        self.per_day[record["date"][:10]] += sign
+        self.per_severity[record["severity"]] += sign
+        for road in record["roads"] or ():
+            self.roads[road.strip().title()] += sign
+        for city in record["cities"] or ():
+            self.cities[city.strip().title()] += sign
+
+    def apply(self, *, added: Iterable = (), removed: Iterable = ()) -> "MetricsState":
+        """Toglie i contributi di ``removed`` (versioni precedenti comprese) e aggiunge quelli di ``added``."""
+        for record in removed:
+            self._update(record, -1)
+        for record in added:
+            self._update(record, 1)
+        for counter in (self.per_day, self.per_severity, self.roads, self.cities):
+            for key in [key for key, count in counter.items() if count == 0]:
+                del counter[key]
+        return self
+
+    def to_metrics(self) -> dict:
+        if not self.total:
+            return {}
+        days = sorted(self.per_day)
+        per_year: Counter = Counter()
+        per_month: Counter = Counter()
+        for day in days:
+            per_year[int(day[:4])] += self.per_day[day]
+            per_month[day[:7]] += self.per_day[day]
+        return {
+            "totale_articoli": self.total,
+            "periodo": {"min": days[0], "max": days[-1]},
+            "per_anno": dict(per_year),
+            "per_mese": {month: per_month[month] for month in sorted(per_month)[-24:]},
+            "per_severita": dict(_ranked(self.per_severity)),
+            "top_strade": _ranked(self.roads, TOP_N),
+            "top_citta": _ranked(self.cities, TOP_N),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "version": STATE_VERSION,
+            "total": self.total,
+            "digest": f"{self.digest:016x}",
+            "per_day": dict(self.per_day),
+            "per_severity": dict(self.per_severity),
+            "roads": dict(self.roads),
+            "cities": dict(self.cities),
+        }
 
-    df["date"] = pd.to_datetime(df["date"])
-    per_year = df.groupby(df["date"].dt.year)["id"].count().to_dict()
-    per_month = (
-        df.groupby([df["date"].dt.to_period("M")])["id"].count().sort_index().tail(24)
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "MetricsState":
+        return cls(
+            total=data["total"],
+            per_day=data["per_day"],
+            per_severity=data["per_severity"],
+            roads=data["roads"],
+            cities=data["cities"],
+            digest=int(data["digest"], 16),
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MetricsState):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+
+def _aggregate(df: pd.DataFrame, roads: pd.Series, cities: pd.Series) -> MetricsState:
+    if df.empty:
+        return MetricsState()
+    # un solo raggruppamento per (giorno, severità): giorni e severità sono somme dei suoi gruppi
+    counts = df.groupby([df["date"].astype(object).str[:10], df["severity"].astype(object)], sort=False).size()
+    per_day = counts.groupby(level=0).sum()
+    per_severity = counts.groupby(level=1).sum()
+    return MetricsState(
+        total=int(len(df)),
+        per_day={day: int(count) for day, count in per_day.items()},
+        per_severity={getattr(key, "value", key): int(count) for key, count in per_severity.items()},
+        roads=_name_counts(roads),
+        cities=_name_counts(cities),
     )
-    per_month = {str(idx): int(val) for idx, val in per_month.items()}
-
-    severity = df["severity"].value_counts().to_dict()
-    roads = Counter(
-        road.strip().title()
-        for values in df["roads"].dropna()
-        for road in values
-        if isinstance(values, list)
-    ).most_common(10)
-    cities = Counter(
-        city.strip().title()
-        for values in df["cities"].dropna()
-        for city in values
-        if isinstance(values, list)
-    ).most_common(10)
-
-    return {
-        "totale_articoli": int(len(df)),
-        "periodo": {
-            "min": df["date"].min().date().isoformat(),
-            "max": df["date"].max().date().isoformat(),
-        },
-        "per_anno": {int(k): int(v) for k, v in per_year.items()},
-        "per_mese": per_month,
-        "per_severita": {k: int(v) for k, v in severity.items()},
-        "top_strade": roads,
-        "top_citta": cities,
-    }
-
-
-def save_metrics(metrics: dict, path: str | pathlib.Path) -> str:
+
+
+def metrics_from_frame(df: pd.DataFrame) -> dict:
+    """Metriche a partire da un DataFrame con (almeno) le colonne di :data:`METRIC_COLUMNS`."""
+    return _aggregate(df, df["roads"].explode(), df["cities"].explode()).to_metrics()
+
+
+def build_metrics_state(records: Sequence[dict]) -> MetricsState:
+    """Stato aggregato calcolato da zero su tutti i record."""
+    df = _records_frame(records)
+    state = _aggregate(df, df["roads"].explode(), df["cities"].explode())
+    state.digest = records_digest(records)
+    return state
+
+
+def build_metrics(records: Sequence[dict]) -> dict:
+    return build_metrics_state(records).to_metrics()
+
+
+def build_metrics_from_parquet(path: str | pathlib.Path) -> dict:
+    """Come :func:`build_metrics`, leggendo dal Parquet (file o dataset per anno) solo le colonne necessarie.
+
+    Le liste di strade e città vengono appiattite direttamente in Arrow,
+    senza creare un array per riga.
+    """
+    table = read_incidents(path, columns=METRIC_COLUMNS)
+    df = table.select(["id", "date", "severity"]).to_pandas().astype(object)
+    flat = {column: pc.list_flatten(table.column(column)).to_pandas().astype(object) for column in ("roads", "cities")}
+    return _aggregate(df, flat["roads"], flat["cities"]).to_metrics()
+
+
+def record_deltas(previous: Iterable, current: Iterable) -> Tuple[List, List]:
+    """Record da aggiungere e da togliere per passare da ``previous`` a ``current`` (confronto per ``id``).
+
+    Un record modificato compare in entrambe le liste (vecchia versione tra i
+    tolti, nuova tra gli aggiunti); quelli spariti, ad esempio scartati dalla
+    pulizia, solo tra i tolti. I record identici (spesso lo stesso oggetto,
+    riusato da :func:`merge_records`) vengono saltati.
+    """
+    before = {record["id"]: record for record in previous}
+    added = []
+    for record in current:
+        old = before.get(record["id"])
+        if old is record or old == record:
+            del before[record["id"]]
+            continue
+        added.append(record)
+    # ciò che resta in ``before`` è stato modificato o non c'è più
+    return added, list(before.values())
+
+
+def load_metrics_state(path: str | pathlib.Path) -> MetricsState | None:
+    """Stato salvato da :func:`save_metrics_state`; ``None`` se manca o ha un formato diverso."""
     path = pathlib.Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as fh:
-        json.dump(metrics, fh, indent=2, ensure_ascii=False)
+    if not path.exists():
+        return None
+    data = read_json(path)
+    if data.get("version") != STATE_VERSION:
+        return None
+    return MetricsState.from_dict(data)
+
+
+def save_metrics_state(state: MetricsState, path: str | pathlib.Path) -> str:
+    write_json(state.to_dict(), path, sort_keys=True)
+    return str(path)
+
+
+def save_metrics(
+    metrics: dict,
+    path: str | pathlib.Path,
+    *,
+    mirror_paths: Iterable[str | pathlib.Path] = (),
+    pretty: bool = True,
+) -> str:
+    """Scrive le metriche in ``path`` e, con lo stesso JSON già codificato, in ``mirror_paths``."""
+    write_json(metrics, path, pretty=pretty, mirrors=mirror_paths)
     return str(path)
@@ -0,0 +1,216 @@
+"""Benchmark delle funzioni più costose della pipeline e confronto con una baseline.
+
+Ogni benchmark riceve un :class:`Workload` già preparato (record, testi e
+HTML del corpus sintetico), elabora tutto il corpus e restituisce il numero
+di elementi elaborati; :func:`run_suite` lo ripete e salva minimo, mediana
+e media. :func:`compare` confronta i tempi per elemento con una baseline.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import gc
+import importlib.util
+import logging
+import pathlib
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import types
+from typing import Callable, Dict, List, Sequence
+
+from analysis.metrics import build_metrics
+from incidenti_scraping.cleaning import is_road_accident
+from incidenti_scraping.serialization import DEFAULT_SERIALIZER, write_json
+from incidenti_scraping.text_utils import detect_locations, guess_severity, strip_html
+
+from .corpus import ROOT_DIR, load_base, synthetic_posts, synthetic_records
+
+RESULTS_VERSION = 1
+DEFAULT_SIZE = 10_000
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.10
+CLEAN_DATASET_SCRIPT = ROOT_DIR / "scripts" / "clean_dataset.py"
+
+
+def _load_clean_dataset() -> types.ModuleType:
+    """``scripts/clean_dataset.py`` come modulo (la cartella ``scripts`` non è un package)."""
+    spec = importlib.util.spec_from_file_location("clean_dataset", CLEAN_DATASET_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Workload:
+    """Corpus sintetico pronto per i benchmark; la preparazione non entra nei tempi."""
+
+    def __init__(self, size: int, *, seed: int = 0) -> None:
+        self.size = size
+        self.seed = seed
+        self.records = list(synthetic_records(load_base(), size, seed=seed))
+        self.texts = [f"{record.title}. {record.excerpt}. {record.content}".strip() for record in self.records]
+        self.html = [post["content"]["rendered"] for post in synthetic_posts(self.records, seed=seed)]
+        self._tmp = tempfile.TemporaryDirectory(prefix="incidenti-bench-")
+        self.dataset_path = pathlib.Path(self._tmp.name) / "incidents.json"
+        write_json(self.records, self.dataset_path, pretty=False)
+        self.clean_script = _load_clean_dataset()
+
+    def close(self) -> None:
+        self._tmp.cleanup()
+
+
+def bench_strip_html(workload: Workload) -> int:
+    for value in workload.html:
+        strip_html(value)
+    return len(workload.html)
+
+
+def bench_detect_locations(workload: Workload) -> int:
+    for text in workload.texts:
+        detect_locations(text)
+    return len(workload.texts)
+
+
+def bench_guess_severity(workload: Workload) -> int:
+    for text in workload.texts:
+        guess_severity(text)
+    return len(workload.texts)
+
+
+def bench_is_road_accident(workload: Workload) -> int:
+    for record in workload.records:
+        is_road_accident(record)
+    return len(workload.records)
+
+
+def bench_clean_dataset(workload: Workload) -> int:
+    """Lo script di pulizia per intero: lettura, regole e scrittura dei due file (senza copie per la dashboard)."""
+    module = workload.clean_script
+    output_path = workload.dataset_path.with_name("incidents_clean.json")
+    previous = module.logger.level
+    module.logger.setLevel(logging.WARNING)
+    try:
+        module.clean_dataset(workload.dataset_path, output_path, pretty=False)
+    finally:
+        module.logger.setLevel(previous)
+    return len(workload.records)
+
+
+def bench_build_metrics(workload: Workload) -> int:
+    build_metrics(workload.records)
+    return len(workload.records)
+
+
+BENCHMARKS: Dict[str, Callable[[Workload], int]] = {
+    "strip_html": bench_strip_html,
+    "detect_locations": bench_detect_locations,
+    "guess_severity": bench_guess_severity,
+    "is_road_accident": bench_is_road_accident,
+    "clean_dataset": bench_clean_dataset,
+    "build_metrics": bench_build_metrics,
+}
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_suite(
+    *,
+    size: int = DEFAULT_SIZE,
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 0,
+    only: Sequence[str] | None = None,
+) -> Dict:
+    """Esegue i benchmark (tutti o quelli in ``only``) e restituisce i risultati da salvare in JSON."""
+    names = list(only) if only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Benchmark sconosciuti: {', '.join(unknown)} (disponibili: {', '.join(BENCHMARKS)})")
+
+    started = time.perf_counter()
+    workload = Workload(size, seed=seed)
+    setup_seconds = time.perf_counter() - started
+    results: Dict[str, Dict] = {}
+    try:
+        for name in names:
+            timings: List[float] = []
+            items = 0
+            for _ in range(repeat):
+                gc.collect()
+                started = time.perf_counter()
+                items = BENCHMARKS[name](workload)
+                timings.append(time.perf_counter() - started)
+            results[name] = {
+                "items": items,
+                "seconds": timings,
+                "min": min(timings),
+                "median": statistics.median(timings),
+                "mean": statistics.fmean(timings),
+                "per_item_us": min(timings) / items * 1e6 if items else None,
+            }
+    finally:
+        workload.close()
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "serializer": type(DEFAULT_SERIALIZER).__name__,
+            "size": size,
+            "seed": seed,
+            "repeat": repeat,
+            "setup_seconds": setup_seconds,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, *, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Confronta il tempo minimo per elemento di ogni benchmark con quello della baseline.
+
+    ``status`` è ``"regressione"`` se il rapporto supera ``1 + threshold``,
+    ``"miglioramento"`` se scende sotto ``1 - threshold``, altrimenti ``"ok"``;
+    ``"nuovo"`` e ``"mancante"`` per i benchmark presenti in un solo file.
+    """
+    rows = []
+    before = baseline.get("benchmarks", {})
+    after = current.get("benchmarks", {})
+    for name in [*before, *(name for name in after if name not in before)]:
+        old, new = before.get(name), after.get(name)
+        if old is None or new is None:
+            rows.append({"name": name, "baseline_us": None, "current_us": None, "ratio": None, "status": "nuovo" if old is None else "mancante"})
+            continue
+        ratio = new["per_item_us"] / old["per_item_us"] if old["per_item_us"] else None
+        if ratio is None:
+            status = "ok"
+        elif ratio > 1 + threshold:
+            status = "regressione"
+        elif ratio < 1 - threshold:
+            status = "miglioramento"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "name": name,
+                "baseline_us": old["per_item_us"],
+                "current_us": new["per_item_us"],
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+    return rows
@@ -0,0 +1,106 @@
+"""Throughput end-to-end della pipeline contro il server WordPress simulato.
+
+:func:`run_throughput` avvia :class:`.wp_server.SimulatedWordPress` su un
+archivio sintetico e gli punta contro la pipeline vera (``collect_incidents``
+o ``collect_incidents_async``, poi ``clean_incidents`` e ``save_dataset``):
+nessuna rete, ma client, retry, paginazione e trasformazione reali. Il
+risultato riporta richieste al secondo, byte trasferiti e tempi per fase.
+"""
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import platform
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Dict
+
+from incidenti_scraping.pipeline import clean_incidents, collect_incidents, collect_incidents_async, save_dataset
+
+from .corpus import load_base, synthetic_records
+from .suite import _git_commit
+from .wp_server import Archive, ServerConfig, SimulatedWordPress
+
+RESULTS_VERSION = 1
+DEFAULT_SIZE = 2_000
+# il server locale non ha bisogno delle pause pensate per il sito vero
+DEFAULT_REQUESTS_PER_SECOND = 1000.0
+
+
+def run_throughput(
+    *,
+    size: int = DEFAULT_SIZE,
+    seed: int = 0,
+    config: ServerConfig | None = None,
+    use_async: bool = False,
+    fetch_workers: int = 1,
+    projection: bool = False,
+    two_phase: bool = False,
+    workers: int = 1,
+    max_pages: int | None = None,
+    throttle_seconds: float = 0.0,
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+) -> Dict:
+    """Esegue scaricamento, pulizia e salvataggio contro il server simulato e ne misura il throughput.
+
+    ``throttle_seconds`` (client sincrono) e ``requests_per_second`` (client
+    asincrono) regolano il ritmo lato client; ``config`` la latenza e gli
+    errori lato server.
+    """
+    config = config or ServerConfig(seed=seed)
+    started = time.perf_counter()
+    archive = Archive.from_records(synthetic_records(load_base(), size, seed=seed), seed=seed)
+    setup_seconds = time.perf_counter() - started
+
+    options = dict(projection=projection, two_phase=two_phase, workers=workers, max_pages=max_pages)
+    stages: Dict[str, float] = {}
+    with SimulatedWordPress(archive, config) as server, tempfile.TemporaryDirectory(prefix="incidenti-throughput-") as output_dir:
+        started = time.perf_counter()
+        if use_async:
+            client_options = {"base_api": server.url, "requests_per_second": requests_per_second}
+            records = asyncio.run(collect_incidents_async(client_options=client_options, **options))
+        else:
+            client_options = {"base_api": server.url, "throttle_seconds": throttle_seconds}
+            records = collect_incidents(client_options=client_options, fetch_workers=fetch_workers, **options)
+        stages["collect"] = time.perf_counter() - started
+        served = server.stats.snapshot()
+
+        started = time.perf_counter()
+        kept, removed, _ = clean_incidents(records)
+        stages["clean"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        save_dataset(kept, output_dir, removed=removed, pretty=False)
+        stages["save"] = time.perf_counter() - started
+
+    total = sum(stages.values())
+    collect = stages["collect"]
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "created": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": size,
+            "seed": seed,
+            "client": "async" if use_async else "sync",
+            "fetch_workers": None if use_async else fetch_workers,
+            "projection": projection,
+            "two_phase": two_phase,
+            "workers": workers,
+            "server_config": asdict(config),
+            "setup_seconds": setup_seconds,
+        },
+        "server": served,
+        "records": len(records),
+        "kept": len(kept),
+        "removed": len(removed),
+        "stages": stages,
+        "total_seconds": total,
+        "requests_per_second": served["requests"] / collect if collect else None,
+        "megabytes_per_second": served["bytes"] / 1e6 / collect if collect else None,
+        "posts_per_second": served["posts"] / collect if collect else None,
+        "records_per_second": len(records) / total if total else None,
+    }
@@ -0,0 +1,386 @@
+"""Server locale che simula l'API REST di WordPress (``/wp-json/wp/v2``) su un archivio sintetico.
+
+Implementa quello che usano :class:`.WordPressClient` e
+:class:`.AsyncWordPressClient`: ``/posts`` con ``page``, ``per_page``,
+``search``, ``tags``, ``categories``, ``after``/``before``,
+``modified_after``/``modified_before``, ``include``, ``orderby``/``order``,
+``_fields`` ed ``_embed``, più ``/tags`` e ``/categories``; le risposte
+hanno gli header ``X-WP-Total`` e ``X-WP-TotalPages``. Latenza, 429 con
+``Retry-After`` ed errori 5xx si iniettano con :class:`ServerConfig`.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from incidenti_scraping.config import INCIDENT_TAG_ID
+from incidenti_scraping.dates import parse_datetime
+from incidenti_scraping.models import Incident
+from incidenti_scraping.text_utils import normalize
+
+from .corpus import synthetic_posts
+
+API_PREFIX = "/wp-json/wp/v2"
+MAX_PER_PAGE = 100
+INCIDENT_TAG_NAME = "Incidente"
+SERVER_ERRORS = (500, 502, 503)
+# risultati di ricerca/filtri tenuti in memoria: la paginazione ripete la stessa query
+QUERY_CACHE_SIZE = 256
+
+
+@dataclass
+class ServerConfig:
+    """Comportamento del server: latenza per richiesta e frequenza degli errori iniettati."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    error_rate: float = 0.0
+    seed: int = 0
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+
+def _int_list(value: str, name: str) -> List[int]:
+    try:
+        return [int(item) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise ApiError(400, "rest_invalid_param", f"Parametro non valido: {name}") from None
+
+
+def _int_param(params: Dict[str, str], name: str, default: int, *, minimum: int = 1, maximum: int | None = None) -> int:
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ApiError(400, "rest_invalid_param", f"Parametro non valido: {name}") from None
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ApiError(400, "rest_invalid_param", f"Parametro non valido: {name}")
+    return value
+
+
+def _moment_param(params: Dict[str, str], name: str) -> str | None:
+    """Data di un parametro (``after``, ``before``, ...) come ISO senza fuso, confrontabile con quelle dei post."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return parse_datetime(value).replace(tzinfo=None).isoformat(timespec="seconds")
+    except (ValueError, OverflowError):
+        raise ApiError(400, "rest_invalid_param", f"Parametro non valido: {name}") from None
+
+
+def _select_fields(item: Dict[str, Any], fields: Sequence[str] | None) -> Dict[str, Any]:
+    if not fields:
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+def _paginate(items: Sequence, params: Dict[str, str], *, code: str) -> Tuple[Sequence, Dict[str, str]]:
+    per_page = _int_param(params, "per_page", 10, maximum=MAX_PER_PAGE)
+    page = _int_param(params, "page", 1)
+    total_pages = -(-len(items) // per_page)
+    if page > max(total_pages, 1):
+        raise ApiError(400, code, "Il numero di pagina richiesto è maggiore del numero di pagine disponibili.")
+    headers = {"X-WP-Total": str(len(items)), "X-WP-TotalPages": str(total_pages)}
+    return items[(page - 1) * per_page:page * per_page], headers
+
+
+class Archive:
+    """Post e termini serviti dal server, con gli indici che servono ai filtri."""
+
+    def __init__(self, posts: Sequence[Dict], terms: Dict[str, Dict[int, str]]) -> None:
+        self.posts = sorted(posts, key=lambda post: (post["date"], post["id"]), reverse=True)
+        self.terms = terms
+        self._by_id = {post["id"]: post for post in self.posts}
+        self._search_text = {
+            post["id"]: normalize(" ".join(post[field]["rendered"] for field in ("title", "excerpt", "content")))
+            for post in self.posts
+        }
+        self._queries: Dict[Tuple, List[Dict]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Incident], *, seed: int = 0) -> "Archive":
+        """Archivio con un post per record: HTML da :func:`.corpus.synthetic_posts`, id dei termini assegnati qui.
+
+        Il tag "Incidente" riceve l'id :data:`INCIDENT_TAG_ID`, come sul sito.
+        """
+        rng = random.Random(seed)
+        records = list(records)
+        term_ids: Dict[str, Dict[str, int]] = {"categories": {}, "tags": {INCIDENT_TAG_NAME: INCIDENT_TAG_ID}}
+        next_id = INCIDENT_TAG_ID + 1
+
+        def term_id(taxonomy: str, name: str) -> int:
+            nonlocal next_id
+            ids = term_ids[taxonomy]
+            if name not in ids:
+                ids[name] = next_id
+                next_id += 1
+            return ids[name]
+
+        posts = []
+        for record, post in zip(records, synthetic_posts(records, seed=seed)):
+            created = dt.datetime.fromisoformat(post["date"])
+            modified = created + dt.timedelta(seconds=rng.randrange(7 * 24 * 3600))
+            post["modified"] = modified.isoformat()
+            post["categories"] = [term_id("categories", name) for name in record.categories]
+            post["tags"] = [term_id("tags", name) for name in record.tags]
+            posts.append(post)
+        terms = {taxonomy: {term: name for name, term in ids.items()} for taxonomy, ids in term_ids.items()}
+        return cls(posts, terms)
+
+    def _term(self, taxonomy: str, term_id: int) -> Dict[str, Any]:
+        name = self.terms[taxonomy][term_id]
+        return {
+            "id": term_id,
+            "name": name,
+            "slug": normalize(name).replace(" ", "-"),
+            "taxonomy": "category" if taxonomy == "categories" else "post_tag",
+        }
+
+    def _embedded(self, post: Dict) -> Dict[str, Any]:
+        return {
+            "wp:term": [
+                [self._term("categories", term_id) for term_id in post["categories"]],
+                [self._term("tags", term_id) for term_id in post["tags"]],
+            ]
+        }
+
+    def _matching(self, params: Dict[str, str]) -> List[Dict]:
+        key = tuple(sorted((name, value) for name, value in params.items() if name not in ("page", "per_page", "_fields", "_embed")))
+        with self._lock:
+            cached = self._queries.get(key)
+        if cached is not None:
+            return cached
+
+        posts: Iterable[Dict] = self.posts
+        if params.get("include"):
+            ids = set(_int_list(params["include"], "include"))
+            posts = [post for post in posts if post["id"] in ids]
+        for taxonomy in ("tags", "categories"):
+            if params.get(taxonomy):
+                ids = set(_int_list(params[taxonomy], taxonomy))
+                posts = [post for post in posts if ids.intersection(post[taxonomy])]
+        for name, field, keep in (
+            ("after", "date", lambda value, bound: value > bound),
+            ("before", "date", lambda value, bound: value < bound),
+            ("modified_after", "modified", lambda value, bound: value > bound),
+            ("modified_before", "modified", lambda value, bound: value < bound),
+        ):
+            bound = _moment_param(params, name)
+            if bound is not None:
+                posts = [post for post in posts if keep(post[field][:19], bound)]
+        if params.get("search"):
+            # come WordPress: tutte le parole, ognuna in titolo, estratto o contenuto
+            words = normalize(params["search"]).split()
+            posts = [post for post in posts if all(word in self._search_text[post["id"]] for word in words)]
+
+        orderby = params.get("orderby", "date")
+        if orderby not in ("date", "id", "modified"):
+            raise ApiError(400, "rest_invalid_param", "Parametro non valido: orderby")
+        order = params.get("order", "desc")
+        if order not in ("asc", "desc"):
+            raise ApiError(400, "rest_invalid_param", "Parametro non valido: order")
+        posts = sorted(posts, key=lambda post: (post[orderby], post["id"]), reverse=order == "desc")
+
+        with self._lock:
+            if len(self._queries) >= QUERY_CACHE_SIZE:
+                self._queries.clear()
+            self._queries[key] = posts
+        return posts
+
+    def query_posts(self, params: Dict[str, str]) -> Tuple[List[Dict], Dict[str, str]]:
+        page, headers = _paginate(self._matching(params), params, code="rest_post_invalid_page_number")
+        fields = params["_fields"].split(",") if params.get("_fields") else None
+        embed = "_embed" in params
+        items = []
+        for post in page:
+            item = dict(post)
+            if embed and (fields is None or "_embedded" in fields):
+                item["_embedded"] = self._embedded(post)
+            items.append(_select_fields(item, fields))
+        return items, headers
+
+    def query_terms(self, taxonomy: str, params: Dict[str, str]) -> Tuple[List[Dict], Dict[str, str]]:
+        terms = [self._term(taxonomy, term_id) for term_id in sorted(self.terms[taxonomy])]
+        if params.get("include"):
+            ids = set(_int_list(params["include"], "include"))
+            terms = [term for term in terms if term["id"] in ids]
+        if params.get("search"):
+            needle = normalize(params["search"])
+            terms = [term for term in terms if needle in normalize(term["name"])]
+        page, headers = _paginate(terms, params, code="rest_invalid_page_number")
+        fields = params["_fields"].split(",") if params.get("_fields") else None
+        return [_select_fields(term, fields) for term in page], headers
+
+
+class ServerStats:
+    """Contatori delle richieste servite, aggiornati dai thread del server."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.posts_served = 0
+            self.by_status: Counter = Counter()
+            self.by_endpoint: Counter = Counter()
+
+    def record(self, endpoint: str, status: int, size: int, posts: int = 0) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += size
+            self.posts_served += posts
+            self.by_status[str(status)] += 1
+            self.by_endpoint[endpoint] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes": self.bytes_sent,
+                "posts": self.posts_served,
+                "by_status": dict(self.by_status),
+                "by_endpoint": dict(self.by_endpoint),
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - firma di BaseHTTPRequestHandler
+        pass
+
+    def _send(self, endpoint: str, status: int, payload: Any, headers: Dict[str, str] | None = None, posts: int = 0) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats.record(endpoint, status, len(body), posts)
+
+    def do_GET(self) -> None:  # noqa: N802 - nome imposto da BaseHTTPRequestHandler
+        simulation = self.server.simulation
+        url = urlsplit(self.path)
+        endpoint = url.path[len(API_PREFIX):].strip("/") if url.path.startswith(API_PREFIX) else url.path
+        params = {name: values[-1] for name, values in parse_qs(url.query, keep_blank_values=True).items()}
+
+        delay, fault = simulation.draw()
+        if delay:
+            time.sleep(delay)
+        if fault == 429:
+            self._send(
+                endpoint,
+                429,
+                {"code": "rest_too_many_requests", "message": "Troppe richieste", "data": {"status": 429}},
+                {"Retry-After": str(simulation.config.retry_after)},
+            )
+            return
+        if fault:
+            self._send(endpoint, fault, {"code": "internal_server_error", "message": "Errore simulato", "data": {"status": fault}})
+            return
+
+        try:
+            if endpoint == "posts":
+                items, headers = simulation.archive.query_posts(params)
+                self._send(endpoint, 200, items, headers, posts=len(items))
+            elif endpoint in ("tags", "categories"):
+                items, headers = simulation.archive.query_terms(endpoint, params)
+                self._send(endpoint, 200, items, headers)
+            else:
+                raise ApiError(404, "rest_no_route", "Nessun percorso corrisponde all'URL e al metodo richiesti.")
+        except ApiError as exc:
+            self._send(endpoint, exc.status, {"code": exc.code, "message": str(exc), "data": {"status": exc.status}})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    simulation: "SimulatedWordPress"
+    stats: ServerStats
+
+    def handle_error(self, request, client_address) -> None:
+        # i client chiudono le connessioni keep-alive quando vogliono: non è un errore del server
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class SimulatedWordPress:
+    """Server HTTP in un thread, da usare come ``base_api`` dei client.
+
+    ::
+
+        with SimulatedWordPress(archive, ServerConfig(latency=0.05)) as server:
+            collect_incidents(client_options={"base_api": server.url, "throttle_seconds": 0})
+    """
+
+    def __init__(self, archive: Archive, config: ServerConfig | None = None, *, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.archive = archive
+        self.config = config or ServerConfig()
+        self.stats = ServerStats()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.simulation = self
+        self._httpd.stats = self.stats
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def draw(self) -> Tuple[float, int | None]:
+        """Latenza ed eventuale errore (429 o 5xx) per la prossima richiesta, dal generatore con seed."""
+        config = self.config
+        with self._rng_lock:
+            delay = config.latency + (self._rng.uniform(0, config.jitter) if config.jitter else 0.0)
+            roll = self._rng.random()
+            if roll < config.throttle_rate:
+                return delay, 429
+            if roll < config.throttle_rate + config.error_rate:
+                return delay, self._rng.choice(SERVER_ERRORS)
+        return delay, None
+
+    def start(self) -> "SimulatedWordPress":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="simulated-wordpress", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "SimulatedWordPress":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
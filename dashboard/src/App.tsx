@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from 'react'
+import { useCallback, useEffect, useMemo, useRef, useState } from 'react'
 import { format, parseISO } from 'date-fns'
 import { it } from 'date-fns/locale'
 import {
@@ -21,24 +21,105 @@ import {
 } from 'recharts'
 import './App.css'
 
+// Voce dell'indice leggero esportato da incidenti_scraping.dashboard_export
 type Incident = {
   id: number
   date: string
-  datetime: string
-  year: number
-  month: number
-  month_name: string
-  weekday: string
   title: string
-  link: string
-  excerpt: string
-  content: string
   severity: 'informativo' | 'moderato' | 'grave' | 'fatale'
   keywords: string[]
   roads: string[]
   cities: string[]
 }
 
+// Estratto e link, dagli shard per anno caricati quando servono
+type IncidentDetails = {
+  id: number
+  excerpt: string
+  link: string
+}
+
+type ExportTable = {
+  fields: string[]
+  rows: unknown[][]
+  dictionaries?: Record<string, string[]>
+}
+
+type ExportManifest = {
+  version: number
+  total: number
+  removed: number
+  range: { min: string; max: string } | null
+  years: number[]
+  files: {
+    index: string
+    removed: string
+    analytics: string
+    search: string
+    shards: Record<string, string>
+    bodies: Record<string, string>
+  }
+}
+
+type PlaceRanking = { name: string; value: number } & Record<Incident['severity'], number>
+
+// Serie precalcolate dalla pipeline (stessi calcoli che prima avvenivano qui)
+type Analytics = {
+  severity: Record<Incident['severity'], number>
+  monthlyTrend: Array<{ month: string; value: number }>
+  yearlyTrend: Array<{ year: string; value: number }>
+  weekdayData: Array<{ day: string; value: number }>
+  topRoads: PlaceRanking[]
+  topCities: PlaceRanking[]
+  vehicles: Array<{ name: string; value: number }>
+  casualties: { totalMorti: number; totalFeriti: number }
+  casualtiesByYear: Array<{ year: string; morti: number; feriti: number }>
+}
+
+// Indice invertito (incidenti_scraping.search_index): termini a prefisso comune, documenti a differenze
+type SearchIndexData = {
+  version: number
+  ids: number[]
+  terms: { prefix: number[]; suffix: string[] }
+  postings: number[][]
+}
+
+type SearchIndex = {
+  ids: number[]
+  terms: string[]
+  postings: number[][]
+}
+
+const EXPORT_BASE = '/data/export'
+
+const fetchJson = async <T,>(path: string): Promise<T> => {
+  const res = await fetch(`${EXPORT_BASE}/${path}`)
+  if (!res.ok) {
+    throw new Error('Errore durante il caricamento dei dati')
+  }
+  return (await res.json()) as T
+}
+
+// Ricostruisce gli oggetti da una tabella compatta (campi + righe, valori ripetuti a dizionario)
+const decodeTable = <T,>(table: ExportTable): T[] => {
+  const dictionaries = table.dictionaries ?? {}
+  return table.rows.map((row) => {
+    const item: Record<string, unknown> = {}
+    table.fields.forEach((field, idx) => {
+      const value = row[idx]
+      const dictionary = dictionaries[field]
+      if (!dictionary) {
+        item[field] = value
+      } else if (Array.isArray(value)) {
+        item[field] = value.map((code) => dictionary[code as number])
+      } else {
+        item[field] = dictionary[value as number]
+      }
+    })
+    return item as T
+  })
+}
+
 const severityLabels: Record<Incident['severity'], string> = {
   informativo: 'Informativo',
   moderato: 'Feriti',
@@ -53,139 +134,71 @@ const severityColors: Record<Incident['severity'], string> = {
   fatale: '#ef4444',
 }
 
-const weekdayOrder = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-const weekdayLabels: Record<string, string> = {
-  Monday: 'Lunedì',
-  Tuesday: 'Martedì',
-  Wednesday: 'Mercoledì',
-  Thursday: 'Giovedì',
-  Friday: 'Venerdì',
-  Saturday: 'Sabato',
-  Sunday: 'Domenica',
-}
-
-// Estrazione veicoli dal testo
-const extractVehicles = (text: string): string[] => {
-  const vehicles: string[] = []
-  const patterns = [
-    /\b(?:auto|automobile|vettura|macchina)\b/gi,
-    /\b(?:moto|motociclo|motocicletta|scooter)\b/gi,
-    /\b(?:bici|bicicletta|ciclista)\b/gi,
-    /\b(?:tir|camion|mezzo pesante|autocarro)\b/gi,
-    /\b(?:furgone|van)\b/gi,
-    /\b(?:bus|autobus|pullman)\b/gi,
-  ]
-  const labels = ['Auto', 'Moto', 'Bici', 'Tir/Camion', 'Furgone', 'Bus']
-
-  patterns.forEach((pattern, idx) => {
-    if (pattern.test(text)) {
-      vehicles.push(labels[idx])
-    }
+const decodeSearchIndex = (data: SearchIndexData): SearchIndex => {
+  const terms: string[] = []
+  let previous = ''
+  data.terms.prefix.forEach((shared, idx) => {
+    previous = previous.slice(0, shared) + data.terms.suffix[idx]
+    terms.push(previous)
   })
-
-  return [...new Set(vehicles)]
+  const postings = data.postings.map((deltas) => {
+    let total = 0
+    return deltas.map((delta) => (total += delta))
+  })
+  return { ids: data.ids, terms, postings }
 }
 
-// Estrazione morti/feriti dal testo (versione bilanciata)
-const extractCasualties = (text: string): { morti: number; feriti: number } => {
-  let morti = 0
-  let feriti = 0
-
-  // Pattern negativi: escludi contesti non legati all'incidente
-  const negativePatterns = [
-    /mort[io]\s+(?:in|durante|per)\s+(?:guerra|battaglia|strage|attentato|omicidio)/gi,
-    /ferit[io]\s+(?:in|durante|per)\s+(?:guerra|battaglia|strage|attentato)/gi,
-    /vittim[ae]\s+(?:di|della|del)\s+(?:guerra|violenza|omicidio|strage)/gi,
-    /mort[io]\s+(?:per|a causa di)\s+(?:malattia|cancro|infarto|ictus)/gi,
-  ]
-
-  // Se contiene pattern negativi chiari, non estrarre dati
-  if (negativePatterns.some(pattern => pattern.test(text))) {
-    return { morti: 0, feriti: 0 }
+// Stessa normalizzazione dell'indice: senza accenti, minuscole, solo lettere e cifre
+const tokenize = (text: string): string[] =>
+  text
+    .normalize('NFD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .toLowerCase()
+    .match(/[a-z0-9]+/g) ?? []
+
+const lowerBound = (terms: string[], value: string): number => {
+  let lo = 0
+  let hi = terms.length
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1
+    if (terms[mid] < value) lo = mid + 1
+    else hi = mid
   }
+  return lo
+}
 
-  // Verifica se il testo parla di incidenti (per validare i pattern generici)
-  const isAccidentContext = /\b(?:incidente|sinistro|scontro|schianto|tamponamento|ribaltamento|collisione)\b/gi.test(text)
-
-  // Pattern per morti - mix di specifici e generici
-  const mortiPatterns = [
-    // Pattern specifici con contesto incidente
-    /\b(\d+)\s+(?:person[ae]|persone)\s+(?:mort[ae]|decedut[ae]|hanno perso la vita)\b/gi,
-    /\b(\d+)\s+(?:mort[io]|decedut[io]|vittim[ae])\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b/gi,
-    /\b(?:mort[io]|decedut[io]|ha perso la vita|hanno perso la vita)\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b/gi,
-    /\b(?:un|una|uno)\s+(?:mort[io]|decedut[io]|vittima)\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b/gi,
-    // Pattern generici (solo se c'è contesto incidente)
-    ...(isAccidentContext ? [
-      /\b(\d+)\s+(?:mort[io]|decedut[io]|vittim[ae])\b/gi,
-      /\b(?:un|una|uno)\s+(?:mort[io]|decedut[io]|vittima)\b/gi,
-      /\b(?:mort[io]|decedut[io])\s+(?:in|nell'|nello|nel)\s+(?:ospedale|pronto\s+soccorso)\b/gi,
-    ] : []),
-  ]
-
-  const foundMorti = new Set<number>()
-  mortiPatterns.forEach((pattern) => {
-    const matches = text.matchAll(pattern)
-    for (const match of matches) {
-      const numMatch = match[1] || (match[0].match(/\d+/) ? match[0].match(/\d+/)?.[0] : null)
-      if (numMatch) {
-        const num = parseInt(numMatch, 10)
-        if (num > 0 && num <= 50) {
-          foundMorti.add(num)
-        }
-      } else if (match[0].toLowerCase().includes('mort') || match[0].toLowerCase().includes('decedut')) {
-        foundMorti.add(1)
-      }
-    }
-  })
-  
-  morti = Array.from(foundMorti).reduce((sum, val) => sum + val, 0)
-
-  // Pattern per feriti - mix di specifici e generici
-  const feritiPatterns = [
-    // Pattern specifici con contesto incidente
-    /\b(\d+)\s+(?:person[ae]|persone)\s+(?:ferit[ae]|les[ae]|rimast[ae] ferit[ae])\b/gi,
-    /\b(\d+)\s+(?:ferit[io]|les[io])\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b/gi,
-    /\b(?:ferit[io]|les[io]|rimast[io] ferit[io])\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b/gi,
-    /\b(?:un|una|uno)\s+(?:ferit[io]|les[io])\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b/gi,
-    // Pattern con trasporto in ospedale
-    /\b(?:trasportat[io]|soccors[io]|portat[io])\s+(?:in|al|all')\s+(?:ospedale|pronto\s+soccorso|ps)\b/gi,
-    // Pattern generici (solo se c'è contesto incidente)
-    ...(isAccidentContext ? [
-      /\b(\d+)\s+(?:ferit[io]|les[io])\b/gi,
-      /\b(?:un|una|uno|alcun[ie]|divers[ie])\s+(?:ferit[io]|les[io])\b/gi,
-      /\b(?:ferit[io]|les[io])\s+(?:in|nell'|nello|nel)\s+(?:ospedale|pronto\s+soccorso|ps)\b/gi,
-      /\b(?:rimast[io]|rimast[ae])\s+(?:ferit[io]|ferit[ae]|les[io]|les[ae])\b/gi,
-    ] : []),
-  ]
-
-  const foundFeriti = new Set<number>()
-  feritiPatterns.forEach((pattern) => {
-    const matches = text.matchAll(pattern)
-    for (const match of matches) {
-      const numMatch = match[1] || (match[0].match(/\d+/) ? match[0].match(/\d+/)?.[0] : null)
-      if (numMatch) {
-        const num = parseInt(numMatch, 10)
-        if (num > 0 && num <= 100) {
-          foundFeriti.add(num)
-        }
-      } else if (match[0].toLowerCase().includes('ferit') || match[0].toLowerCase().includes('les')) {
-        foundFeriti.add(1)
-      }
+// Id dei record che contengono tutte le parole cercate (ognuna anche come prefisso)
+const searchIds = (index: SearchIndex, query: string): Set<number> | null => {
+  const tokens = Array.from(new Set(tokenize(query)))
+  if (!tokens.length) return null
+  let matched: Set<number> | null = null
+  for (const token of tokens) {
+    const found = new Set<number>()
+    const end = lowerBound(index.terms, `${token}\x7f`)
+    for (let pos = lowerBound(index.terms, token); pos < end; pos += 1) {
+      index.postings[pos].forEach((doc) => {
+        if (!matched || matched.has(doc)) found.add(doc)
+      })
     }
-  })
-  
-  feriti = Array.from(foundFeriti).reduce((sum, val) => sum + val, 0)
-
-  // Limiti conservativi
-  return { 
-    morti: Math.min(morti, 10), 
-    feriti: Math.min(feriti, 20) 
+    matched = found
+    if (!matched.size) break
   }
+  return new Set(Array.from(matched ?? []).map((doc) => index.ids[doc]))
 }
 
 function App() {
+  const [manifest, setManifest] = useState<ExportManifest | null>(null)
   const [incidents, setIncidents] = useState<Incident[]>([])
   const [removedIncidents, setRemovedIncidents] = useState<Incident[]>([])
+  const [analyticsData, setAnalyticsData] = useState<Analytics | null>(null)
+  const [details, setDetails] = useState<Map<number, IncidentDetails>>(new Map())
+  const requestedShards = useRef(new Set<string>())
+  // Testo completo per id, dai file bodies/<anno> scaricati all'apertura di un articolo
+  const [bodies, setBodies] = useState<Map<number, string>>(new Map())
+  const requestedBodies = useRef(new Set<string>())
+  const [expanded, setExpanded] = useState<Set<number>>(new Set())
+  const [searchIndex, setSearchIndex] = useState<SearchIndex | null>(null)
+  const searchIndexRequested = useRef(false)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
 
@@ -203,21 +216,15 @@ function App() {
     const loadData = async () => {
       try {
         setLoading(true)
-        const incidentsRes = await fetch('/data/incidents.json')
-        const removedRes = await fetch('/data/incidents_removed.json')
-
-        if (!incidentsRes.ok) {
-          throw new Error('Errore durante il caricamento dei dati')
-        }
-
-        const incidentsData = (await incidentsRes.json()) as Incident[]
-        setIncidents(incidentsData)
-
-        // Carica anche i record rimossi se disponibili
-        if (removedRes.ok) {
-          const removedData = (await removedRes.json()) as Incident[]
-          setRemovedIncidents(removedData)
-        }
+        // Primo caricamento: manifest, indice leggero e analisi precalcolate
+        const manifestData = await fetchJson<ExportManifest>('manifest.json')
+        const [indexData, analytics] = await Promise.all([
+          fetchJson<ExportTable>(manifestData.files.index),
+          fetchJson<Analytics>(manifestData.files.analytics),
+        ])
+        setManifest(manifestData)
+        setIncidents(decodeTable<Incident>(indexData))
+        setAnalyticsData(analytics)
       } catch (err) {
         setError(
           err instanceof Error ? err.message : 'Errore sconosciuto durante il fetch',
@@ -230,23 +237,91 @@ function App() {
     loadData()
   }, [])
 
-  const years = useMemo(() => {
-    const values = Array.from(new Set(incidents.map((incident) => incident.year)))
-    return values.sort((a, b) => b - a)
-  }, [incidents]) as number[]
+  const years = useMemo(() => manifest?.years ?? [], [manifest])
+
+  const datasetRange = manifest?.range ?? null
+
+  // Scarica (una sola volta) gli shard degli anni indicati e ne unisce estratti e link
+  const loadShards = useCallback(
+    async (shardYears: string[]) => {
+      if (!manifest) return
+      const missing = shardYears.filter(
+        (year) => manifest.files.shards[year] && !requestedShards.current.has(year),
+      )
+      if (!missing.length) return
+      missing.forEach((year) => requestedShards.current.add(year))
+      const tables = await Promise.all(
+        missing.map((year) => fetchJson<ExportTable>(manifest.files.shards[year])),
+      )
+      setDetails((current) => {
+        const next = new Map(current)
+        tables.forEach((table) => {
+          decodeTable<IncidentDetails>(table).forEach((item) => next.set(item.id, item))
+        })
+        return next
+      })
+    },
+    [manifest],
+  )
+
+  // Il testo completo di un anno si scarica solo quando se ne apre un articolo
+  const loadBodies = useCallback(
+    async (year: string) => {
+      if (!manifest || !manifest.files.bodies[year] || requestedBodies.current.has(year)) return
+      requestedBodies.current.add(year)
+      try {
+        const data = await fetchJson<Record<string, string>>(manifest.files.bodies[year])
+        setBodies((current) => {
+          const next = new Map(current)
+          Object.entries(data).forEach(([id, body]) => next.set(Number(id), body))
+          return next
+        })
+      } catch {
+        requestedBodies.current.delete(year)
+      }
+    },
+    [manifest],
+  )
 
-  const datasetRange = useMemo(() => {
-    if (!incidents.length) {
-      return null
-    }
-    let minDate = incidents[0].date
-    let maxDate = incidents[0].date
-    incidents.forEach((incident) => {
-      if (incident.date < minDate) minDate = incident.date
-      if (incident.date > maxDate) maxDate = incident.date
+  const toggleBody = (incident: Incident) => {
+    const opening = !expanded.has(incident.id)
+    setExpanded((current) => {
+      const next = new Set(current)
+      if (opening) {
+        next.add(incident.id)
+      } else {
+        next.delete(incident.id)
+      }
+      return next
     })
-    return { min: minDate, max: maxDate }
-  }, [incidents])
+    if (opening) loadBodies(incident.date.slice(0, 4))
+  }
+
+  // I record rimossi servono solo quando si sceglie di mostrarli
+  useEffect(() => {
+    if (!showRemoved || !manifest || removedIncidents.length || !manifest.removed) return
+    fetchJson<ExportTable>(manifest.files.removed)
+      .then((table) => setRemovedIncidents(decodeTable<Incident>(table)))
+      .catch(() => undefined)
+  }, [showRemoved, manifest, removedIncidents.length])
+
+  // L'indice di ricerca si scarica alla prima ricerca
+  useEffect(() => {
+    if (!manifest || search.length === 0 || searchIndexRequested.current) return
+    searchIndexRequested.current = true
+    fetchJson<SearchIndexData>(manifest.files.search)
+      .then((data) => setSearchIndex(decodeSearchIndex(data)))
+      .catch(() => {
+        searchIndexRequested.current = false
+      })
+  }, [manifest, search])
+
+  const searchMatches = useMemo(
+    () => (searchIndex ? searchIds(searchIndex, search) : null),
+    [searchIndex, search],
+  )
+
+  const removedIds = useMemo(() => new Set(removedIncidents.map((incident) => incident.id)), [removedIncidents])
 
   useEffect(() => {
     if (!datasetRange) return
@@ -262,17 +337,17 @@ function App() {
 
   const filteredIncidents = useMemo(() => {
     const allIncidents = showRemoved ? [...incidents, ...removedIncidents] : incidents
+    const query = search.toLowerCase()
     return allIncidents.filter((incident) => {
+      // Finché l'indice non è arrivato si cerca solo in titolo, città e strade
       const matchesSearch =
         search.length === 0 ||
-        incident.title.toLowerCase().includes(search.toLowerCase()) ||
-        incident.excerpt.toLowerCase().includes(search.toLowerCase()) ||
-        incident.cities?.some((city) =>
-          city.toLowerCase().includes(search.toLowerCase()),
-        ) ||
-        incident.roads?.some((road) =>
-          road.toLowerCase().includes(search.toLowerCase()),
-        )
+        (searchMatches
+          ? searchMatches.has(incident.id)
+          : tokenize(search).length === 0 ||
+            incident.title.toLowerCase().includes(query) ||
+            incident.cities?.some((city) => city.toLowerCase().includes(query)) ||
+            incident.roads?.some((road) => road.toLowerCase().includes(query)))
 
       const matchesSeverity =
         severityFilter === 'all' || incident.severity === severityFilter
@@ -287,7 +362,7 @@ function App() {
 
       return matchesSearch && matchesSeverity && matchesYear && matchesRange
     })
-  }, [incidents, removedIncidents, showRemoved, search, severityFilter, yearFilter, dateFrom, dateTo])
+  }, [incidents, removedIncidents, searchMatches, showRemoved, search, severityFilter, yearFilter, dateFrom, dateTo])
 
   // Paginazione
   const totalPages = Math.ceil(filteredIncidents.length / itemsPerPage)
@@ -296,134 +371,38 @@ function App() {
     return filteredIncidents.slice(start, start + itemsPerPage)
   }, [filteredIncidents, currentPage, itemsPerPage])
 
+  useEffect(() => {
+    // Estratti e link solo per gli anni della pagina visualizzata
+    const pageYears = new Set(paginatedIncidents.map((incident) => incident.date.slice(0, 4)))
+    loadShards(Array.from(pageYears)).catch(() => undefined)
+  }, [paginatedIncidents, loadShards])
+
   useEffect(() => {
     // Reset alla prima pagina quando cambiano i filtri
     setCurrentPage(1)
   }, [search, severityFilter, yearFilter, dateFrom, dateTo, showRemoved])
 
   const analytics = useMemo(() => {
-    // Usa solo incidents per gli analytics, non i removed
-    const incidentsForAnalytics = incidents
-    const severityCounts: Record<Incident['severity'], number> = {
-      informativo: 0,
-      moderato: 0,
-      grave: 0,
-      fatale: 0,
+    const empty: Analytics = {
+      severity: { informativo: 0, moderato: 0, grave: 0, fatale: 0 },
+      monthlyTrend: [],
+      yearlyTrend: [],
+      weekdayData: [],
+      topRoads: [],
+      topCities: [],
+      vehicles: [],
+      casualties: { totalMorti: 0, totalFeriti: 0 },
+      casualtiesByYear: [],
     }
-    const perMonth = new Map<string, number>()
-    const perYear = new Map<number, number>()
-    const perWeekday = new Map<string, number>()
-    const roadCounter = new Map<string, { total: number; bySeverity: Record<Incident['severity'], number> }>()
-    const cityCounter = new Map<string, { total: number; bySeverity: Record<Incident['severity'], number> }>()
-    const vehicleCounter = new Map<string, number>()
-    let totalMorti = 0
-    let totalFeriti = 0
-    const casualtiesByYear = new Map<number, { morti: number; feriti: number }>()
-
-    incidentsForAnalytics.forEach((incident) => {
-      severityCounts[incident.severity] += 1
-      const monthKey = incident.date.slice(0, 7)
-      perMonth.set(monthKey, (perMonth.get(monthKey) ?? 0) + 1)
-      perYear.set(incident.year, (perYear.get(incident.year) ?? 0) + 1)
-      perWeekday.set(incident.weekday, (perWeekday.get(incident.weekday) ?? 0) + 1)
-
-      const fullText = `${incident.title} ${incident.excerpt} ${incident.content}`
-      const vehicles = extractVehicles(fullText)
-      vehicles.forEach((v) => {
-        vehicleCounter.set(v, (vehicleCounter.get(v) ?? 0) + 1)
-      })
-
-      const casualties = extractCasualties(fullText)
-      totalMorti += casualties.morti
-      totalFeriti += casualties.feriti
-      const yearCasualties = casualtiesByYear.get(incident.year) || { morti: 0, feriti: 0 }
-      casualtiesByYear.set(incident.year, {
-        morti: yearCasualties.morti + casualties.morti,
-        feriti: yearCasualties.feriti + casualties.feriti,
-      })
-
-      incident.roads?.forEach((road) => {
-        const key = road.trim()
-        if (!key) return
-        const existing = roadCounter.get(key) || { total: 0, bySeverity: { informativo: 0, moderato: 0, grave: 0, fatale: 0 } }
-        existing.total += 1
-        existing.bySeverity[incident.severity] += 1
-        roadCounter.set(key, existing)
-      })
-
-      incident.cities?.forEach((city) => {
-        const key = city.trim()
-        if (!key) return
-        const existing = cityCounter.get(key) || { total: 0, bySeverity: { informativo: 0, moderato: 0, grave: 0, fatale: 0 } }
-        existing.total += 1
-        existing.bySeverity[incident.severity] += 1
-        cityCounter.set(key, existing)
-      })
-    })
-
-    const monthlyTrend = Array.from(perMonth.entries())
-      .sort((a, b) => a[0].localeCompare(b[0]))
-      .slice(-36)
-      .map(([month, value]) => ({
+    const data = analyticsData ?? empty
+    return {
+      ...data,
+      monthlyTrend: data.monthlyTrend.map(({ month, value }) => ({
         month: format(parseISO(`${month}-01`), "MMM ''yy", { locale: it }),
         value,
-      }))
-
-    const yearlyTrend = Array.from(perYear.entries())
-      .sort((a, b) => a[0] - b[0])
-      .map(([year, value]) => ({ year: year.toString(), value }))
-
-    const weekdayData = weekdayOrder
-      .map((day) => ({
-        day: weekdayLabels[day] || day,
-        value: perWeekday.get(day) || 0,
-      }))
-      .filter((d) => d.value > 0)
-
-    const rankRoads = (limit = 15) =>
-      Array.from(roadCounter.entries())
-        .sort((a, b) => b[1].total - a[1].total)
-        .slice(0, limit)
-        .map(([name, data]) => ({
-          name,
-          value: data.total,
-          ...data.bySeverity,
-        }))
-
-    const rankCities = (limit = 15) =>
-      Array.from(cityCounter.entries())
-        .sort((a, b) => b[1].total - a[1].total)
-        .slice(0, limit)
-        .map(([name, data]) => ({
-          name,
-          value: data.total,
-          ...data.bySeverity,
-        }))
-
-    const vehiclesData = Array.from(vehicleCounter.entries())
-      .sort((a, b) => b[1] - a[1])
-      .map(([name, value]) => ({ name, value }))
-
-    const casualtiesByYearData = Array.from(casualtiesByYear.entries())
-      .sort((a, b) => a[0] - b[0])
-      .map(([year, data]) => ({
-        year: year.toString(),
-        morti: data.morti,
-        feriti: data.feriti,
-      }))
-
-    return {
-      severity: severityCounts,
-      monthlyTrend,
-      yearlyTrend,
-      weekdayData,
-      topRoads: rankRoads(20),
-      topCities: rankCities(20),
-      vehicles: vehiclesData,
-      casualties: { totalMorti, totalFeriti },
-      casualtiesByYear: casualtiesByYearData,
+      })),
     }
-  }, [incidents])
+  }, [analyticsData])
 
   const severityData = useMemo(() => {
     return (Object.entries(analytics.severity) as Array<[Incident['severity'], number]>)
@@ -557,7 +536,7 @@ function App() {
               checked={showRemoved}
               onChange={(event) => setShowRemoved(event.target.checked)}
             />
-            Mostra anche articoli rimossi ({removedIncidents.length})
+            Mostra anche articoli rimossi ({manifest?.removed ?? 0})
           </label>
         </div>
       </section>
@@ -811,7 +790,7 @@ function App() {
           <p>
             {filteredIncidents.length} articoli trovati
             {showRemoved && removedIncidents.length > 0 && ` (${removedIncidents.length} rimossi inclusi)`}
-            {!showRemoved && removedIncidents.length > 0 && ` (${removedIncidents.length} rimossi nascosti)`}
+            {!showRemoved && (manifest?.removed ?? 0) > 0 && ` (${manifest?.removed} rimossi nascosti)`}
           </p>
         </div>
         {totalPages > 1 && (
@@ -870,7 +849,9 @@ function App() {
             </thead>
             <tbody>
               {paginatedIncidents.map((incident) => {
-                const isRemoved = removedIncidents.some(r => r.id === incident.id)
+                const isRemoved = removedIds.has(incident.id)
+                const detail = details.get(incident.id)
+                const isExpanded = expanded.has(incident.id)
                 return (
                   <tr key={incident.id} style={isRemoved ? { opacity: 0.6, backgroundColor: '#fef2f2' } : {}}>
                     <td>
@@ -878,10 +859,16 @@ function App() {
                       {isRemoved && <span style={{ display: 'block', fontSize: '0.75rem', color: '#ef4444', marginTop: '0.25rem' }}>RIMOSSO</span>}
                     </td>
                     <td>
-                      <a href={incident.link} target="_blank" rel="noreferrer">
+                      <a href={detail?.link} target="_blank" rel="noreferrer">
                         {incident.title}
                       </a>
-                      <p className="excerpt">{incident.excerpt}</p>
+                      <p className="excerpt">{detail?.excerpt ?? ''}</p>
+                      {isExpanded && (
+                        <p className="body">{bodies.get(incident.id) ?? 'Caricamento del testo…'}</p>
+                      )}
+                      <button type="button" className="body-toggle" onClick={() => toggleBody(incident)}>
+                        {isExpanded ? 'Nascondi testo' : 'Testo completo'}
+                      </button>
                       <span
                         className="severity-pill"
                         style={{ backgroundColor: severityColors[incident.severity] }}
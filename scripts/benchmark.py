@@ -0,0 +1,235 @@
+"""Benchmark offline della pipeline: esecuzione, confronto con una baseline e corpus sintetico."""
+from __future__ import annotations
+
+import argparse
+import logging
+import pathlib
+import sys
+
+CURRENT_DIR = pathlib.Path(__file__).resolve().parent
+ROOT_DIR = CURRENT_DIR.parent
+SRC_DIR = ROOT_DIR / "src"
+
+for path in (SRC_DIR, ROOT_DIR):
+    path_str = str(path)
+    if path_str not in sys.path:
+        sys.path.insert(0, path_str)
+
+from benchmarks.corpus import load_base, synthetic_records
+from benchmarks.suite import (
+    BENCHMARKS,
+    DEFAULT_REPEAT,
+    DEFAULT_SIZE,
+    DEFAULT_THRESHOLD,
+    compare,
+    run_suite,
+)
+from benchmarks.throughput import DEFAULT_REQUESTS_PER_SECOND, run_throughput
+from benchmarks.throughput import DEFAULT_SIZE as DEFAULT_THROUGHPUT_SIZE
+from benchmarks.wp_server import Archive, ServerConfig, SimulatedWordPress
+from incidenti_scraping.serialization import DEFAULT_SERIALIZER, read_json, write_json
+
+logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _format_us(value: float | None) -> str:
+    return "-" if value is None else f"{value:,.1f}"
+
+
+def run(args: argparse.Namespace) -> int:
+    only = [name.strip() for name in args.only.split(",")] if args.only else None
+    logger.info("Corpus sintetico di %d articoli (seed %d), %d ripetizioni", args.size, args.seed, args.repeat)
+    results = run_suite(size=args.size, repeat=args.repeat, seed=args.seed, only=only)
+    for name, result in results["benchmarks"].items():
+        logger.info(
+            "  %-18s min %8.3fs  mediana %8.3fs  %10s µs/elemento",
+            name,
+            result["min"],
+            result["median"],
+            _format_us(result["per_item_us"]),
+        )
+    write_json(results, args.output)
+    logger.info("Risultati salvati in %s", args.output)
+    return 0
+
+
+def run_compare(args: argparse.Namespace) -> int:
+    baseline = read_json(args.baseline)
+    current = read_json(args.current)
+    for key in ("size", "seed"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            logger.warning(
+                "%s diverso (baseline %s, attuale %s): i tempi per elemento sono confrontabili solo in parte",
+                key,
+                baseline["meta"].get(key),
+                current["meta"].get(key),
+            )
+    rows = compare(baseline, current, threshold=args.threshold)
+    for row in rows:
+        ratio = "-" if row["ratio"] is None else f"{row['ratio']:.2f}x"
+        logger.info(
+            "  %-18s %10s → %10s µs/elemento  %7s  %s",
+            row["name"],
+            _format_us(row["baseline_us"]),
+            _format_us(row["current_us"]),
+            ratio,
+            row["status"],
+        )
+    regressions = [row["name"] for row in rows if row["status"] == "regressione"]
+    if regressions:
+        logger.error("Regressioni oltre il %.0f%%: %s", args.threshold * 100, ", ".join(regressions))
+        return 1
+    logger.info("Nessuna regressione oltre il %.0f%%", args.threshold * 100)
+    return 0
+
+
+def export_corpus(args: argparse.Namespace) -> int:
+    """Scrive il corpus sintetico in JSONL, un record per riga, senza tenerlo tutto in memoria."""
+    output = pathlib.Path(args.output)
+    tmp_path = output.with_name(f".{output.name}.tmp")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with tmp_path.open("wb") as handle:
+        for record in synthetic_records(load_base(), args.size, seed=args.seed):
+            handle.write(DEFAULT_SERIALIZER.dumps(record, pretty=False))
+            handle.write(b"\n")
+    tmp_path.replace(output)
+    logger.info("Corpus di %d articoli salvato in %s", args.size, output)
+    return 0
+
+
+def _server_config(args: argparse.Namespace) -> ServerConfig:
+    return ServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+
+def _add_server_arguments(parser: argparse.ArgumentParser, *, size: int) -> None:
+    parser.add_argument("--size", type=int, default=size, help="Articoli dell'archivio sintetico")
+    parser.add_argument("--seed", type=int, default=0, help="Seed dell'archivio e degli errori iniettati")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latenza aggiunta a ogni risposta, in secondi")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latenza casuale aggiuntiva massima, in secondi")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Frazione di risposte 429 (0.05 = 5%%)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Valore di Retry-After delle risposte 429, in secondi interi")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Frazione di risposte 5xx")
+
+
+def serve(args: argparse.Namespace) -> int:
+    archive = Archive.from_records(synthetic_records(load_base(), args.size, seed=args.seed), seed=args.seed)
+    server = SimulatedWordPress(archive, _server_config(args), host=args.host, port=args.port)
+    logger.info("Archivio di %d articoli servito su %s (Ctrl-C per fermare)", args.size, server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    logger.info("Richieste servite: %s", server.stats.snapshot())
+    return 0
+
+
+def throughput(args: argparse.Namespace) -> int:
+    logger.info("Archivio sintetico di %d articoli, client %s", args.size, "asincrono" if args.use_async else "sincrono")
+    results = run_throughput(
+        size=args.size,
+        seed=args.seed,
+        config=_server_config(args),
+        use_async=args.use_async,
+        fetch_workers=args.fetch_workers,
+        projection=args.projection,
+        two_phase=args.two_phase,
+        workers=args.workers,
+        max_pages=args.max_pages,
+        throttle_seconds=args.throttle,
+        requests_per_second=args.requests_per_second,
+    )
+    served = results["server"]
+    logger.info(
+        "  %d richieste (%s), %.1f MB, %d post → %d record (%d tenuti)",
+        served["requests"],
+        ", ".join(f"{status}: {count}" for status, count in sorted(served["by_status"].items())),
+        served["bytes"] / 1e6,
+        served["posts"],
+        results["records"],
+        results["kept"],
+    )
+    logger.info(
+        "  %.1f richieste/s, %.2f MB/s, %.0f post/s durante lo scaricamento",
+        results["requests_per_second"] or 0,
+        results["megabytes_per_second"] or 0,
+        results["posts_per_second"] or 0,
+    )
+    logger.info(
+        "  fasi: %s; totale %.2fs",
+        ", ".join(f"{name} {seconds:.2f}s" for name, seconds in results["stages"].items()),
+        results["total_seconds"],
+    )
+    write_json(results, args.output)
+    logger.info("Risultati salvati in %s", args.output)
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark della pipeline incidenti")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Esegue i benchmark e salva i risultati in JSON")
+    run_parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Articoli del corpus sintetico (es. 10000-1000000)")
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Ripetizioni di ogni benchmark")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed del corpus sintetico")
+    run_parser.add_argument("--only", default=None, help=f"Benchmark da eseguire, separati da virgola ({', '.join(BENCHMARKS)})")
+    run_parser.add_argument("--output", default="benchmarks/results/latest.json", help="File JSON dei risultati")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="Confronta due file di risultati; esce con 1 se ci sono regressioni")
+    compare_parser.add_argument("baseline", help="Risultati di riferimento (es. benchmarks/baseline.json)")
+    compare_parser.add_argument("current", nargs="?", default="benchmarks/results/latest.json", help="Risultati da verificare")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Peggioramento relativo tollerato del tempo per elemento (0.10 = 10%%)",
+    )
+    compare_parser.set_defaults(handler=run_compare)
+
+    corpus_parser = commands.add_parser("corpus", help="Scrive il corpus sintetico in JSONL")
+    corpus_parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Articoli da generare")
+    corpus_parser.add_argument("--seed", type=int, default=0, help="Seed del corpus sintetico")
+    corpus_parser.add_argument("--output", default="benchmarks/results/corpus.jsonl", help="File JSONL di output")
+    corpus_parser.set_defaults(handler=export_corpus)
+
+    serve_parser = commands.add_parser("serve", help="Avvia il server WordPress simulato finché non viene interrotto")
+    _add_server_arguments(serve_parser, size=DEFAULT_SIZE)
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Indirizzo di ascolto")
+    serve_parser.add_argument("--port", type=int, default=8080, help="Porta di ascolto")
+    serve_parser.set_defaults(handler=serve)
+
+    throughput_parser = commands.add_parser("throughput", help="Esegue la pipeline contro il server simulato e ne misura il throughput")
+    _add_server_arguments(throughput_parser, size=DEFAULT_THROUGHPUT_SIZE)
+    throughput_parser.add_argument("--async", dest="use_async", action="store_true", help="Usa il client asincrono")
+    throughput_parser.add_argument("--fetch-workers", type=int, default=1, help="Pagine scaricate in parallelo (client sincrono)")
+    throughput_parser.add_argument("--throttle", type=float, default=0.0, help="Pausa tra le richieste del client sincrono, in secondi")
+    throughput_parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=DEFAULT_REQUESTS_PER_SECOND,
+        help="Limite di richieste al secondo del client asincrono",
+    )
+    throughput_parser.add_argument("--projection", action="store_true", help="Scarica solo i campi necessari (_fields)")
+    throughput_parser.add_argument("--two-phase", action="store_true", help="Ricerche per keyword in due fasi (id, poi include)")
+    throughput_parser.add_argument("--workers", type=int, default=1, help="Processi per la trasformazione dei post")
+    throughput_parser.add_argument("--max-pages", type=int, default=None, help="Pagine massime per query")
+    throughput_parser.add_argument("--output", default="benchmarks/results/throughput.json", help="File JSON dei risultati")
+    throughput_parser.set_defaults(handler=throughput)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
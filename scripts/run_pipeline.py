@@ -2,11 +2,13 @@
 from __future__ import annotations
 
 import argparse
-import json
+import asyncio
+import contextlib
 import logging
 import pathlib
 
 import sys
+from typing import Tuple
 
 CURRENT_DIR = pathlib.Path(__file__).resolve().parent
 ROOT_DIR = CURRENT_DIR.parent
@@ -17,19 +19,33 @@ for path in (SRC_DIR, ROOT_DIR):
     if path_str not in sys.path:
         sys.path.insert(0, path_str)
 
-from incidenti_scraping.pipeline import collect_incidents, save_dataset
-from analysis.metrics import build_metrics, save_metrics
-
-# Importa la funzione di pulizia
-CLEAN_SCRIPT = CURRENT_DIR / "clean_dataset.py"
-if CLEAN_SCRIPT.exists():
-    import importlib.util
-    spec = importlib.util.spec_from_file_location("clean_dataset", CLEAN_SCRIPT)
-    clean_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(clean_module)
-    clean_dataset = clean_module.clean_dataset
-else:
-    clean_dataset = None
+from incidenti_scraping.cleaning import is_road_accident
+from incidenti_scraping.dashboard_export import export_dashboard
+from incidenti_scraping.feature_cache import FeatureCache
+from incidenti_scraping.http_cache import ResponseCache
+from incidenti_scraping.instrumentation import RunMetrics, write_prometheus_textfile, write_run_report
+from incidenti_scraping.models import Incident
+from incidenti_scraping.pipeline import (
+    clean_incidents,
+    collect_incidents,
+    collect_incidents_async,
+    load_scrape_state,
+    merge_records,
+    merge_removed,
+    save_dataset,
+    save_scrape_state,
+    stream_incidents,
+)
+from incidenti_scraping.search_index import build_search_index, save_search_index
+from incidenti_scraping.serialization import read_json
+from analysis.metrics import (
+    build_metrics_state,
+    load_metrics_state,
+    record_deltas,
+    records_digest,
+    save_metrics,
+    save_metrics_state,
+)
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
@@ -38,6 +54,80 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Scraping incidenti CoratoLive")
     parser.add_argument("--max-pages", type=int, default=None, help="Limite di pagine per keyword/tag (None = tutte le pagine)")
     parser.add_argument("--limit", type=int, default=None, help="Limita numero record finali")
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=1,
+        help="Numero di pagine scaricate in parallelo per ogni keyword/tag (1 = sequenziale)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processi usati per trasformare i post in record (1 = seriale)",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Esegue tag e keyword in parallelo con il client asincrono (richiede aiohttp)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Scarica solo i post nuovi/modificati dall'ultima esecuzione e li unisce al dataset esistente",
+    )
+    parser.add_argument(
+        "--projection",
+        action="store_true",
+        help="Scarica solo i campi necessari (_fields) e risolve categorie/tag a parte invece di usare _embed",
+    )
+    parser.add_argument(
+        "--two-phase",
+        action="store_true",
+        help="Per le keyword scarica prima solo gli id, poi il contenuto dei soli post non ancora visti",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Scrive incidents.jsonl e incidents.parquet in streaming a memoria costante (con pulizia, senza metriche e dashboard)",
+    )
+    parser.add_argument(
+        "--http-cache",
+        default=None,
+        help="File SQLite per la cache delle risposte HTTP (disattivata se omesso)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=24 * 3600,
+        help="Secondi in cui una risposta in cache è usata senza rivalidarla",
+    )
+    parser.add_argument(
+        "--feature-cache",
+        default=None,
+        help="File SQLite in cui riusare le feature dei post non modificati tra un'esecuzione e l'altra",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Usa solo la cache HTTP, senza contattare il sito (richiede --http-cache)",
+    )
+    parser.add_argument(
+        "--compact-json",
+        action="store_true",
+        help="Scrive i file JSON compatti invece che indentati (più piccoli e veloci da generare)",
+    )
+    parser.add_argument(
+        "--partition-parquet",
+        action="store_true",
+        help="Scrive anche incidents_by_year/, dataset Parquet partizionato per anno (in modalità incrementale riscrive solo gli anni toccati)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Confronta le metriche aggiornate in modo incrementale con un ricalcolo completo",
+    )
     parser.add_argument(
         "--output-dir",
         default="data",
@@ -48,62 +138,192 @@ def main() -> None:
         default="dashboard/public/data",
         help="Cartella in cui salvare i dati per la dashboard",
     )
+    parser.add_argument(
+        "--run-report",
+        default=None,
+        help="Report JSON dell'esecuzione con tempi per fase, richieste HTTP e conteggi (default: <output-dir>/run_report.json)",
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        default=None,
+        help="File .prom per il textfile collector di node_exporter (non scritto se omesso)",
+    )
     args = parser.parse_args()
+    if args.offline and not args.http_cache:
+        parser.error("--offline richiede --http-cache")
+    if args.use_async and args.http_cache:
+        parser.error("--http-cache non è supportata dal client asincrono")
+    if args.stream and (args.use_async or args.incremental):
+        parser.error("--stream non è compatibile con --async e --incremental")
+    if args.incremental and (args.limit is not None or args.max_pages is not None):
+        # il watermark avanzerebbe anche sui post scartati dal limite, che non verrebbero più riscaricati
+        parser.error("--incremental non è compatibile con --limit e --max-pages")
 
-    records = collect_incidents(max_pages=args.max_pages, limit=args.limit)
-    outputs = save_dataset(records, args.output_dir)
-    
-    # Pulizia automatica del dataset
-    if clean_dataset:
-        logging.info("\n" + "=" * 80)
-        logging.info("ESECUZIONE PULIZIA AUTOMATICA DATASET")
-        logging.info("=" * 80)
-        incidents_path = pathlib.Path(args.output_dir) / "incidents.json"
-        clean_result = clean_dataset(
-            incidents_path,
-            incidents_path,  # Sovrascrive il file originale
-            dry_run=False,
+    run_metrics = RunMetrics(script="run_pipeline")
+    status = "error"
+    try:
+        run(args, run_metrics)
+        status = "ok"
+    finally:
+        # scritti anche se l'esecuzione fallisce: il monitoraggio deve vederlo
+        run_metrics.finish(status)
+        report_path = write_run_report(
+            run_metrics,
+            args.run_report or pathlib.Path(args.output_dir) / "run_report.json",
+            options=vars(args),
         )
-        
-        # Ricarica i record puliti
-        with incidents_path.open("r", encoding="utf-8") as fh:
-            records = json.load(fh)
-        
-        # Rigenera il dataset parquet con i dati puliti
-        import pandas as pd
-        df = pd.DataFrame(records)
-        parquet_path = pathlib.Path(args.output_dir) / "incidents.parquet"
-        df.to_parquet(parquet_path, index=False)
-        
-        logging.info("\n📊 REPORT PULIZIA:")
-        logging.info("  Totale record prima: %d", clean_result["total"])
-        logging.info("  Record mantenuti: %d (%.1f%%)", clean_result["kept"], 
-                    (clean_result["kept"] / clean_result["total"] * 100) if clean_result["total"] > 0 else 0)
-        logging.info("  Record rimossi: %d (%.1f%%)", clean_result["removed"],
-                    (clean_result["removed"] / clean_result["total"] * 100) if clean_result["total"] > 0 else 0)
-        if clean_result.get("removed_by_reason"):
-            logging.info("  Dettaglio rimozioni:")
-            for reason, count in clean_result["removed_by_reason"].items():
-                if count > 0:
-                    logging.info("    - %s: %d", reason, count)
-        logging.info("=" * 80 + "\n")
-    else:
-        logging.warning("Script di pulizia non trovato, saltando la pulizia automatica")
-    
-    # Rigenera metriche con i dati puliti
-    metrics = build_metrics(records)
-    metrics_path = save_metrics(metrics, pathlib.Path(args.output_dir) / "metrics.json")
+        logging.info("Report dell'esecuzione salvato: %s", report_path)
+        if args.prometheus_textfile:
+            logging.info("Metriche Prometheus salvate: %s", write_prometheus_textfile(run_metrics, args.prometheus_textfile))
+
+
+def open_caches(args: argparse.Namespace, stack: contextlib.ExitStack) -> Tuple[ResponseCache | None, FeatureCache | None]:
+    """Apre le cache richieste; ``stack`` le chiude (e salva) anche se lo scaricamento fallisce."""
+    cache = None
+    if args.http_cache:
+        cache = ResponseCache(args.http_cache, ttl_seconds=args.cache_ttl, offline=args.offline)
+        stack.callback(cache.close)
+    feature_cache = None
+    if args.feature_cache:
+        feature_cache = FeatureCache(args.feature_cache)
+        stack.callback(feature_cache.close)
+    return cache, feature_cache
+
+
+def run(args: argparse.Namespace, run_metrics: RunMetrics) -> None:
+    if args.stream:
+        with contextlib.ExitStack() as stack:
+            cache, feature_cache = open_caches(args, stack)
+            outputs = stream_incidents(
+                args.output_dir,
+                max_pages=args.max_pages,
+                limit=args.limit,
+                fetch_workers=args.fetch_workers,
+                client_options={"cache": cache} if cache else None,
+                projection=args.projection,
+                two_phase=args.two_phase,
+                record_filter=is_road_accident,
+                feature_cache=feature_cache,
+                metrics=run_metrics,
+            )
+        run_metrics.set("dataset_records", outputs["count"], dataset="incidents")
+        logging.info("Dataset salvato in streaming: %s", outputs)
+        return
+
+    output_dir = pathlib.Path(args.output_dir)
+    state_path = output_dir / "scrape_state.json"
+    existing_path = output_dir / "incidents.json"
+    state = None
+    if args.incremental:
+        state = load_scrape_state(state_path)
+        if state and existing_path.exists():
+            logging.info("Modalità incrementale: watermark da %s", state_path)
+        else:
+            logging.info("Modalità incrementale: nessuno stato precedente, scaricamento completo")
+            state = {}
+
+    with contextlib.ExitStack() as stack:
+        cache, feature_cache = open_caches(args, stack)
+        if args.use_async:
+            records = asyncio.run(
+                collect_incidents_async(
+                    max_pages=args.max_pages,
+                    limit=args.limit,
+                    state=state,
+                    projection=args.projection,
+                    two_phase=args.two_phase,
+                    workers=args.workers,
+                    feature_cache=feature_cache,
+                    metrics=run_metrics,
+                )
+            )
+        else:
+            records = collect_incidents(
+                max_pages=args.max_pages,
+                limit=args.limit,
+                fetch_workers=args.fetch_workers,
+                state=state,
+                client_options={"cache": cache} if cache else None,
+                projection=args.projection,
+                two_phase=args.two_phase,
+                workers=args.workers,
+                feature_cache=feature_cache,
+                metrics=run_metrics,
+            )
+    partition_years = None
+    existing = None
+    if args.incremental and existing_path.exists():
+        with run_metrics.stage("merge"):
+            existing = [Incident.from_dict(item) for item in read_json(existing_path)]
+            logging.info("Unione di %d record nuovi/modificati con %d esistenti", len(records), len(existing))
+            if (output_dir / "incidents_by_year").is_dir():
+                # anni dei record nuovi e, per quelli modificati, anche l'anno precedente
+                previous_year = {record.id: record.year for record in existing}
+                partition_years = {record.year for record in records}
+                partition_years.update(previous_year[record.id] for record in records if record.id in previous_year)
+            records = merge_records(existing, records)
+
+    # Pulizia in memoria: ogni file viene scritto una sola volta, già pulito
+    records, removed, _ = clean_incidents(records, metrics=run_metrics)
+    removed_path = output_dir / "incidents_removed.json"
+    if existing is not None and removed_path.exists():
+        # incidents.json è già pulito: gli scarti delle esecuzioni precedenti sono solo qui
+        removed = merge_removed(read_json(removed_path), removed, records)
 
     dashboard_dir = pathlib.Path(args.dashboard_data)
-    dashboard_dir.mkdir(parents=True, exist_ok=True)
-    with (dashboard_dir / "incidents.json").open("w", encoding="utf-8") as fh:
-        json.dump(records, fh, ensure_ascii=False, indent=2)
-    with (dashboard_dir / "metrics.json").open("w", encoding="utf-8") as fh:
-        json.dump(metrics, fh, ensure_ascii=False, indent=2)
+    pretty = not args.compact_json
+    with run_metrics.stage("save"):
+        outputs = save_dataset(
+            records,
+            output_dir,
+            removed=removed,
+            mirror_dirs=[dashboard_dir],
+            pretty=pretty,
+            partitioned=args.partition_parquet,
+            partition_years=partition_years,
+        )
+    run_metrics.set("dataset_records", len(records), dataset="incidents")
+    run_metrics.set("dataset_records", len(removed), dataset="removed")
+    with run_metrics.stage("dashboard_export"):
+        manifest_path = export_dashboard(records, removed, dashboard_dir / "export")
+    with run_metrics.stage("search_index"):
+        search_index_path = save_search_index(build_search_index(records), output_dir / "search_index.json")
+    with run_metrics.stage("metrics"):
+        metrics_state_path = output_dir / "metrics_state.json"
+        metrics_state = load_metrics_state(metrics_state_path) if existing is not None else None
+        if metrics_state is not None and metrics_state.digest != records_digest(existing):
+            logging.info("Stato delle metriche non allineato a %s: ricalcolo completo", existing_path)
+            metrics_state = None
+        if metrics_state is not None:
+            added, dropped = record_deltas(existing, records)
+            metrics_state.apply(added=added, removed=dropped)
+            logging.info("Metriche aggiornate in modo incrementale: %d record aggiunti, %d tolti", len(added), len(dropped))
+            if args.verify:
+                expected = build_metrics_state(records)
+                if metrics_state == expected:
+                    logging.info("Verifica metriche: stato incrementale identico al ricalcolo completo")
+                else:
+                    logging.error("Verifica metriche: stato incrementale diverso dal ricalcolo completo, uso quest'ultimo")
+                    metrics_state = expected
+        else:
+            metrics_state = build_metrics_state(records)
+        metrics = metrics_state.to_metrics()
+        save_metrics_state(metrics_state, metrics_state_path)
+        metrics_path = save_metrics(
+            metrics,
+            output_dir / "metrics.json",
+            mirror_paths=[dashboard_dir / "metrics.json"],
+            pretty=pretty,
+        )
+
+    if state is not None:
+        save_scrape_state(state, state_path)
+        logging.info("Stato incrementale salvato: %s", state_path)
 
     logging.info("Dataset salvato: %s", outputs)
     logging.info("Metriche salvate: %s", metrics_path)
-    logging.info("Dati pronti per dashboard in %s", dashboard_dir)
+    logging.info("Indice di ricerca salvato: %s", search_index_path)
+    logging.info("Dati pronti per dashboard in %s (manifest %s)", dashboard_dir, manifest_path)
 
 
 if __name__ == "__main__":
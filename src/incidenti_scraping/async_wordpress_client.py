@@ -0,0 +1,283 @@
+"""Client asincrono per l'API REST di WordPress (richiede ``aiohttp``)."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - dipendenza opzionale
+    aiohttp = None
+
+from .config import USER_AGENT, WP_API_BASE
+from .instrumentation import RunMetrics
+from .wordpress_client import (
+    RETRY_BACKOFF_FACTOR,
+    RETRY_STATUS_CODES,
+    RETRY_TOTAL,
+    INCLUDE_BATCH_SIZE,
+    IncompleteFetch,
+    build_post_params,
+)
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_MAX = 120.0
+
+
+class TokenBucket:
+    """Rate limit a token bucket condiviso da tutte le coroutine."""
+
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncWordPressClient:
+    """Controparte asincrona di :class:`WordPressClient`.
+
+    Tutte le query condividono un'unica sessione ``aiohttp`` (connessioni
+    keep-alive riutilizzate), con un limite di connessioni per host e un
+    token bucket globale al posto della pausa fissa tra le pagine.
+    """
+
+    def __init__(
+        self,
+        base_api: str = WP_API_BASE,
+        *,
+        requests_per_second: float = 2.0,
+        burst: int = 4,
+        max_per_host: int = 6,
+        timeout: float = 90,
+        metrics: Optional[RunMetrics] = None,
+    ) -> None:
+        if aiohttp is None:
+            raise ImportError("AsyncWordPressClient richiede il pacchetto 'aiohttp' (pip install aiohttp)")
+        self.base_api = base_api.rstrip("/")
+        self.max_per_host = max(1, max_per_host)
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(requests_per_second, burst)
+        self.metrics = metrics
+        self.session: Optional["aiohttp.ClientSession"] = None
+        self._terms: Dict[str, Dict[int, str]] = {"categories": {}, "tags": {}}
+
+    async def __aenter__(self) -> "AsyncWordPressClient":
+        connector = aiohttp.TCPConnector(limit_per_host=self.max_per_host)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"User-Agent": USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+        """Stessa attesa di ``urllib3.Retry``: Retry-After se presente, altrimenti esponenziale."""
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        if attempt <= 1:
+            return 0.0
+        return min(BACKOFF_MAX, RETRY_BACKOFF_FACTOR * (2 ** (attempt - 1)))
+
+    async def _get_page(self, url: str, params: Dict) -> Optional[Tuple[List[Dict], Dict[str, str]]]:
+        """Scarica una pagina con retry su 429/5xx; ``None`` se la richiesta fallisce."""
+        if self.session is None:
+            raise RuntimeError("AsyncWordPressClient va usato come 'async with'")
+        attempts: List[Optional[int]] = []
+        started: Optional[float] = None
+        while True:
+            await self.rate_limiter.acquire()
+            if started is None:
+                # come nel client sincrono: durata dopo la prima attesa del rate limit, retry compresi
+                started = time.perf_counter()
+            logger.debug("Richiesta pagina %s: %s params=%s", params.get("page"), url, params)
+            retry_after = None
+            status = None
+            try:
+                async with self.session.get(url, params=params) as resp:
+                    status = resp.status
+                    if resp.status not in RETRY_STATUS_CODES:
+                        body = await resp.read()
+                        if self.metrics is not None:
+                            self.metrics.record_request(
+                                url,
+                                seconds=time.perf_counter() - started,
+                                status=resp.status,
+                                size=len(body),
+                                attempts=attempts,
+                            )
+                        resp.raise_for_status()
+                        data = await resp.json(content_type=None)
+                        return data, dict(resp.headers)
+                    error = f"HTTP {resp.status}"
+                    if resp.status in (429, 503):
+                        retry_after = resp.headers.get("Retry-After")
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = str(exc) or exc.__class__.__name__
+            attempts.append(status)
+            attempt = len(attempts)
+            if attempt > RETRY_TOTAL:
+                logger.warning("Errore durante la richiesta a %s: %s (tentativi esauriti)", url, error)
+                if self.metrics is not None:
+                    # l'ultimo tentativo è l'esito finale, non un retry
+                    self.metrics.record_request(
+                        url,
+                        seconds=time.perf_counter() - started,
+                        status=attempts[-1],
+                        attempts=attempts[:-1],
+                    )
+                return None
+            delay = self._backoff(attempt, retry_after)
+            logger.debug("Retry %d per %s dopo %.1fs (%s)", attempt, url, delay, error)
+            await asyncio.sleep(delay)
+
+    async def fetch_posts(
+        self,
+        *,
+        search: Optional[str] = None,
+        tags: Optional[List[int]] = None,
+        categories: Optional[List[int]] = None,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        modified_after: Optional[str] = None,
+        modified_before: Optional[str] = None,
+        include: Optional[Sequence[int]] = None,
+        per_page: int = 100,
+        max_pages: Optional[int] = None,
+        embed: bool = True,
+        fields: Optional[Sequence[str]] = None,
+        strict: bool = False,
+    ) -> List[Dict]:
+        """Restituisce tutti i post della query, in ordine di data decrescente.
+
+        La prima pagina fornisce ``X-WP-TotalPages``; le successive vengono
+        richieste in parallelo entro i limiti di host e rate. I post si
+        fermano alla prima pagina non scaricata; con ``strict`` viene
+        sollevata :class:`IncompleteFetch` con i post ottenuti fin lì.
+        """
+        url = f"{self.base_api}/posts"
+        params = build_post_params(
+            search=search,
+            tags=tags,
+            categories=categories,
+            after=after,
+            before=before,
+            modified_after=modified_after,
+            modified_before=modified_before,
+            include=include,
+            per_page=per_page,
+            embed=embed,
+            fields=fields,
+        )
+        first = await self._get_page(url, {**params, "page": 1})
+        if first is None:
+            if strict:
+                raise IncompleteFetch(f"pagina 1 di {url} non scaricata")
+            return []
+        posts, headers = first
+        try:
+            total_pages = int(headers.get("X-WP-TotalPages", 1))
+        except ValueError:
+            total_pages = 1
+        if not posts or len(posts) < per_page:
+            total_pages = 1
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+
+        pages = await asyncio.gather(
+            *(self._get_page(url, {**params, "page": page}) for page in range(2, total_pages + 1))
+        )
+        for page, result in enumerate(pages, start=2):
+            if result is None and strict:
+                raise IncompleteFetch(f"pagina {page} di {url} non scaricata", posts)
+            if result is None or not result[0]:
+                break
+            posts.extend(result[0])
+        logger.info("Recuperate %d pagine, totale %d post", total_pages, len(posts))
+        return posts
+
+    async def fetch_posts_by_ids(self, post_ids: Iterable[int], **options) -> List[Dict]:
+        """Scarica i post indicati con ``include``, con i blocchi da 100 id in parallelo.
+
+        Con ``strict`` un blocco non scaricato non interrompe gli altri: alla
+        fine viene sollevata :class:`IncompleteFetch` con tutti i post ottenuti.
+        """
+        ids = sorted(set(post_ids), reverse=True)
+        batches = [ids[start:start + INCLUDE_BATCH_SIZE] for start in range(0, len(ids), INCLUDE_BATCH_SIZE)]
+        results = await asyncio.gather(
+            *(
+                self.fetch_posts(include=batch, per_page=INCLUDE_BATCH_SIZE, max_pages=1, **options)
+                for batch in batches
+            ),
+            return_exceptions=True,
+        )
+        posts: List[Dict] = []
+        incomplete = None
+        for result in results:
+            if isinstance(result, IncompleteFetch):
+                incomplete = result
+                posts.extend(result.posts)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                posts.extend(result)
+        if incomplete is not None:
+            raise IncompleteFetch(str(incomplete), posts)
+        return posts
+
+    async def resolve_terms(self, taxonomy: str, term_ids: Iterable[int]) -> Dict[int, str]:
+        """Come :meth:`WordPressClient.resolve_terms`, con i blocchi richiesti in parallelo."""
+        known = self._terms.setdefault(taxonomy, {})
+        missing = sorted({int(term_id) for term_id in term_ids} - known.keys())
+        url = f"{self.base_api}/{taxonomy}"
+        batches = [missing[start:start + INCLUDE_BATCH_SIZE] for start in range(0, len(missing), INCLUDE_BATCH_SIZE)]
+        results = await asyncio.gather(
+            *(
+                self._get_page(
+                    url,
+                    {
+                        "include": ",".join(str(term_id) for term_id in batch),
+                        "per_page": INCLUDE_BATCH_SIZE,
+                        "_fields": "id,name",
+                    },
+                )
+                for batch in batches
+            )
+        )
+        for result in results:
+            if result is None:
+                continue
+            for term in result[0]:
+                known[term["id"]] = term["name"]
+        return known
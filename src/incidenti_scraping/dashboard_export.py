@@ -0,0 +1,320 @@
+"""Export dei dati per la dashboard: indice leggero, shard per anno e analisi precalcolate.
+
+La dashboard legge ``manifest.json`` (non versionato) e da lì i file con
+l'hash del contenuto nel nome, che il browser può tenere in cache per
+sempre. Le analisi riproducono quelle che ``dashboard/src/App.tsx``
+calcolava nel browser, comprese le regex di veicoli e vittime, tradotte con
+la semantica delle regex JavaScript (``\\b`` e ``\\d`` ASCII, ``\\s`` Unicode).
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import pathlib
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+from .models import Incident
+from .search_index import build_search_index
+from .serialization import DEFAULT_SERIALIZER, atomic_write_bytes, read_json
+
+logger = logging.getLogger(__name__)
+
+EXPORT_VERSION = 1
+HASH_LENGTH = 12
+MONTHLY_TREND_MONTHS = 36
+TOP_PLACES = 20
+INDEX_FIELDS = ("id", "date", "severity", "title", "cities", "roads", "keywords")
+INDEX_ENCODED = ("severity", "cities", "roads", "keywords")
+SHARD_FIELDS = ("id", "excerpt", "link")
+SEVERITIES = ("informativo", "moderato", "grave", "fatale")
+WEEKDAY_ORDER = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+WEEKDAY_LABELS = {
+    "Monday": "Lunedì",
+    "Tuesday": "Martedì",
+    "Wednesday": "Mercoledì",
+    "Thursday": "Giovedì",
+    "Friday": "Venerdì",
+    "Saturday": "Sabato",
+    "Sunday": "Domenica",
+}
+
+# Spazi riconosciuti da \s e da trim() in JavaScript
+JS_WHITESPACE = "\t\n\v\f\r \u00a0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff"
+_JS_SPACE_CLASS = "[" + "".join(f"\\u{ord(char):04x}" for char in JS_WHITESPACE) + "]"
+
+
+def _js_regex(pattern: str) -> re.Pattern:
+    """Compila una regex scritta per JavaScript (flag ``gi``) con la stessa semantica."""
+    return re.compile(pattern.replace(r"\s", _JS_SPACE_CLASS), re.IGNORECASE | re.ASCII)
+
+
+VEHICLE_PATTERNS = [
+    ("Auto", _js_regex(r"\b(?:auto|automobile|vettura|macchina)\b")),
+    ("Moto", _js_regex(r"\b(?:moto|motociclo|motocicletta|scooter)\b")),
+    ("Bici", _js_regex(r"\b(?:bici|bicicletta|ciclista)\b")),
+    ("Tir/Camion", _js_regex(r"\b(?:tir|camion|mezzo pesante|autocarro)\b")),
+    ("Furgone", _js_regex(r"\b(?:furgone|van)\b")),
+    ("Bus", _js_regex(r"\b(?:bus|autobus|pullman)\b")),
+]
+
+CASUALTY_NEGATIVE_PATTERNS = [
+    _js_regex(r"mort[io]\s+(?:in|durante|per)\s+(?:guerra|battaglia|strage|attentato|omicidio)"),
+    _js_regex(r"ferit[io]\s+(?:in|durante|per)\s+(?:guerra|battaglia|strage|attentato)"),
+    _js_regex(r"vittim[ae]\s+(?:di|della|del)\s+(?:guerra|violenza|omicidio|strage)"),
+    _js_regex(r"mort[io]\s+(?:per|a causa di)\s+(?:malattia|cancro|infarto|ictus)"),
+]
+ACCIDENT_CONTEXT = _js_regex(r"\b(?:incidente|sinistro|scontro|schianto|tamponamento|ribaltamento|collisione)\b")
+DEATH_PATTERNS = [
+    _js_regex(r"\b(\d+)\s+(?:person[ae]|persone)\s+(?:mort[ae]|decedut[ae]|hanno perso la vita)\b"),
+    _js_regex(r"\b(\d+)\s+(?:mort[io]|decedut[io]|vittim[ae])\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b"),
+    _js_regex(r"\b(?:mort[io]|decedut[io]|ha perso la vita|hanno perso la vita)\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b"),
+    _js_regex(r"\b(?:un|una|uno)\s+(?:mort[io]|decedut[io]|vittima)\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b"),
+]
+DEATH_CONTEXT_PATTERNS = [
+    _js_regex(r"\b(\d+)\s+(?:mort[io]|decedut[io]|vittim[ae])\b"),
+    _js_regex(r"\b(?:un|una|uno)\s+(?:mort[io]|decedut[io]|vittima)\b"),
+    _js_regex(r"\b(?:mort[io]|decedut[io])\s+(?:in|nell'|nello|nel)\s+(?:ospedale|pronto\s+soccorso)\b"),
+]
+INJURY_PATTERNS = [
+    _js_regex(r"\b(\d+)\s+(?:person[ae]|persone)\s+(?:ferit[ae]|les[ae]|rimast[ae] ferit[ae])\b"),
+    _js_regex(r"\b(\d+)\s+(?:ferit[io]|les[io])\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b"),
+    _js_regex(r"\b(?:ferit[io]|les[io]|rimast[io] ferit[io])\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b"),
+    _js_regex(r"\b(?:un|una|uno)\s+(?:ferit[io]|les[io])\s+(?:in|nell'|nello|nel)\s+(?:incidente|sinistro|scontro|schianto)\b"),
+    _js_regex(r"\b(?:trasportat[io]|soccors[io]|portat[io])\s+(?:in|al|all')\s+(?:ospedale|pronto\s+soccorso|ps)\b"),
+]
+INJURY_CONTEXT_PATTERNS = [
+    _js_regex(r"\b(\d+)\s+(?:ferit[io]|les[io])\b"),
+    _js_regex(r"\b(?:un|una|uno|alcun[ie]|divers[ie])\s+(?:ferit[io]|les[io])\b"),
+    _js_regex(r"\b(?:ferit[io]|les[io])\s+(?:in|nell'|nello|nel)\s+(?:ospedale|pronto\s+soccorso|ps)\b"),
+    _js_regex(r"\b(?:rimast[io]|rimast[ae])\s+(?:ferit[io]|ferit[ae]|les[io]|les[ae])\b"),
+]
+_DIGITS = re.compile(r"[0-9]+")
+
+
+def extract_vehicles(text: str) -> List[str]:
+    """Tipi di veicolo menzionati nel testo (``extractVehicles`` della dashboard)."""
+    return [label for label, pattern in VEHICLE_PATTERNS if pattern.search(text)]
+
+
+def _sum_mentions(text: str, patterns: Sequence[re.Pattern], limit: int, words: Tuple[str, ...]) -> int:
+    found: Set[int] = set()
+    for pattern in patterns:
+        for match in pattern.finditer(text):
+            number = match.group(1) if pattern.groups else None
+            if not number:
+                digits = _DIGITS.search(match.group(0))
+                number = digits.group(0) if digits else None
+            if number:
+                value = int(number)
+                if 0 < value <= limit:
+                    found.add(value)
+            elif any(word in match.group(0).lower() for word in words):
+                found.add(1)
+    return sum(found)
+
+
+def extract_casualties(text: str) -> Tuple[int, int]:
+    """Stima ``(morti, feriti)`` dal testo (``extractCasualties`` della dashboard)."""
+    if any(pattern.search(text) for pattern in CASUALTY_NEGATIVE_PATTERNS):
+        return 0, 0
+    accident = ACCIDENT_CONTEXT.search(text) is not None
+    deaths = _sum_mentions(
+        text, DEATH_PATTERNS + (DEATH_CONTEXT_PATTERNS if accident else []), 50, ("mort", "decedut")
+    )
+    injuries = _sum_mentions(
+        text, INJURY_PATTERNS + (INJURY_CONTEXT_PATTERNS if accident else []), 100, ("ferit", "les")
+    )
+    return min(deaths, 10), min(injuries, 20)
+
+
+def _rank_places(counter: Dict[str, Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+    # sort stabile come Array.prototype.sort: a pari merito resta l'ordine di prima comparsa
+    ranked = sorted(counter.items(), key=lambda item: -item[1]["total"])[:limit]
+    return [{"name": name, "value": data["total"], **data["bySeverity"]} for name, data in ranked]
+
+
+def build_analytics(records: Sequence[Incident]) -> Dict[str, Any]:
+    """Serie che la dashboard mostra nei grafici, con la stessa struttura calcolata da ``App.tsx``.
+
+    ``monthlyTrend`` riporta il mese come ``YYYY-MM``: l'etichetta localizzata
+    viene formattata dal browser.
+    """
+    severity_counts = {severity: 0 for severity in SEVERITIES}
+    per_month: Counter = Counter()
+    per_year: Counter = Counter()
+    per_weekday: Counter = Counter()
+    roads: Dict[str, Dict[str, Any]] = {}
+    cities: Dict[str, Dict[str, Any]] = {}
+    vehicles: Counter = Counter()
+    casualties_by_year: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+    total_deaths = total_injuries = 0
+
+    for record in records:
+        severity = record.severity.value
+        severity_counts[severity] += 1
+        per_month[record.date[:7]] += 1
+        per_year[record.year] += 1
+        per_weekday[record.weekday] += 1
+
+        full_text = f"{record.title} {record.excerpt} {record.content}"
+        vehicles.update(extract_vehicles(full_text))
+        deaths, injuries = extract_casualties(full_text)
+        total_deaths += deaths
+        total_injuries += injuries
+        casualties_by_year[record.year][0] += deaths
+        casualties_by_year[record.year][1] += injuries
+
+        for values, counter in ((record.roads, roads), (record.cities, cities)):
+            for value in values or ():
+                key = value.strip(JS_WHITESPACE)
+                if not key:
+                    continue
+                entry = counter.setdefault(key, {"total": 0, "bySeverity": {name: 0 for name in SEVERITIES}})
+                entry["total"] += 1
+                entry["bySeverity"][severity] += 1
+
+    return {
+        "severity": severity_counts,
+        "monthlyTrend": [{"month": month, "value": per_month[month]} for month in sorted(per_month)[-MONTHLY_TREND_MONTHS:]],
+        "yearlyTrend": [{"year": str(year), "value": per_year[year]} for year in sorted(per_year)],
+        "weekdayData": [
+            {"day": WEEKDAY_LABELS[day], "value": per_weekday[day]} for day in WEEKDAY_ORDER if per_weekday[day] > 0
+        ],
+        "topRoads": _rank_places(roads, TOP_PLACES),
+        "topCities": _rank_places(cities, TOP_PLACES),
+        "vehicles": [{"name": name, "value": value} for name, value in sorted(vehicles.items(), key=lambda item: -item[1])],
+        "casualties": {"totalMorti": total_deaths, "totalFeriti": total_injuries},
+        "casualtiesByYear": [
+            {"year": str(year), "morti": values[0], "feriti": values[1]} for year, values in sorted(casualties_by_year.items())
+        ],
+    }
+
+
+def _table(records: Iterable[Incident], fields: Sequence[str], encoded: Sequence[str] = ()) -> Dict[str, Any]:
+    """Tabella compatta: i nomi dei campi una volta sola, poi una lista di valori per record.
+
+    I campi in ``encoded`` (severità, luoghi, keyword: pochi valori ripetuti
+    molte volte) sono scritti come posizioni in ``dictionaries[campo]``;
+    per i campi lista ogni elemento diventa una posizione.
+    """
+    dictionaries: Dict[str, Dict[str, int]] = {field: {} for field in encoded}
+
+    def code(field: str, value: str) -> int:
+        positions = dictionaries[field]
+        position = positions.get(value)
+        if position is None:
+            position = positions[value] = len(positions)
+        return position
+
+    rows = []
+    for record in records:
+        row = []
+        for field in fields:
+            value = record[field]
+            if field in dictionaries:
+                value = [code(field, item) for item in value] if isinstance(value, list) else code(field, value)
+            row.append(value)
+        rows.append(row)
+    table: Dict[str, Any] = {"fields": list(fields), "rows": rows}
+    if dictionaries:
+        table["dictionaries"] = {field: list(positions) for field, positions in dictionaries.items()}
+    return table
+
+
+class _Writer:
+    """Scrive file JSON compatti con l'hash del contenuto nel nome, relativi a ``root``."""
+
+    def __init__(self, root: pathlib.Path) -> None:
+        self.root = root
+        self.written: List[str] = []
+
+    def write(self, stem: str, obj: Any) -> str:
+        data = DEFAULT_SERIALIZER.dumps(obj, pretty=False)
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        name = f"{stem}.{digest}.json"
+        path = self.root / name
+        # stesso nome = stesso contenuto: se il file c'è già non va riscritto
+        if not path.exists():
+            atomic_write_bytes(path, data)
+        self.written.append(name)
+        return name
+
+
+def _referenced_files(manifest: Dict[str, Any]) -> Set[str]:
+    files = manifest.get("files", {})
+    names = {value for value in files.values() if isinstance(value, str)}
+    for group in ("shards", "bodies"):
+        names.update(files.get(group, {}).values())
+    return names
+
+
+def export_dashboard(
+    records: Sequence[Incident],
+    removed: Sequence[Incident],
+    output_dir: str | pathlib.Path,
+) -> pathlib.Path:
+    """Scrive in ``output_dir`` l'export per la dashboard e restituisce il percorso di ``manifest.json``.
+
+    - ``index.<hash>.json``: id, data, severità, titolo, luoghi e keyword dei record tenuti;
+    - ``removed.<hash>.json``: lo stesso per i record scartati dalla pulizia (caricato solo su richiesta);
+    - ``shards/<anno>.<hash>.json``: estratto e link dei record (tenuti e scartati) di un anno;
+    - ``bodies/<anno>.<hash>.json``: testo completo per id, da scaricare solo quando serve;
+    - ``analytics.<hash>.json``: serie precalcolate da :func:`build_analytics`;
+    - ``search.<hash>.json``: indice invertito di tutti i record (:mod:`.search_index`), scaricato alla prima ricerca.
+
+    Il manifest viene scritto per ultimo; i file non più citati né dal nuovo
+    manifest né dal precedente vengono eliminati, così chi ha ancora in
+    memoria il manifest precedente trova i suoi file.
+    """
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / "manifest.json"
+    previous = read_json(manifest_path) if manifest_path.exists() else {}
+
+    records = [Incident.coerce(record) for record in records]
+    removed = [Incident.coerce(record) for record in removed]
+    by_year: Dict[int, List[Incident]] = defaultdict(list)
+    for record in (*records, *removed):
+        by_year[record.year].append(record)
+
+    writer = _Writer(output_dir)
+    files: Dict[str, Any] = {
+        "index": writer.write("index", _table(records, INDEX_FIELDS, INDEX_ENCODED)),
+        "removed": writer.write("removed", _table(removed, INDEX_FIELDS, INDEX_ENCODED)),
+        "analytics": writer.write("analytics", build_analytics(records)),
+        "search": writer.write("search", build_search_index([*records, *removed]).to_dict(include_docs=False)),
+        "shards": {},
+        "bodies": {},
+    }
+    for year in sorted(by_year, reverse=True):
+        year_records = by_year[year]
+        files["shards"][str(year)] = writer.write(f"shards/{year}", _table(year_records, SHARD_FIELDS))
+        files["bodies"][str(year)] = writer.write(
+            f"bodies/{year}", {str(record.id): record.content for record in year_records}
+        )
+
+    dates = [record.date for record in records]
+    manifest = {
+        "version": EXPORT_VERSION,
+        "total": len(records),
+        "removed": len(removed),
+        "range": {"min": min(dates), "max": max(dates)} if dates else None,
+        "years": sorted({record.year for record in records}, reverse=True),
+        "files": files,
+    }
+    atomic_write_bytes(manifest_path, DEFAULT_SERIALIZER.dumps(manifest))
+
+    keep = _referenced_files(manifest) | _referenced_files(previous)
+    for path in output_dir.rglob("*.json"):
+        name = path.relative_to(output_dir).as_posix()
+        if name != "manifest.json" and name not in keep:
+            path.unlink()
+    logger.info(
+        "Export dashboard: %d record, %d anni, primo caricamento %d byte",
+        len(records),
+        len(by_year),
+        sum((output_dir / name).stat().st_size for name in ("manifest.json", files["index"], files["analytics"])),
+    )
+    return manifest_path
@@ -0,0 +1,112 @@
+"""Date dei post: parsing ISO 8601 veloce e campi derivati indipendenti dal locale.
+
+WordPress restituisce sempre timestamp ISO (``2024-03-01T18:42:10``), che
+:meth:`datetime.fromisoformat` legge molto più in fretta di ``dateutil``;
+quest'ultimo resta solo per gli input irregolari. I nomi di mese e giorno
+vengono da tabelle fisse invece che da ``strftime``, che dipende dal locale
+del processo: in inglese per default (gli stessi valori di ``strftime`` con
+il locale C), in italiano a richiesta.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import re
+from typing import Dict, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from dateutil import parser as date_parser
+
+DEFAULT_LOCALE = "en"
+MONTH_NAMES: Dict[str, Tuple[str, ...]] = {
+    "en": (
+        "January", "February", "March", "April", "May", "June",
+        "July", "August", "September", "October", "November", "December",
+    ),
+    "it": (
+        "gennaio", "febbraio", "marzo", "aprile", "maggio", "giugno",
+        "luglio", "agosto", "settembre", "ottobre", "novembre", "dicembre",
+    ),
+}
+# indicizzati come datetime.weekday(): 0 = lunedì
+WEEKDAY_NAMES: Dict[str, Tuple[str, ...]] = {
+    "en": ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"),
+    "it": ("lunedì", "martedì", "mercoledì", "giovedì", "venerdì", "sabato", "domenica"),
+}
+# data di calendario in testa: altre forme accettate da fromisoformat (es.
+# settimane ISO, formato compatto) passano da dateutil come in precedenza
+ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}(?:$|\D)")
+# stessa condizione per le regex di Arrow (RE2, ancorata a mano)
+_ISO_PREFIX = "^" + ISO_DATE_RE.pattern
+
+
+def _names(table: Dict[str, Tuple[str, ...]], locale: str) -> Tuple[str, ...]:
+    try:
+        return table[locale]
+    except KeyError:
+        raise ValueError(f"Locale non supportato: {locale!r} (disponibili: {', '.join(table)})") from None
+
+
+def parse_datetime(value: str) -> dt.datetime:
+    """Legge un timestamp: ISO 8601 con :meth:`datetime.fromisoformat`, il resto con ``dateutil``."""
+    if ISO_DATE_RE.match(value):
+        try:
+            return dt.datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return date_parser.parse(value)
+
+
+def month_name(month: int, *, locale: str = DEFAULT_LOCALE) -> str:
+    return _names(MONTH_NAMES, locale)[month - 1]
+
+
+def weekday_name(weekday: int, *, locale: str = DEFAULT_LOCALE) -> str:
+    return _names(WEEKDAY_NAMES, locale)[weekday]
+
+
+def date_parts(value: str | dt.datetime, *, locale: str = DEFAULT_LOCALE) -> dict:
+    """Data, timestamp normalizzato, anno, mese, nome del mese e del giorno di ``value``."""
+    moment = value if isinstance(value, dt.datetime) else parse_datetime(value)
+    return {
+        "date": moment.date().isoformat(),
+        "datetime": moment.isoformat(),
+        "year": moment.year,
+        "month": moment.month,
+        "month_name": month_name(moment.month, locale=locale),
+        "weekday": weekday_name(moment.weekday(), locale=locale),
+    }
+
+
+def date_columns(datetimes: Sequence[str], *, locale: str = DEFAULT_LOCALE) -> Dict[str, pa.Array]:
+    """Colonne ``date``, ``year``, ``month``, ``month_name`` e ``weekday`` per tutti i timestamp insieme.
+
+    I timestamp ISO (quelli di :class:`.models.Incident`) vengono elaborati
+    da Arrow senza creare un ``datetime`` per valore; i campi sono quelli
+    dell'ora locale scritta nel testo, senza conversioni di fuso. Se anche
+    un solo valore non inizia con una data ISO si passa da
+    :func:`parse_datetime` valore per valore.
+    """
+    months = pa.array(_names(MONTH_NAMES, locale), pa.string())
+    weekdays = pa.array(_names(WEEKDAY_NAMES, locale), pa.string())
+    values = pa.array(datetimes, pa.string())
+    if len(values) and not pc.all(pc.match_substring_regex(values, _ISO_PREFIX)).as_py():
+        moments = [parse_datetime(value) for value in datetimes]
+        month = pa.array([moment.month for moment in moments], pa.int64())
+        return {
+            "date": pa.array([moment.date().isoformat() for moment in moments], pa.string()),
+            "year": pa.array([moment.year for moment in moments], pa.int64()),
+            "month": month,
+            "month_name": months.take(pc.subtract(month, 1)),
+            "weekday": weekdays.take(pa.array([moment.weekday() for moment in moments], pa.int64())),
+        }
+    date = pc.utf8_slice_codeunits(values, 0, 10)
+    month = pc.utf8_slice_codeunits(values, 5, 7).cast(pa.int64())
+    return {
+        "date": date,
+        "year": pc.utf8_slice_codeunits(values, 0, 4).cast(pa.int64()),
+        "month": month,
+        "month_name": months.take(pc.subtract(month, 1)),
+        # day_of_week conta da 0 = lunedì, come datetime.weekday()
+        "weekday": weekdays.take(pc.day_of_week(date.cast(pa.date32()))),
+    }
@@ -0,0 +1,93 @@
+"""Cache persistente delle feature estratte da ogni post."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import pathlib
+import sqlite3
+import zlib
+from typing import Dict, Iterable, Optional, Sequence
+
+from .text_utils import FEATURES_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+def post_fingerprint(post: Dict) -> str:
+    """Identifica la versione di un post: ``modified`` se presente, altrimenti un hash del contenuto."""
+    if post.get("modified"):
+        return f"modified:{post['modified']}"
+    digest = hashlib.sha1()
+    for field in ("date", "title", "excerpt", "content"):
+        value = post.get(field)
+        if isinstance(value, dict):
+            value = value.get("rendered", "")
+        digest.update(str(value or "").encode("utf-8"))
+        digest.update(b"\0")
+    return f"sha1:{digest.hexdigest()}"
+
+
+class FeatureCache:
+    """Feature per post indicizzate da ``(id, fingerprint, versione)``.
+
+    La versione combina :data:`text_utils.FEATURES_VERSION` (che cambia da
+    sola quando cambiano le regole di estrazione) e le keyword usate: se non
+    coincide la voce viene ignorata e ricalcolata. Per ogni post si conserva
+    solo l'ultima versione.
+    """
+
+    def __init__(self, path: str | pathlib.Path) -> None:
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS features (
+                post_id INTEGER PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                version TEXT NOT NULL,
+                data BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def version(keywords: Sequence[str]) -> str:
+        keywords_hash = hashlib.sha1("\0".join(keywords).encode("utf-8")).hexdigest()[:12]
+        return f"{FEATURES_VERSION}:{keywords_hash}"
+
+    def get(self, post: Dict, keywords: Sequence[str]) -> Optional[Dict]:
+        row = self._conn.execute(
+            "SELECT fingerprint, version, data FROM features WHERE post_id = ?", (post["id"],)
+        ).fetchone()
+        if row is None or row[0] != post_fingerprint(post) or row[1] != self.version(keywords):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(zlib.decompress(row[2]))
+
+    def put_many(self, items: Iterable[tuple], keywords: Sequence[str]) -> None:
+        """Salva coppie ``(post, features)``; il commit avviene in :meth:`close`."""
+        version = self.version(keywords)
+        rows = [
+            (
+                post["id"],
+                post_fingerprint(post),
+                version,
+                zlib.compress(json.dumps(features, ensure_ascii=False).encode("utf-8")),
+            )
+            for post, features in items
+        ]
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO features (post_id, fingerprint, version, data) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+
+    def close(self) -> None:
+        logger.info("Cache feature: %d riusate, %d ricalcolate", self.hits, self.misses)
+        self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,190 @@
+"""Cache HTTP persistente su SQLite per le risposte dell'API WordPress."""
+from __future__ import annotations
+
+import json
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Mapping, Optional
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Header da conservare: servono per la paginazione e per le GET condizionali
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "X-WP-Total", "X-WP-TotalPages")
+
+
+class CacheMiss(LookupError):
+    """Risposta assente dalla cache in modalità offline.
+
+    Non deriva da ``requests.RequestException``: il client non deve scambiarla
+    per un errore di rete e saltare la pagina, l'esecuzione deve fallire.
+    """
+
+
+class ResponseCache:
+    """Cache delle GET indicizzata per URL + parametri normalizzati.
+
+    I corpi sono compressi con zlib. Una voce più recente di ``ttl_seconds``
+    viene servita direttamente; altrimenti è rivalidata con
+    ``If-None-Match``/``If-Modified-Since``. Le voci più vecchie di
+    ``max_age_seconds`` vengono eliminate e, oltre ``max_bytes``, si
+    scartano quelle usate meno di recente. Con ``offline=True`` la rete non
+    viene mai contattata.
+    """
+
+    def __init__(
+        self,
+        path: str | pathlib.Path,
+        *,
+        ttl_seconds: float = 24 * 3600,
+        max_age_seconds: float = 30 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        offline: bool = False,
+    ) -> None:
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Mapping] = None) -> str:
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        return f"{url}?{urlencode(items)}" if items else url
+
+    def close(self) -> None:
+        self.evict()
+        with self._lock:
+            self._conn.close()
+
+    def _load(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT headers, body, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+        return row
+
+    def _save(self, key: str, headers: Mapping[str, str], body: bytes) -> None:
+        kept = {name: headers[name] for name in KEPT_HEADERS if name in headers}
+        blob = zlib.compress(body)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, headers, body, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(kept), blob, len(blob), now, now),
+            )
+            self._conn.commit()
+
+    def _refresh(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+
+    def seed(self, url: str, params: Optional[Mapping], body: bytes | str, headers: Optional[Mapping[str, str]] = None) -> None:
+        """Inserisce una risposta a mano (utile per lavorare senza rete)."""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self._save(self.make_key(url, params), headers or {"Content-Type": "application/json"}, body)
+
+    def evict(self) -> int:
+        """Elimina le voci scadute e, se serve, le meno usate oltre ``max_bytes``."""
+        removed = 0
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM responses WHERE stored_at < ?", (time.time() - self.max_age_seconds,)
+            )
+            removed += cur.rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+                victims = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    victims.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+                removed += len(victims)
+            self._conn.commit()
+        if removed:
+            logger.debug("Cache HTTP: eliminate %d voci", removed)
+        return removed
+
+    @staticmethod
+    def _build_response(url: str, headers: Dict[str, str], body: bytes) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.url = url
+        resp.headers = CaseInsensitiveDict(headers)
+        resp._content = body
+        resp.encoding = "utf-8"
+        resp.from_cache = True
+        return resp
+
+    def get(
+        self,
+        session: requests.Session,
+        url: str,
+        params: Optional[Mapping] = None,
+        *,
+        before_request: Optional[Callable[[], None]] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """Esegue una GET passando dalla cache.
+
+        ``before_request`` viene chiamato solo se serve davvero la rete
+        (es. il rate limiter del client), non per le risposte servite dalla cache.
+        """
+        key = self.make_key(url, params)
+        row = self._load(key)
+        if row is not None:
+            headers = json.loads(row[0])
+            body = zlib.decompress(row[1])
+            if self.offline or time.time() - row[2] < self.ttl_seconds:
+                return self._build_response(key, headers, body)
+        elif self.offline:
+            raise CacheMiss(f"Risposta non in cache (offline): {key}")
+
+        conditional = {}
+        if row is not None:
+            if headers.get("ETag"):
+                conditional["If-None-Match"] = headers["ETag"]
+            if headers.get("Last-Modified"):
+                conditional["If-Modified-Since"] = headers["Last-Modified"]
+        if before_request is not None:
+            before_request()
+        resp = session.get(url, params=params, headers=conditional or None, **kwargs)
+        if resp.status_code == 304 and row is not None:
+            logger.debug("Cache HTTP: %s non modificato", key)
+            self._refresh(key)
+            return self._build_response(key, headers, body)
+        if resp.status_code == 200:
+            self._save(key, resp.headers, resp.content)
+        return resp
@@ -0,0 +1,303 @@
+"""Strumentazione di un'esecuzione: contatori, istogrammi e tempi per fase.
+
+Un :class:`RunMetrics` viene passato ai componenti che lo supportano
+(``metrics=`` di :class:`.WordPressClient`, :func:`.pipeline.collect_incidents`,
+:func:`.cleaning.clean_records`, ...) e alla fine finisce in
+``run_report.json`` (:func:`write_run_report`) e, volendo, in un file per il
+textfile collector di Prometheus (:func:`write_prometheus_textfile`). Senza
+``metrics`` i componenti non misurano nulla.
+"""
+from __future__ import annotations
+
+import bisect
+import contextlib
+import datetime as dt
+import pathlib
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+from .serialization import atomic_write_bytes, write_json
+
+REPORT_VERSION = 1
+PROMETHEUS_PREFIX = "incidenti_"
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 10_000_000)
+
+# descrizioni per gli ``# HELP`` di Prometheus; le metriche non elencate escono senza
+METRIC_HELP = {
+    "http_requests_total": "Richieste HTTP del client, contando una sola volta quelle ripetute",
+    "http_responses_total": "Risposte HTTP ricevute per stato, compresi i tentativi ripetuti",
+    "http_retries_total": "Tentativi ripetuti dopo 429, 5xx o errori di rete",
+    "http_errors_total": "Richieste fallite (errore di rete, tentativi esauriti o stato di errore finale)",
+    "http_cache_hits_total": "Risposte servite dalla cache HTTP",
+    "http_response_bytes_total": "Byte dei corpi delle risposte scaricate",
+    "http_request_duration_seconds": "Durata delle richieste compresi i retry, esclusa l'attesa del rate limit",
+    "http_response_bytes": "Dimensione dei corpi delle risposte scaricate",
+    "features_total": "Post trasformati in record, per origine delle feature (cache o calcolate)",
+    "records_cleaned_total": "Record valutati dalla pulizia, per esito",
+    "records_removed_total": "Record scartati dalla pulizia, per motivo",
+    "cleaning_rule_rejected_total": "Record scartati da ogni passo di pulizia",
+    "cleaning_rule_seconds_total": "Secondi spesi in ogni passo di pulizia",
+    "dataset_records": "Record nei file scritti",
+    "stage_duration_seconds": "Durata di ogni fase dell'esecuzione",
+    "run_duration_seconds": "Durata dell'esecuzione",
+    "run_success": "1 se l'esecuzione è terminata senza errori, altrimenti 0",
+    "run_timestamp_seconds": "Fine dell'esecuzione (Unix time)",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Mapping[str, object]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def endpoint_of(url: str) -> str:
+    """Ultimo segmento dell'URL (``posts``, ``tags``, ...), usato come etichetta."""
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+class Histogram:
+    """Istogramma a bucket fissi, come quelli di Prometheus."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        position = bisect.bisect_left(self.buckets, value)
+        if position < len(self.counts):
+            self.counts[position] += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Conteggi cumulativi per limite superiore, ``+Inf`` compreso."""
+        rows = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            rows.append((f"{bound:g}", running))
+        rows.append(("+Inf", self.count))
+        return rows
+
+
+class RunMetrics:
+    """Metriche di un'esecuzione, aggiornabili da più thread.
+
+    I contatori e gli istogrammi sono identificati da nome ed etichette
+    (``metrics.inc("http_requests_total", endpoint="posts")``); le fasi
+    misurate con :meth:`stage` si sommano se ripetute. Le etichette passate
+    al costruttore (es. ``script="run_pipeline"``) vengono aggiunte a tutte
+    le serie esportate per Prometheus, così più script possono scrivere
+    file diversi nella stessa cartella del collector.
+    """
+
+    def __init__(self, **labels: object) -> None:
+        self.labels = _labels(labels)
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.gauges: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.stages: Dict[str, float] = {}
+        self.started = time.time()
+        self._started_counter = time.perf_counter()
+        self.finished: float | None = None
+        self.status: str | None = None
+
+    def inc(self, name: str, value: float = 1, **labels: object) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: object) -> None:
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, *, buckets: Sequence[float] = DURATION_BUCKETS, **labels: object) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Misura il blocco come fase ``name`` (anche se termina con un'eccezione)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def total(self, name: str, **labels: object) -> float:
+        """Somma dei contatori ``name`` con (almeno) le etichette indicate."""
+        wanted = set(_labels(labels))
+        with self._lock:
+            return sum(value for (key, items), value in self.counters.items() if key == name and wanted.issubset(items))
+
+    def record_request(
+        self,
+        url: str,
+        *,
+        seconds: float,
+        status: int | None = None,
+        size: int = 0,
+        attempts: Iterable[int | None] = (),
+        cached: bool = False,
+    ) -> None:
+        """Registra una richiesta del client.
+
+        ``status`` è lo stato della risposta finale (``None`` se non ne è
+        arrivata una), ``attempts`` gli esiti dei tentativi ripetuti prima
+        (stato HTTP o ``None`` per un errore di rete).
+        """
+        endpoint = endpoint_of(url)
+        self.inc("http_requests_total", endpoint=endpoint)
+        self.observe("http_request_duration_seconds", seconds, endpoint=endpoint)
+        if cached:
+            self.inc("http_cache_hits_total", endpoint=endpoint)
+            return
+        for attempt in attempts:
+            self.inc("http_retries_total", endpoint=endpoint)
+            if attempt is not None:
+                self.inc("http_responses_total", endpoint=endpoint, status=attempt)
+        if status is None or status >= 400:
+            self.inc("http_errors_total", endpoint=endpoint)
+        if status is not None:
+            self.inc("http_responses_total", endpoint=endpoint, status=status)
+            self.inc("http_response_bytes_total", size, endpoint=endpoint)
+            self.observe("http_response_bytes", size, buckets=SIZE_BUCKETS, endpoint=endpoint)
+
+    def record_cleaning(self, report: Mapping) -> None:
+        """Conteggi e tempi di un report di :func:`.cleaning.clean_records`."""
+        self.inc("records_cleaned_total", report["kept"], outcome="kept")
+        self.inc("records_cleaned_total", report["removed"], outcome="removed")
+        for reason, count in report["removed_by_reason"].items():
+            self.inc("records_removed_total", count, reason=reason)
+        for rule, entry in report["stages"].items():
+            self.inc("cleaning_rule_rejected_total", entry["rejected"], rule=rule)
+            self.inc("cleaning_rule_seconds_total", entry["seconds"], rule=rule)
+
+    def finish(self, status: str = "ok") -> None:
+        """Chiude l'esecuzione: durata, esito e istante di fine diventano gauge."""
+        self.finished = time.time()
+        self.status = status
+        self.set("run_duration_seconds", time.perf_counter() - self._started_counter)
+        self.set("run_success", 1 if status == "ok" else 0)
+        self.set("run_timestamp_seconds", self.finished)
+
+    def summary(self) -> Dict[str, float]:
+        """I numeri principali per chi legge il report senza scorrere tutte le serie."""
+        return {
+            "http_requests": self.total("http_requests_total"),
+            "http_retries": self.total("http_retries_total"),
+            "http_throttled": self.total("http_responses_total", status=429),
+            "http_errors": self.total("http_errors_total"),
+            "http_cache_hits": self.total("http_cache_hits_total"),
+            "http_bytes": self.total("http_response_bytes_total"),
+            "records_kept": self.total("records_cleaned_total", outcome="kept"),
+            "records_removed": self.total("records_cleaned_total", outcome="removed"),
+        }
+
+    def to_dict(self) -> Dict:
+        def series(items: Dict[Tuple[str, Labels], float]) -> List[Dict]:
+            return [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in sorted(items.items())]
+
+        def timestamp(value: float | None) -> str | None:
+            if value is None:
+                return None
+            return dt.datetime.fromtimestamp(value, dt.timezone.utc).isoformat(timespec="seconds")
+
+        summary = self.summary()
+        with self._lock:
+            return {
+                "version": REPORT_VERSION,
+                "labels": dict(self.labels),
+                "status": self.status,
+                "started": timestamp(self.started),
+                "finished": timestamp(self.finished),
+                "duration_seconds": self.gauges.get(("run_duration_seconds", ())),
+                "stages": dict(self.stages),
+                "summary": summary,
+                "counters": series(self.counters),
+                "gauges": series(self.gauges),
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(histogram.cumulative()),
+                    }
+                    for (name, labels), histogram in sorted(self.histograms.items())
+                ],
+            }
+
+    def to_prometheus(self, *, prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Formato testuale di Prometheus (quello letto dal textfile collector di node_exporter)."""
+        lines: List[str] = []
+        described = set()
+
+        def header(name: str, kind: str) -> None:
+            if name in described:
+                return
+            described.add(name)
+            help_text = METRIC_HELP.get(name[len(prefix):])
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            gauges = dict(self.gauges)
+            for stage, seconds in self.stages.items():
+                gauges[("stage_duration_seconds", _labels({"stage": stage}))] = seconds
+            for kind, items in (("counter", self.counters), ("gauge", gauges)):
+                for (name, labels), value in sorted(items.items()):
+                    header(prefix + name, kind)
+                    lines.append(f"{prefix}{name}{_format_labels(self.labels + labels)} {_format_value(value)}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                header(prefix + name, "histogram")
+                labels = self.labels + labels
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{prefix}{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{prefix}{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                lines.append(f"{prefix}{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def stage(metrics: RunMetrics | None, name: str) -> contextlib.AbstractContextManager:
+    """:meth:`RunMetrics.stage` se ``metrics`` è presente, altrimenti un blocco che non misura nulla."""
+    return metrics.stage(name) if metrics is not None else contextlib.nullcontext()
+
+
+def write_run_report(metrics: RunMetrics, path: str | pathlib.Path, **fields) -> str:
+    """Scrive il report JSON dell'esecuzione; ``fields`` (es. le opzioni) vengono aggiunti in testa."""
+    return str(write_json({**fields, **metrics.to_dict()}, path)[0])
+
+
+def write_prometheus_textfile(metrics: RunMetrics, path: str | pathlib.Path) -> str:
+    """Scrive le metriche per il textfile collector, con rename atomico (il collector non vede mai file a metà)."""
+    return str(atomic_write_bytes(path, metrics.to_prometheus().encode("utf-8")))
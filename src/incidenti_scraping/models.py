@@ -0,0 +1,218 @@
+"""Modello dei record di incidente usato lungo tutta la pipeline."""
+from __future__ import annotations
+
+import datetime as dt
+from dataclasses import dataclass, field, fields
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+import pyarrow as pa
+
+from .dates import DEFAULT_LOCALE, date_columns, month_name, parse_datetime, weekday_name
+
+
+class Severity(str, Enum):
+    """Livelli di gravità; i membri sono unici, quindi ogni record condivide la stessa istanza."""
+
+    FATALE = "fatale"
+    GRAVE = "grave"
+    MODERATO = "moderato"
+    INFORMATIVO = "informativo"
+
+
+_TEXT_LIST = pa.list_(pa.string())
+RECORD_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("date", pa.string()),
+        ("datetime", pa.string()),
+        ("year", pa.int64()),
+        ("month", pa.int64()),
+        ("month_name", pa.string()),
+        ("weekday", pa.string()),
+        ("title", pa.string()),
+        ("link", pa.string()),
+        ("excerpt", pa.string()),
+        ("content", pa.string()),
+        ("categories", _TEXT_LIST),
+        ("tags", _TEXT_LIST),
+        ("severity", pa.string()),
+        ("keywords", _TEXT_LIST),
+        ("roads", _TEXT_LIST),
+        ("cities", _TEXT_LIST),
+    ]
+)
+# Ordine delle chiavi nel JSON esportato (lo stesso dei dict usati in precedenza)
+RECORD_FIELDS: Tuple[str, ...] = tuple(RECORD_SCHEMA.names)
+
+
+def _with_slots(cls: type) -> type:
+    """Ricrea la dataclass ``cls`` con ``__slots__``, come ``dataclass(slots=True)`` (solo da Python 3.10)."""
+    names = tuple(item.name for item in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items() if key not in names}
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_with_slots
+@dataclass
+class Incident:
+    """Un articolo classificato come incidente.
+
+    Conserva solo i campi di origine: ``date``, ``year``, ``month``,
+    ``month_name`` e ``weekday`` sono ricavati da ``datetime`` quando servono.
+    Per compatibilità con il codice che lavora sui dict espone anche
+    ``record["campo"]``, ``record.get(...)`` e ``keys()``, con gli stessi valori
+    di :meth:`to_dict`.
+    """
+
+    id: int
+    datetime: str
+    title: str
+    link: str | None
+    excerpt: str
+    content: str
+    categories: List[str] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+    severity: Severity = Severity.INFORMATIVO
+    keywords: List[str] = field(default_factory=list)
+    roads: List[str] = field(default_factory=list)
+    cities: List[str] = field(default_factory=list)
+    # senza default: con gli slot non resta un attributo di classe da cui leggerlo
+    _parsed: dt.datetime | None = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._parsed = None
+        if not isinstance(self.severity, Severity):
+            self.severity = Severity(self.severity)
+
+    def _moment(self) -> dt.datetime:
+        if self._parsed is None:
+            self._parsed = parse_datetime(self.datetime)
+        return self._parsed
+
+    @property
+    def date(self) -> str:
+        return self.datetime[:10]
+
+    @property
+    def year(self) -> int:
+        return self._moment().year
+
+    @property
+    def month(self) -> int:
+        return self._moment().month
+
+    @property
+    def month_name(self) -> str:
+        return month_name(self._moment().month)
+
+    @property
+    def weekday(self) -> str:
+        return weekday_name(self._moment().weekday())
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Incident":
+        """Ricostruisce un record da un dict (es. letto da ``incidents.json``); i campi derivati sono ignorati."""
+        return cls(
+            id=data["id"],
+            datetime=data["datetime"],
+            title=data.get("title", ""),
+            link=data.get("link"),
+            excerpt=data.get("excerpt", ""),
+            content=data.get("content", ""),
+            categories=list(data.get("categories") or []),
+            tags=list(data.get("tags") or []),
+            severity=data.get("severity") or Severity.INFORMATIVO,
+            keywords=list(data.get("keywords") or []),
+            roads=list(data.get("roads") or []),
+            cities=list(data.get("cities") or []),
+        )
+
+    @classmethod
+    def coerce(cls, record: "Incident | Mapping[str, Any]") -> "Incident":
+        return record if isinstance(record, cls) else cls.from_dict(record)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict con le chiavi di :data:`RECORD_FIELDS`, nello stesso ordine del JSON esportato."""
+        moment = self._moment()
+        return {
+            "id": self.id,
+            "date": self.datetime[:10],
+            "datetime": self.datetime,
+            "year": moment.year,
+            "month": moment.month,
+            "month_name": month_name(moment.month),
+            "weekday": weekday_name(moment.weekday()),
+            "title": self.title,
+            "link": self.link,
+            "excerpt": self.excerpt,
+            "content": self.content,
+            "categories": self.categories,
+            "tags": self.tags,
+            "severity": self.severity.value,
+            "keywords": self.keywords,
+            "roads": self.roads,
+            "cities": self.cities,
+        }
+
+    def keys(self) -> Tuple[str, ...]:
+        return RECORD_FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(RECORD_FIELDS)
+
+    def __contains__(self, key: object) -> bool:
+        return key in RECORD_FIELDS
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in RECORD_FIELDS:
+            raise KeyError(key)
+        if key == "severity":
+            return self.severity.value
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+def incidents_to_arrow(
+    records: Iterable[Incident | Mapping[str, Any]],
+    *,
+    locale: str = DEFAULT_LOCALE,
+) -> pa.Table:
+    """Tabella Arrow con :data:`RECORD_SCHEMA`, costruita per colonne.
+
+    Le colonne sono riempite direttamente dagli attributi dei record, senza
+    passare da un dict per riga né da un DataFrame pandas; quelle ricavate
+    dalla data sono calcolate da Arrow per tutti i record insieme, con i
+    nomi di mese e giorno nella lingua ``locale`` (vedi :mod:`.dates`).
+    """
+    incidents: Sequence[Incident] = [Incident.coerce(record) for record in records]
+    datetimes = [incident.datetime for incident in incidents]
+    dates = date_columns(datetimes, locale=locale)
+    columns = {
+        "id": [incident.id for incident in incidents],
+        "date": dates["date"],
+        "datetime": datetimes,
+        "year": dates["year"],
+        "month": dates["month"],
+        "month_name": dates["month_name"],
+        "weekday": dates["weekday"],
+        "title": [incident.title for incident in incidents],
+        "link": [incident.link for incident in incidents],
+        "excerpt": [incident.excerpt for incident in incidents],
+        "content": [incident.content for incident in incidents],
+        "categories": [incident.categories for incident in incidents],
+        "tags": [incident.tags for incident in incidents],
+        "severity": [incident.severity.value for incident in incidents],
+        "keywords": [incident.keywords for incident in incidents],
+        "roads": [incident.roads for incident in incidents],
+        "cities": [incident.cities for incident in incidents],
+    }
+    return pa.Table.from_pydict(columns, schema=RECORD_SCHEMA)
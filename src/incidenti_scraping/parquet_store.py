@@ -0,0 +1,139 @@
+"""Scrittura e lettura Parquet dei record con pyarrow, senza passare da pandas."""
+from __future__ import annotations
+
+import os
+import pathlib
+import shutil
+import threading
+from typing import Any, Collection, Dict, Iterable, List, Mapping, Sequence
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .models import RECORD_SCHEMA, Incident, incidents_to_arrow
+
+COMPRESSION = "zstd"
+# Colonne con pochi valori distinti ripetuti molte volte: nel file finiscono
+# come dizionario + indici invece che come stringhe ripetute
+DICTIONARY_COLUMNS = ("severity", "categories", "tags", "roads", "cities")
+ROW_GROUP_SIZE = 10_000
+PARTITION_COLUMN = "year"
+PARTITIONING = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.int64())]), flavor="hive")
+
+
+def _dictionary_paths(schema: pa.Schema) -> List[str]:
+    """Percorsi Parquet delle colonne in :data:`DICTIONARY_COLUMNS` (per le liste, l'elemento)."""
+    paths = []
+    for name in DICTIONARY_COLUMNS:
+        if name not in schema.names:
+            continue
+        if pa.types.is_list(schema.field(name).type):
+            paths.append(f"{name}.list.element")
+        else:
+            paths.append(name)
+    return paths
+
+
+def write_options(schema: pa.Schema = RECORD_SCHEMA) -> Dict[str, Any]:
+    """Opzioni comuni a tutti i file Parquet del progetto."""
+    return {"compression": COMPRESSION, "use_dictionary": _dictionary_paths(schema)}
+
+
+def parquet_writer(path: str | pathlib.Path, schema: pa.Schema = RECORD_SCHEMA) -> pq.ParquetWriter:
+    """``ParquetWriter`` con le stesse opzioni di :func:`write_parquet`, per scritture a row group."""
+    return pq.ParquetWriter(path, schema, **write_options(schema))
+
+
+def write_parquet(
+    records: Iterable[Incident | Mapping[str, Any]],
+    path: str | pathlib.Path,
+    *,
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> pathlib.Path:
+    """Scrive i record in un unico file Parquet, rinominato su ``path`` solo a scrittura completata."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = incidents_to_arrow(records)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        pq.write_table(table, tmp_path, row_group_size=row_group_size, **write_options(table.schema))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+    return path
+
+
+def _partition_dir(root: pathlib.Path, year: int) -> pathlib.Path:
+    return root / f"{PARTITION_COLUMN}={year}"
+
+
+def partition_years(root: str | pathlib.Path) -> List[int]:
+    """Anni già presenti in un dataset partizionato da :func:`write_partitioned`."""
+    root = pathlib.Path(root)
+    if not root.is_dir():
+        return []
+    prefix = f"{PARTITION_COLUMN}="
+    return sorted(int(child.name[len(prefix):]) for child in root.iterdir() if child.is_dir() and child.name.startswith(prefix))
+
+
+def write_partitioned(
+    records: Iterable[Incident | Mapping[str, Any]],
+    root: str | pathlib.Path,
+    *,
+    years: Collection[int] | None = None,
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> List[pathlib.Path]:
+    """Scrive i record in un dataset Parquet partizionato per anno (``root/year=2024/...``).
+
+    Con ``years=None`` il dataset viene riscritto per intero. Con ``years``
+    (es. gli anni toccati da un'esecuzione incrementale) vengono riscritte
+    solo quelle partizioni, usando i record di quegli anni presenti in
+    ``records``; le altre restano come sono. Una partizione che non ha più
+    record viene eliminata.
+    """
+    root = pathlib.Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    incidents = [Incident.coerce(record) for record in records]
+    if years is not None:
+        years = set(years)
+        incidents = [incident for incident in incidents if incident.year in years]
+    table = incidents_to_arrow(incidents)
+    written = sorted(set(table.column(PARTITION_COLUMN).to_pylist()))
+
+    if written:
+        ds.write_dataset(
+            table,
+            root,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template="part-{i}.parquet",
+            existing_data_behavior="delete_matching",
+            max_rows_per_group=row_group_size,
+            file_options=ds.ParquetFileFormat().make_write_options(**write_options(table.schema)),
+        )
+    stale = set(partition_years(root) if years is None else years) - set(written)
+    for year in stale:
+        shutil.rmtree(_partition_dir(root, year), ignore_errors=True)
+    return [_partition_dir(root, year) for year in written]
+
+
+def read_incidents(
+    path: str | pathlib.Path,
+    *,
+    columns: Sequence[str] | None = None,
+    filters: Any = None,
+) -> pa.Table:
+    """Legge un file o un dataset partizionato leggendo solo ``columns`` e le righe che passano ``filters``.
+
+    ``filters`` usa la sintassi di :func:`pyarrow.parquet.read_table`, es.
+    ``[("year", ">=", 2023), ("severity", "=", "grave")]``: sul dataset
+    partizionato le partizioni di altri anni non vengono nemmeno aperte.
+    """
+    path = pathlib.Path(path)
+    partitioning = PARTITIONING if path.is_dir() else None
+    return pq.read_table(path, columns=list(columns) if columns else None, filters=filters, partitioning=partitioning)
@@ -1,108 +1,687 @@
 """Pipeline per raccogliere, filtrare e trasformare i post di coratolive.it."""
 from __future__ import annotations
 
-import json
+import asyncio
+import functools
+import itertools
 import logging
+import os
 import pathlib
-from typing import Dict, Iterable, List, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Collection, Container, Dict, Iterable, Iterator, List, Sequence, Set, Tuple
 
-import pandas as pd
+import pyarrow as pa
 
+from .cleaning import clean_records
 from .config import DEFAULT_KEYWORDS, INCIDENT_TAG_ID
+from .feature_cache import FeatureCache
+from .instrumentation import RunMetrics, stage
+from .models import RECORD_SCHEMA, Incident
+from .parquet_store import parquet_writer, write_parquet, write_partitioned
+from .serialization import DEFAULT_SERIALIZER, read_json, write_json
 from .text_utils import (
-    detect_locations,
     extract_date_parts,
-    flag_keywords,
-    guess_severity,
+    extract_features,
     normalize,
     strip_html,
 )
-from .wordpress_client import WordPressClient
+from .wordpress_client import DISCOVERY_FIELDS, POST_FIELDS, IncompleteFetch, WordPressClient
 
 logger = logging.getLogger(__name__)
 
 
-def _pull_posts(keywords: Sequence[str], max_pages: int | None) -> Dict[int, Dict]:
-    client = WordPressClient()
-    posts: Dict[int, Dict] = {}
+def _post_text(post: Dict, field: str) -> str:
+    """Testo ripulito di ``title``/``excerpt``/``content``, estratto una sola volta per post."""
+    cache = post.setdefault("_text", {})
+    text = cache.get(field)
+    if text is None:
+        text = cache[field] = strip_html((post.get(field) or {}).get("rendered", ""))
+    return text
 
-    def _add(post: Dict) -> None:
-        posts[post["id"]] = post
 
-    logger.info("Recupero articoli con tag incidente (max_pages=%s)", max_pages or "illimitato")
+def _is_relevant(post: Dict, keyword: str) -> bool:
+    """Verifica che un risultato di ricerca parli davvero di incidenti."""
+    cache = post.setdefault("_text", {})
+    full_text = cache.get("relevance")
+    if full_text is None:
+        full_text = cache["relevance"] = normalize(_post_text(post, "title") + " " + _post_text(post, "content"))
+    return "inciden" in full_text or keyword in full_text
+
+
+TermNames = Dict[str, Dict[int, str]]
+
+
+def _fetch_options(projection: bool) -> Dict:
+    """Con la proiezione si chiedono solo i campi usati, senza ``_embed``."""
+    return {"embed": False, "fields": POST_FIELDS} if projection else {}
+
+
+def _add_candidates(
+    seen: Container[int],
+    candidates: Dict[int, List[str]],
+    keyword: str,
+    hits: Iterable[Dict],
+) -> int:
+    """Fase di scoperta: annota quali keyword hanno trovato ogni id non ancora scaricato."""
+    count_before = len(candidates)
+    for hit in hits:
+        if hit["id"] not in seen:
+            candidates.setdefault(hit["id"], []).append(keyword)
+    return len(candidates) - count_before
+
+
+def _accept_hydrated(posts: Dict[int, Dict], candidates: Dict[int, List[str]], hydrated: Iterable[Dict]) -> int:
+    """Tiene i post idratati rilevanti per almeno una delle keyword che li hanno trovati."""
     count_before = len(posts)
-    for post in client.fetch_posts(tags=[INCIDENT_TAG_ID], max_pages=max_pages):
-        _add(post)
-    logger.info("  → Recuperati %d nuovi post con tag incidente", len(posts) - count_before)
+    for post in hydrated:
+        if any(_is_relevant(post, kw) for kw in candidates.get(post["id"], ())):
+            posts[post["id"]] = post
+    return len(posts) - count_before
+
+
+def _term_ids(posts: Iterable[Dict], taxonomy: str) -> set:
+    return {term_id for post in posts for term_id in post.get(taxonomy) or []}
+
+
+def _query_key(*, tag: int | None = None, keyword: str | None = None) -> str:
+    return f"tag:{tag}" if tag is not None else f"search:{keyword}"
+
+
+def _since(state: Dict[str, Dict] | None, key: str) -> Dict:
+    """Parametri ``modified_after`` per una query, dal watermark salvato."""
+    mark = (state or {}).get(key) or {}
+    return {"modified_after": mark["modified"]} if mark.get("modified") else {}
+
+
+def _track(state: Dict[str, Dict] | None, key: str, posts: Iterable[Dict]) -> Iterable[Dict]:
+    """Aggiorna il watermark ``date``/``modified`` della query mentre i post passano.
+
+    Il nuovo watermark entra in ``state`` solo se la query arriva in fondo:
+    le pagine sono in ordine di data, non di modifica, quindi dopo una
+    pagina non scaricata (:class:`IncompleteFetch`) resta quello precedente
+    e i post saltati vengono ripresi alla prossima esecuzione.
+    """
+    if state is None:
+        yield from posts
+        return
+    mark = dict(state.get(key) or {})
+    try:
+        for post in posts:
+            for field in ("date", "modified"):
+                value = post.get(field)
+                if value and value > mark.get(field, ""):
+                    mark[field] = value
+            yield post
+    except IncompleteFetch as exc:
+        logger.warning("Query %s incompleta (%s): watermark non aggiornato", key, exc)
+        return
+    state[key] = mark
+
+
+def _restore(state: Dict[str, Dict] | None, previous: Dict[str, Dict | None]) -> None:
+    """Rimette i watermark ``previous`` (``None`` = assente) dopo un download dei candidati incompleto."""
+    if state is None:
+        return
+    for key, mark in previous.items():
+        if mark is None:
+            state.pop(key, None)
+        else:
+            state[key] = mark
+
+
+async def _settle(fetch: Awaitable[List[Dict]]) -> List[Dict] | IncompleteFetch:
+    """Attende una query asincrona; se è incompleta restituisce l'eccezione invece di propagarla."""
+    try:
+        return await fetch
+    except IncompleteFetch as exc:
+        return exc
+
+
+def _replay(result: List[Dict] | IncompleteFetch) -> Iterator[Dict]:
+    """Rigenera i post di :func:`_settle`; per una query incompleta rilancia poi l'eccezione, come il client sincrono."""
+    if isinstance(result, IncompleteFetch):
+        yield from result.posts
+        raise result
+    yield from result
+
+
+def load_scrape_state(path: str | pathlib.Path) -> Dict[str, Dict]:
+    """Legge i watermark per query (``{"tag:242": {"date": ..., "modified": ...}}``)."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return {}
+    return read_json(path)
+
+
+def save_scrape_state(state: Dict[str, Dict], path: str | pathlib.Path) -> str:
+    write_json(state, path, sort_keys=True)
+    return str(path)
+
+
+def merge_records(existing: Iterable[Incident | Dict], updates: Iterable[Incident | Dict]) -> List[Incident]:
+    """Unisce i record per ``id`` (gli aggiornamenti vincono) e riordina per data.
+
+    I dict (es. letti da ``incidents.json``) vengono convertiti in :class:`.models.Incident`.
+    """
+    merged = {record.id: record for record in map(Incident.coerce, existing)}
+    for record in map(Incident.coerce, updates):
+        merged[record.id] = record
+    records = list(merged.values())
+    records.sort(key=lambda r: (r.date, r.id), reverse=True)
+    return records
+
+
+def merge_removed(
+    previous: Iterable[Incident | Dict],
+    removed: Iterable[Incident | Dict],
+    kept: Iterable[Incident],
+) -> List[Incident]:
+    """Record scartati da conservare in modalità incrementale.
+
+    Unisce per ``id`` quelli delle esecuzioni precedenti (es. letti da
+    ``incidents_removed.json``) con quelli scartati ora, che vincono; gli id
+    che ora passano la pulizia (``kept``) vengono tolti.
+    """
+    kept_ids = {record.id for record in kept}
+    return [record for record in merge_records(previous, removed) if record.id not in kept_ids]
+
+
+def _iter_posts(
+    client: WordPressClient,
+    keywords: Sequence[str],
+    max_pages: int | None,
+    state: Dict[str, Dict] | None = None,
+    projection: bool = False,
+    two_phase: bool = False,
+) -> Iterator[Dict]:
+    """Genera i post rilevanti senza duplicati, man mano che arrivano dall'API.
+
+    In memoria resta solo l'insieme degli id già emessi.
+    """
+    options = _fetch_options(projection)
+    seen: Set[int] = set()
+
+    logger.info("Recupero articoli con tag incidente (max_pages=%s)", max_pages or "illimitato")
+    count_before = len(seen)
+    key = _query_key(tag=INCIDENT_TAG_ID)
+    strict = state is not None
+    for post in _track(state, key, client.fetch_posts(tags=[INCIDENT_TAG_ID], max_pages=max_pages, strict=strict, **options, **_since(state, key))):
+        if post["id"] not in seen:
+            seen.add(post["id"])
+            yield post
+    logger.info("  → Recuperati %d nuovi post con tag incidente", len(seen) - count_before)
+
+    if two_phase:
+        candidates: Dict[int, List[str]] = {}
+        previous = {_query_key(keyword=kw): (state or {}).get(_query_key(keyword=kw)) for kw in keywords}
+        for kw in keywords:
+            logger.info("Scoperta id con keyword '%s' (max_pages=%s)", kw, max_pages or "illimitato")
+            key = _query_key(keyword=kw)
+            hits = client.fetch_posts(
+                search=kw, max_pages=max_pages, embed=False, fields=DISCOVERY_FIELDS, strict=strict, **_since(state, key)
+            )
+            added = _add_candidates(seen, candidates, kw, _track(state, key, hits))
+            logger.info("  → %d nuovi id candidati con keyword '%s'", added, kw)
+        logger.info("Download di %d post candidati (blocchi da 100)", len(candidates))
+        count_before = len(seen)
+        try:
+            for post in client.fetch_posts_by_ids(candidates, strict=strict, **options):
+                if post["id"] not in seen and any(_is_relevant(post, kw) for kw in candidates.get(post["id"], ())):
+                    seen.add(post["id"])
+                    yield post
+        except IncompleteFetch as exc:
+            # i watermark delle keyword coprono anche i candidati non scaricati
+            logger.warning("Download dei candidati incompleto (%s): watermark delle keyword non aggiornati", exc)
+            _restore(state, previous)
+        logger.info("  → Recuperati %d nuovi post dalle keyword", len(seen) - count_before)
+        return
 
     for kw in keywords:
         logger.info("Recupero articoli con keyword '%s' (max_pages=%s)", kw, max_pages or "illimitato")
-        count_before = len(posts)
-        for post in client.fetch_posts(search=kw, max_pages=max_pages):
-            full_text = normalize(strip_html(post["title"]["rendered"]) + " " + strip_html(post["content"]["rendered"]))
-            if "inciden" in full_text or kw in full_text:
-                _add(post)
-        logger.info("  → Recuperati %d nuovi post con keyword '%s'", len(posts) - count_before, kw)
+        count_before = len(seen)
+        key = _query_key(keyword=kw)
+        for post in _track(state, key, client.fetch_posts(search=kw, max_pages=max_pages, strict=strict, **options, **_since(state, key))):
+            if post["id"] not in seen and _is_relevant(post, kw):
+                seen.add(post["id"])
+                yield post
+        logger.info("  → Recuperati %d nuovi post con keyword '%s'", len(seen) - count_before, kw)
 
-    return posts
 
+def _with_metrics(client_options: Dict | None, metrics: RunMetrics | None) -> Dict | None:
+    """``client_options`` con ``metrics``, senza sovrascrivere quello eventualmente già indicato."""
+    if metrics is None:
+        return client_options
+    return {"metrics": metrics, **(client_options or {})}
 
-def _post_to_record(post: Dict, keywords: Sequence[str]) -> Dict:
-    title = strip_html(post["title"]["rendered"])
-    excerpt = strip_html(post.get("excerpt", {}).get("rendered", ""))
-    content = strip_html(post.get("content", {}).get("rendered", ""))
-    full_text = f"{title}. {excerpt}. {content}".strip()
-    matches = flag_keywords(full_text, keywords)
-    severity = guess_severity(full_text)
-    locations = detect_locations(full_text)
-    date_parts = extract_date_parts(post["date"])
 
-    embed = post.get("_embedded", {})
-    categories = [cat.get("name") for cat in embed.get("wp:term", [[{}]])[0] if cat.get("taxonomy") == "category"] if embed else []
-    tags = [tag.get("name") for tag in embed.get("wp:term", [[{}]])[1] if tag.get("taxonomy") == "post_tag"] if embed and len(embed.get("wp:term", [])) > 1 else []
+def _pull_posts(
+    keywords: Sequence[str],
+    max_pages: int | None,
+    fetch_workers: int = 1,
+    state: Dict[str, Dict] | None = None,
+    client_options: Dict | None = None,
+    projection: bool = False,
+    two_phase: bool = False,
+) -> Tuple[Dict[int, Dict], TermNames | None]:
+    client = WordPressClient(max_workers=fetch_workers, **(client_options or {}))
+    posts = {
+        post["id"]: post
+        for post in _iter_posts(client, keywords, max_pages, state, projection, two_phase)
+    }
+    if not projection:
+        return posts, None
+    terms = {
+        taxonomy: client.resolve_terms(taxonomy, _term_ids(posts.values(), taxonomy))
+        for taxonomy in ("categories", "tags")
+    }
+    return posts, terms
+
+
+def _with_terms(
+    client: WordPressClient,
+    posts: Iterable[Dict],
+    chunk_size: int = 100,
+) -> Iterator[Tuple[Dict, TermNames]]:
+    """Risolve categorie/tag a blocchi di post, senza accumulare l'intero archivio."""
+    chunk: List[Dict] = []
+    for post in itertools.chain(posts, [None]):
+        if post is not None:
+            chunk.append(post)
+            if len(chunk) < chunk_size:
+                continue
+        if not chunk:
+            break
+        terms = {
+            taxonomy: client.resolve_terms(taxonomy, _term_ids(chunk, taxonomy))
+            for taxonomy in ("categories", "tags")
+        }
+        for item in chunk:
+            yield item, terms
+        chunk = []
 
+
+def _post_features(post: Dict, keywords: Sequence[str]) -> Dict:
+    """Parte costosa del record: testo ripulito, date e feature testuali."""
+    title = _post_text(post, "title")
+    excerpt = _post_text(post, "excerpt")
+    content = _post_text(post, "content")
+    full_text = f"{title}. {excerpt}. {content}".strip()
     return {
-        "id": post["id"],
-        **date_parts,
+        **extract_date_parts(post["date"]),
         "title": title,
-        "link": post.get("link"),
         "excerpt": excerpt,
         "content": content,
-        "categories": categories,
-        "tags": tags,
-        "severity": severity,
-        "keywords": matches,
-        "roads": locations["roads"],
-        "cities": locations["cities"],
+        **extract_features(full_text, keywords),
     }
 
 
+def _cached_features(post: Dict, keywords: Sequence[str], feature_cache: FeatureCache | None) -> Dict:
+    features = feature_cache.get(post, keywords) if feature_cache is not None else None
+    if features is None:
+        features = _post_features(post, keywords)
+        if feature_cache is not None:
+            feature_cache.put_many([(post, features)], keywords)
+    return features
+
+
+def _post_to_record(
+    post: Dict,
+    keywords: Sequence[str],
+    terms: TermNames | None = None,
+    features: Dict | None = None,
+) -> Incident:
+    if features is None:
+        features = _post_features(post, keywords)
+
+    embed = post.get("_embedded", {})
+    if terms is not None and not embed:
+        categories = [terms["categories"].get(term_id) for term_id in post.get("categories") or []]
+        tags = [terms["tags"].get(term_id) for term_id in post.get("tags") or []]
+    else:
+        categories = [cat.get("name") for cat in embed.get("wp:term", [[{}]])[0] if cat.get("taxonomy") == "category"] if embed else []
+        tags = [tag.get("name") for tag in embed.get("wp:term", [[{}]])[1] if tag.get("taxonomy") == "post_tag"] if embed and len(embed.get("wp:term", [])) > 1 else []
+
+    return Incident(
+        id=post["id"],
+        datetime=features["datetime"],
+        title=features["title"],
+        link=post.get("link"),
+        excerpt=features["excerpt"],
+        content=features["content"],
+        categories=categories,
+        tags=tags,
+        severity=features["severity"],
+        keywords=features["keywords"],
+        roads=features["roads"],
+        cities=features["cities"],
+    )
+
+
 def collect_incidents(
     *,
     keywords: Sequence[str] | None = None,
     max_pages: int | None = None,
     limit: int | None = None,
-) -> List[Dict]:
+    fetch_workers: int = 1,
+    state: Dict[str, Dict] | None = None,
+    client_options: Dict | None = None,
+    projection: bool = False,
+    two_phase: bool = False,
+    workers: int = 1,
+    feature_cache: FeatureCache | None = None,
+    metrics: RunMetrics | None = None,
+) -> List[Incident]:
+    """Scarica e trasforma gli articoli sugli incidenti.
+
+    Se ``state`` è fornito (vedi :func:`load_scrape_state`) ogni query chiede
+    solo i post modificati dopo il proprio watermark, che viene aggiornato sul
+    posto; i record risultanti vanno uniti al dataset con :func:`merge_records`.
+    ``client_options`` viene passato a :class:`WordPressClient` (es. ``cache``).
+    Con ``projection`` si scaricano solo i campi necessari (``_fields``) e i
+    nomi di categorie/tag arrivano da ``/categories`` e ``/tags``.
+    Con ``two_phase`` le ricerche per keyword scaricano prima i soli id e poi,
+    con ``include``, solo i post non ancora visti.
+    Con ``workers > 1`` la trasformazione dei post in record (HTML, regex,
+    date) avviene su un pool di processi; il risultato è identico al
+    percorso seriale. Con ``feature_cache`` i post non modificati dall'ultima
+    esecuzione riusano le feature già calcolate. Con ``metrics`` vengono
+    misurate le fasi ``fetch`` e ``transform`` e le richieste del client.
+    """
     keywords = keywords or DEFAULT_KEYWORDS
-    posts = _pull_posts(keywords, max_pages)
+    with stage(metrics, "fetch"):
+        posts, terms = _pull_posts(
+            keywords, max_pages, fetch_workers, state, _with_metrics(client_options, metrics), projection, two_phase
+        )
+    with stage(metrics, "transform"):
+        return _build_records(posts, keywords, limit, terms, workers, feature_cache, metrics)
+
+
+def _transform_posts(
+    posts: Sequence[Dict],
+    keywords: Sequence[str],
+    terms: TermNames | None = None,
+    workers: int = 1,
+    feature_cache: FeatureCache | None = None,
+    metrics: RunMetrics | None = None,
+) -> List[Incident]:
+    """Applica :func:`_post_to_record` mantenendo l'ordine dei post in ingresso.
+
+    Le feature già presenti in ``feature_cache`` vengono riusate; solo i post
+    nuovi o modificati passano dall'estrazione (eventualmente in parallelo).
+    """
+    features: List[Dict | None] = [feature_cache.get(post, keywords) if feature_cache else None for post in posts]
+    pending = [i for i, item in enumerate(features) if item is None]
+    extract = functools.partial(_post_features, keywords=tuple(keywords))
+    todo = [posts[i] for i in pending]
+    if workers <= 1 or len(todo) < 2:
+        computed = [extract(post) for post in todo]
+    else:
+        # Blocchi grandi riducono il costo di serializzazione verso i processi
+        chunksize = max(1, len(todo) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            computed = list(executor.map(extract, todo, chunksize=chunksize))
+    for i, item in zip(pending, computed):
+        features[i] = item
+    if feature_cache is not None and todo:
+        feature_cache.put_many(zip(todo, computed), keywords)
+    if metrics is not None:
+        metrics.inc("features_total", len(posts) - len(todo), source="cache")
+        metrics.inc("features_total", len(todo), source="computed")
+    return [_post_to_record(post, keywords, terms, item) for post, item in zip(posts, features)]
+
+
+def _build_records(
+    posts: Dict[int, Dict],
+    keywords: Sequence[str],
+    limit: int | None,
+    terms: TermNames | None = None,
+    workers: int = 1,
+    feature_cache: FeatureCache | None = None,
+    metrics: RunMetrics | None = None,
+) -> List[Incident]:
     logger.info("Totale post recuperati: %s", len(posts))
-    records = [_post_to_record(post, keywords) for post in posts.values()]
-    records.sort(key=lambda r: (r["date"], r["id"]), reverse=True)
+    records = _transform_posts(list(posts.values()), keywords, terms, workers, feature_cache, metrics)
+    records.sort(key=lambda r: (r.date, r.id), reverse=True)
     if limit:
         records = records[:limit]
     return records
 
 
-def save_dataset(records: Sequence[Dict], output_dir: str | pathlib.Path) -> dict:
+async def _pull_posts_async(
+    keywords: Sequence[str],
+    max_pages: int | None,
+    client_options: Dict | None = None,
+    state: Dict[str, Dict] | None = None,
+    projection: bool = False,
+    two_phase: bool = False,
+) -> Tuple[Dict[int, Dict], TermNames | None]:
+    from .async_wordpress_client import AsyncWordPressClient
+
+    options = _fetch_options(projection)
+    search_options = {"embed": False, "fields": DISCOVERY_FIELDS} if two_phase else options
+    terms = None
+    async with AsyncWordPressClient(**(client_options or {})) as client:
+        logger.info(
+            "Recupero concorrente: tag incidente + %d keyword (max_pages=%s)",
+            len(keywords),
+            max_pages or "illimitato",
+        )
+        tag_key = _query_key(tag=INCIDENT_TAG_ID)
+        strict = state is not None
+        tag_posts, *keyword_posts = await asyncio.gather(
+            _settle(client.fetch_posts(tags=[INCIDENT_TAG_ID], max_pages=max_pages, strict=strict, **options, **_since(state, tag_key))),
+            *(
+                _settle(
+                    client.fetch_posts(
+                        search=kw, max_pages=max_pages, strict=strict, **search_options, **_since(state, _query_key(keyword=kw))
+                    )
+                )
+                for kw in keywords
+            ),
+        )
+
+        # Stesso ordine di fusione di _pull_posts: prima il tag, poi le keyword
+        posts: Dict[int, Dict] = {post["id"]: post for post in _track(state, tag_key, _replay(tag_posts))}
+        logger.info("  → Recuperati %d nuovi post con tag incidente", len(posts))
+        if two_phase:
+            candidates: Dict[int, List[str]] = {}
+            previous = {_query_key(keyword=kw): (state or {}).get(_query_key(keyword=kw)) for kw in keywords}
+            for kw, hits in zip(keywords, keyword_posts):
+                added = _add_candidates(posts, candidates, kw, _track(state, _query_key(keyword=kw), _replay(hits)))
+                logger.info("  → %d nuovi id candidati con keyword '%s'", added, kw)
+            logger.info("Download di %d post candidati (blocchi da 100)", len(candidates))
+            try:
+                hydrated = await client.fetch_posts_by_ids(candidates, strict=strict, **options)
+            except IncompleteFetch as exc:
+                # i watermark delle keyword coprono anche i candidati non scaricati
+                logger.warning("Download dei candidati incompleto (%s): watermark delle keyword non aggiornati", exc)
+                _restore(state, previous)
+                hydrated = exc.posts
+            logger.info("  → Recuperati %d nuovi post dalle keyword", _accept_hydrated(posts, candidates, hydrated))
+        else:
+            for kw, results in zip(keywords, keyword_posts):
+                count_before = len(posts)
+                for post in _track(state, _query_key(keyword=kw), _replay(results)):
+                    if _is_relevant(post, kw):
+                        posts[post["id"]] = post
+                logger.info("  → Recuperati %d nuovi post con keyword '%s'", len(posts) - count_before, kw)
+
+        if projection:
+            categories, tags = await asyncio.gather(
+                client.resolve_terms("categories", _term_ids(posts.values(), "categories")),
+                client.resolve_terms("tags", _term_ids(posts.values(), "tags")),
+            )
+            terms = {"categories": categories, "tags": tags}
+    return posts, terms
+
+
+async def collect_incidents_async(
+    *,
+    keywords: Sequence[str] | None = None,
+    max_pages: int | None = None,
+    limit: int | None = None,
+    client_options: Dict | None = None,
+    state: Dict[str, Dict] | None = None,
+    projection: bool = False,
+    two_phase: bool = False,
+    workers: int = 1,
+    feature_cache: FeatureCache | None = None,
+    metrics: RunMetrics | None = None,
+) -> List[Incident]:
+    """Come :func:`collect_incidents`, ma esegue tutte le query in parallelo.
+
+    ``client_options`` viene passato ad :class:`AsyncWordPressClient`
+    (es. ``requests_per_second``, ``max_per_host``).
+    """
+    keywords = keywords or DEFAULT_KEYWORDS
+    with stage(metrics, "fetch"):
+        posts, terms = await _pull_posts_async(
+            keywords, max_pages, _with_metrics(client_options, metrics), state, projection, two_phase
+        )
+    with stage(metrics, "transform"):
+        return _build_records(posts, keywords, limit, terms, workers, feature_cache, metrics)
+
+
+def clean_incidents(
+    records: Sequence[Incident],
+    *,
+    metrics: RunMetrics | None = None,
+) -> Tuple[List[Incident], List[Incident], Dict]:
+    """Scarta in memoria i falsi positivi con le regole di :mod:`.cleaning`.
+
+    Restituisce ``(tenuti, rimossi, report)`` come :func:`.cleaning.clean_records`.
+    """
+    with stage(metrics, "clean"):
+        cleaned, removed, report = clean_records(records, metrics=metrics)
+    logger.info(
+        "Pulizia: %d record mantenuti, %d rimossi su %d (%.2fs)",
+        report["kept"],
+        report["removed"],
+        report["total"],
+        report["seconds"],
+    )
+    for reason, count in report["removed_by_reason"].items():
+        if count:
+            logger.info("  - %s: %d", reason, count)
+    return cleaned, removed, report
+
+
+def save_dataset(
+    records: Sequence[Incident],
+    output_dir: str | pathlib.Path,
+    *,
+    removed: Sequence[Incident] | None = None,
+    mirror_dirs: Iterable[str | pathlib.Path] = (),
+    pretty: bool = True,
+    partitioned: bool = False,
+    partition_years: Collection[int] | None = None,
+) -> dict:
+    """Scrive ``incidents.json`` e ``incidents.parquet`` in ``output_dir``.
+
+    Il JSON viene codificato una sola volta e copiato anche in ``incidents.json``
+    di ogni cartella di ``mirror_dirs`` (es. i dati della dashboard). Se
+    ``removed`` è indicato, i record scartati finiscono in ``incidents_removed.json``.
+    Con ``pretty=False`` il JSON è compatto (senza indentazione).
+
+    Con ``partitioned=True`` i record vengono scritti anche nel dataset
+    partizionato per anno ``incidents_by_year/``; ``partition_years`` limita
+    la riscrittura alle partizioni di quegli anni (vedi
+    :func:`.parquet_store.write_partitioned`).
+    """
     output_dir = pathlib.Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     json_path = output_dir / "incidents.json"
     parquet_path = output_dir / "incidents.parquet"
+    mirror_paths = [pathlib.Path(directory) / "incidents.json" for directory in mirror_dirs]
+
+    write_json(records, json_path, pretty=pretty, mirrors=mirror_paths)
+
+    write_parquet(records, parquet_path)
+
+    outputs = {"json": str(json_path), "parquet": str(parquet_path), "count": len(records)}
+    if partitioned:
+        partitions_dir = output_dir / "incidents_by_year"
+        write_partitioned(records, partitions_dir, years=partition_years)
+        outputs["partitions"] = str(partitions_dir)
+    if mirror_paths:
+        outputs["mirrors"] = [str(path) for path in mirror_paths]
+    if removed is not None:
+        removed_path = output_dir / "incidents_removed.json"
+        write_json(removed, removed_path, pretty=pretty)
+        outputs["removed"] = str(removed_path)
+    return outputs
+
+
+def stream_incidents(
+    output_dir: str | pathlib.Path,
+    *,
+    keywords: Sequence[str] | None = None,
+    max_pages: int | None = None,
+    limit: int | None = None,
+    fetch_workers: int = 1,
+    state: Dict[str, Dict] | None = None,
+    client_options: Dict | None = None,
+    projection: bool = False,
+    two_phase: bool = False,
+    record_filter: Callable[[Incident], bool] | None = None,
+    row_group_size: int = 500,
+    feature_cache: FeatureCache | None = None,
+    metrics: RunMetrics | None = None,
+) -> dict:
+    """Variante di :func:`collect_incidents` + :func:`save_dataset` a memoria costante.
+
+    I post scorrono in una catena di generatori (download → dedup per id →
+    record → ``record_filter``) e ogni record viene scritto subito in un file
+    JSON Lines temporaneo. In memoria resta solo un indice compatto
+    ``(date, id, offset)`` con cui, alla fine, i record vengono riscritti in
+    ordine in ``incidents.jsonl`` e in ``incidents.parquet`` a row group.
+    Con ``metrics`` le fasi sono ``stream`` (download, trasformazione e
+    filtro, intrecciati) e ``save``.
+    """
+    keywords = keywords or DEFAULT_KEYWORDS
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jsonl_path = output_dir / "incidents.jsonl"
+    parquet_path = output_dir / "incidents.parquet"
+    spool_path = output_dir / "incidents.jsonl.tmp"
+    # scritto a parte e rinominato alla fine, come i file di save_dataset
+    partial_path = output_dir / "incidents.jsonl.part"
 
-    with json_path.open("w", encoding="utf-8") as fh:
-        json.dump(records, fh, ensure_ascii=False, indent=2)
+    client = WordPressClient(max_workers=fetch_workers, **(_with_metrics(client_options, metrics) or {}))
+    posts = _iter_posts(client, keywords, max_pages, state, projection, two_phase)
+    pairs = _with_terms(client, posts) if projection else ((post, None) for post in posts)
+    records = (
+        _post_to_record(post, keywords, terms, _cached_features(post, keywords, feature_cache))
+        for post, terms in pairs
+    )
+    if record_filter is not None:
+        records = (record for record in records if record_filter(record))
+
+    index: List[Tuple[str, int, int, int]] = []
+    with stage(metrics, "stream"), spool_path.open("wb") as spool:
+        for record in records:
+            line = DEFAULT_SERIALIZER.dumps(record, pretty=False) + b"\n"
+            index.append((record.date, record.id, spool.tell(), len(line)))
+            spool.write(line)
+    logger.info("Record scritti in streaming: %d", len(index))
+
+    index.sort(reverse=True)
+    if limit:
+        index = index[:limit]
 
-    df = pd.DataFrame(records)
-    df.to_parquet(parquet_path, index=False)
+    with stage(metrics, "save"), spool_path.open("rb") as spool, partial_path.open("wb") as out, parquet_writer(parquet_path) as writer:
+        batch: List[Dict] = []
+        for _, _, offset, length in index:
+            spool.seek(offset)
+            line = spool.read(length)
+            out.write(line)
+            batch.append(DEFAULT_SERIALIZER.loads(line))
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=RECORD_SCHEMA))
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=RECORD_SCHEMA))
+    os.replace(partial_path, jsonl_path)
+    os.remove(spool_path)
 
-    return {"json": str(json_path), "parquet": str(parquet_path), "count": len(records)}
+    return {"jsonl": str(jsonl_path), "parquet": str(parquet_path), "count": len(index)}
@@ -0,0 +1,381 @@
+"""Motore di regole regex precompilate per classificare i testi normalizzati."""
+from __future__ import annotations
+
+import re
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# Caratteri che interrompono il prefisso letterale di un frammento
+_META = set("\\.^$*+?{}[]()|")
+_QUANTIFIERS = set("*+?{")
+_WORD_RE = re.compile(r"\w+")
+# Lunghezza massima dei prefissi di parola indicizzati da Document.prefixes
+_PREFIX_LEN = 4
+_UNSUPPORTED_FLAGS = re.VERBOSE | re.ASCII | re.LOCALE
+
+# Un locatore indica dove può iniziare un match:
+# ("word", w)   -> all'inizio di ogni occorrenza della parola intera w
+# ("prefix", s) -> all'inizio di una parola, se il testo da lì comincia con s
+# ("find", s)   -> in ogni posizione in cui compare la sottostringa s
+Locator = Tuple[str, str]
+
+
+def _split_alternatives(body: str) -> Optional[List[str]]:
+    """Divide ``body`` sulle ``|`` di primo livello (fuori da gruppi e classi)."""
+    parts: List[str] = []
+    depth = 0
+    in_class = False
+    start = 0
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif char == "|" and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+        i += 1
+    if depth or in_class:
+        return None
+    parts.append(body[start:])
+    return parts
+
+
+def _closing_paren(fragment: str) -> int:
+    """Indice della parentesi che chiude quella in posizione 0 (-1 se manca)."""
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(fragment):
+        char = fragment[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return -1
+
+
+def _literal_prefix(fragment: str) -> str:
+    """Prefisso letterale di ``fragment`` (vuoto se inizia con un metacarattere)."""
+    end = 0
+    while end < len(fragment) and fragment[end] not in _META:
+        end += 1
+    if end < len(fragment) and fragment[end] in _QUANTIFIERS:
+        # il quantificatore si applica all'ultimo carattere, che quindi non è obbligatorio
+        end -= 1
+    return fragment[:max(end, 0)]
+
+
+def _alternation_locators(body: str, word_start: bool) -> Optional[Set[Locator]]:
+    alternatives = _split_alternatives(body)
+    if alternatives is None:
+        return None
+    locators: Set[Locator] = set()
+    for alternative in alternatives:
+        found = _sequence_locators(alternative, word_start)
+        if found is None:
+            return None
+        locators |= found
+    return locators
+
+
+def _sequence_locators(sequence: str, word_start: bool) -> Optional[Set[Locator]]:
+    if sequence.startswith(r"\b"):
+        word_start = True
+        sequence = sequence[2:]
+    if sequence.startswith("(?:"):
+        close = _closing_paren(sequence)
+        if close < 0:
+            return None
+        group = _alternation_locators(sequence[3:close], word_start)
+        if group is None:
+            return None
+        tail = sequence[close + 1:]
+        if tail[:1] in ("?", "*"):
+            # gruppo facoltativo: il match può iniziare anche da ciò che segue
+            tail = tail[2:] if tail[1:2] == "?" else tail[1:]
+            rest = _sequence_locators(tail, word_start)
+            return None if rest is None else group | rest
+        if tail[:1] == "{":
+            return None
+        return group
+    literal = _literal_prefix(sequence)
+    if not literal:
+        return None
+    word = _WORD_RE.match(literal)
+    if word_start and word:
+        after = sequence[len(literal):]
+        if word.end() < len(literal) or (after.startswith(r"\s") and after[2:3] not in "*?{"):
+            # la parola è seguita da un carattere non alfanumerico obbligatorio: è intera
+            return {("word", word.group(0))}
+        return {("prefix", literal)}
+    return {("find", literal)}
+
+
+def literal_locators(pattern: str) -> Optional[Set[Locator]]:
+    """Locatori da cui deve iniziare ogni match di ``pattern``.
+
+    Ogni match inizia con una parola intera ``("word", ...)`` o con un
+    letterale all'inizio di una parola ``("prefix", ...)``, entrambi
+    preceduti da ``\\b``, oppure con una sottostringa letterale
+    ``("find", ...)`` in qualsiasi posizione. Restituisce
+    ``None`` se il pattern non inizia con testo letterale (anche dentro
+    gruppi ``(?:...)``, eventualmente facoltativi): in quel caso il
+    prefiltro non può escluderlo.
+    """
+    return _alternation_locators(pattern, False)
+
+
+class Document:
+    """Testo da classificare, analizzato una volta sola per tutti i gruppi di regole."""
+
+    __slots__ = ("text", "lowered", "_words", "_prefixes")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        lowered = text.lower()
+        # lower() può cambiare la lunghezza di alcuni caratteri Unicode:
+        # in quel caso le posizioni non coincidono e il prefiltro si disattiva
+        self.lowered = lowered if len(lowered) == len(text) else None
+        self._words: Optional[Dict[str, List[int]]] = None
+        self._prefixes: Optional[Set[str]] = None
+
+    def tokenize(self) -> "Document":
+        """Calcola subito parole e prefissi (altrimenti calcolati al primo uso)."""
+        self.prefixes
+        return self
+
+    @property
+    def words(self) -> Dict[str, List[int]]:
+        """Posizioni di inizio di ogni parola (minuscola) del testo."""
+        if self._words is None:
+            words: Dict[str, List[int]] = {}
+            for match in _WORD_RE.finditer(self.lowered or ""):
+                words.setdefault(match.group(), []).append(match.start())
+            self._words = words
+        return self._words
+
+    @property
+    def prefixes(self) -> Set[str]:
+        """Prefissi delle parole del testo, lunghi da 1 a ``_PREFIX_LEN`` caratteri."""
+        if self._prefixes is None:
+            words = self.words.keys()
+            self._prefixes = {word[:size] for size in range(1, _PREFIX_LEN + 1) for word in words}
+        return self._prefixes
+
+
+class RuleGroup:
+    """Gruppo di regex precompilate valutate come un'unica regola.
+
+    ``search`` equivale a ``any(re.search(p, text, flags) for p in patterns)``
+    e ``first_match`` restituisce il primo pattern (nell'ordine della lista)
+    che trova un match.
+
+    Da ogni pattern si ricavano i letterali con cui deve iniziare un match
+    (vedi :func:`literal_locators`). Un indice sulle parole del documento
+    scarta i pattern i cui letterali non compaiono; gli altri vengono
+    provati con ``match`` solo nelle posizioni in cui un letterale compare,
+    invece di scandire tutto il testo per ogni pattern. I pattern senza
+    letterali sono uniti in un'unica alternation. Il prefiltro è esatto:
+    non scarta mai un pattern che troverebbe un match.
+    """
+
+    def __init__(self, name: str, patterns: Sequence[str], flags: int = re.IGNORECASE) -> None:
+        self.name = name
+        self.patterns = list(patterns)
+        self.flags = flags
+        self.compiled = [re.compile(pattern, flags) for pattern in self.patterns]
+        self._locators: List[Optional[Tuple[Locator, ...]]] = []
+        self._word_index: Dict[str, List[int]] = {}
+        self._prefix_index: Dict[str, List[int]] = {}
+        self._find_index: List[Tuple[str, int]] = []
+        always: List[int] = []
+        for position, pattern in enumerate(self.patterns):
+            # con VERBOSE/ASCII/LOCALE letterali e \b non corrispondono all'analisi del testo
+            locators = None if flags & _UNSUPPORTED_FLAGS else literal_locators(pattern)
+            if locators is not None and flags & re.IGNORECASE:
+                locators = {(kind, literal.lower()) for kind, literal in locators}
+            elif locators is not None and any(literal != literal.lower() for _, literal in locators):
+                # senza IGNORECASE un letterale maiuscolo non si trova nel testo minuscolo
+                locators = None
+            if locators is None:
+                always.append(position)
+                self._locators.append(None)
+                continue
+            self._locators.append(tuple(sorted(locators)))
+            for kind, literal in locators:
+                if kind == "word":
+                    self._word_index.setdefault(literal, []).append(position)
+                elif kind == "prefix":
+                    self._prefix_index.setdefault(literal[:_PREFIX_LEN], []).append(position)
+                else:
+                    self._find_index.append((literal, position))
+        self._always = always
+        self._always_regex = (
+            re.compile("|".join(f"(?:{self.patterns[i]})" for i in always), flags) if always else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _candidates(self, doc: Document) -> Set[int]:
+        found: Set[int] = set()
+        words = doc.words
+        for word in self._word_index.keys() & words.keys():
+            found.update(self._word_index[word])
+        for prefix in self._prefix_index.keys() & doc.prefixes:
+            found.update(self._prefix_index[prefix])
+        lowered = doc.lowered
+        for literal, position in self._find_index:
+            if position not in found and literal in lowered:
+                found.add(position)
+        return found
+
+    def _matches_at_locators(self, position: int, doc: Document) -> bool:
+        regex = self.compiled[position]
+        text = doc.text
+        lowered = doc.lowered
+        for kind, literal in self._locators[position]:
+            if kind == "word":
+                for start in doc.words.get(literal, ()):
+                    if regex.match(text, start):
+                        return True
+                continue
+            start = lowered.find(literal)
+            while start >= 0:
+                if regex.match(text, start):
+                    return True
+                start = lowered.find(literal, start + 1)
+        return False
+
+    def search(self, doc: Document | str) -> bool:
+        if isinstance(doc, str):
+            doc = Document(doc)
+        if doc.lowered is None:
+            return any(regex.search(doc.text) for regex in self.compiled)
+        if any(self._matches_at_locators(position, doc) for position in self._candidates(doc)):
+            return True
+        return self._always_regex is not None and self._always_regex.search(doc.text) is not None
+
+    def first_match(self, doc: Document | str) -> Optional[str]:
+        if isinstance(doc, str):
+            doc = Document(doc)
+        if doc.lowered is None:
+            for pattern, regex in zip(self.patterns, self.compiled):
+                if regex.search(doc.text):
+                    return pattern
+            return None
+        for position in sorted(self._candidates(doc).union(self._always)):
+            if self._locators[position] is None:
+                matched = self.compiled[position].search(doc.text) is not None
+            else:
+                matched = self._matches_at_locators(position, doc)
+            if matched:
+                return self.patterns[position]
+        return None
+
+
+class RuleStage:
+    """Passo di una :class:`RulePipeline` che può scartare un documento.
+
+    Con ``require=False`` il documento è scartato se ``rules`` trova un match
+    e ``unless`` (se presente) no; con ``require=True`` è scartato se
+    ``rules`` non trova alcun match.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rules: RuleGroup,
+        *,
+        unless: Optional[RuleGroup] = None,
+        require: bool = False,
+    ) -> None:
+        self.name = name
+        self.rules = rules
+        self.unless = unless
+        self.require = require
+
+    def rejects(self, doc: Document) -> bool:
+        if self.require:
+            return not self.rules.search(doc)
+        if not self.rules.search(doc):
+            return False
+        return self.unless is None or not self.unless.search(doc)
+
+
+class RulePipeline:
+    """Sequenza di :class:`RuleStage` valutata fino al primo scarto.
+
+    Un documento è accettato solo se nessun passo lo scarta, quindi l'ordine
+    dei passi non cambia l'esito ma solo il costo e il motivo attribuito:
+    conviene mettere prima i passi economici che scartano di più.
+    """
+
+    def __init__(self, stages: Sequence[RuleStage]) -> None:
+        self.stages = list(stages)
+
+    @property
+    def names(self) -> List[str]:
+        return [stage.name for stage in self.stages]
+
+    def new_stats(self) -> Dict[str, Dict[str, float]]:
+        """Contatori per :meth:`classify`: documenti valutati, scartati e secondi per passo."""
+        return {stage.name: {"evaluated": 0, "rejected": 0, "seconds": 0.0} for stage in self.stages}
+
+    def classify(self, doc: Document, stats: Optional[Dict[str, Dict[str, float]]] = None) -> Optional[str]:
+        """Nome del primo passo che scarta ``doc``, ``None`` se è accettato."""
+        for stage in self.stages:
+            if stats is None:
+                if stage.rejects(doc):
+                    return stage.name
+                continue
+            started = time.perf_counter()
+            rejected = stage.rejects(doc)
+            entry = stats[stage.name]
+            entry["seconds"] += time.perf_counter() - started
+            entry["evaluated"] += 1
+            if rejected:
+                entry["rejected"] += 1
+                return stage.name
+        return None
+
+    @staticmethod
+    def suggested_order(stats: Dict[str, Dict[str, float]]) -> List[str]:
+        """Ordina i passi per costo medio diviso per frazione di scarti (crescente).
+
+        I passi che non hanno mai scartato nulla finiscono in fondo, dal più
+        economico al più costoso.
+        """
+
+        def cost(name: str) -> Tuple[int, float]:
+            entry = stats[name]
+            per_doc = entry["seconds"] / entry["evaluated"] if entry["evaluated"] else 0.0
+            if not entry["rejected"]:
+                return (1, per_doc)
+            return (0, per_doc * entry["evaluated"] / entry["rejected"])
+
+        return sorted(stats, key=cost)
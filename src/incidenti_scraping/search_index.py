@@ -0,0 +1,264 @@
+"""Indice invertito per la ricerca testuale sui record, esportabile per la dashboard.
+
+I termini sono le parole di titolo, estratto, testo, città e strade dopo
+:func:`.text_utils.normalize` (senza accenti, minuscole). Nel file sono
+ordinati e scritti con la codifica a prefisso (caratteri in comune con il
+termine precedente + resto); le liste dei documenti di ogni termine sono
+crescenti e scritte come differenze dal valore precedente.
+"""
+from __future__ import annotations
+
+import bisect
+import os
+import pathlib
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Set, Tuple
+
+from .models import Incident
+from .serialization import read_json, write_json
+from .text_utils import normalize
+
+INDEX_VERSION = 1
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+INDEXED_TEXT = ("title", "excerpt", "content")
+INDEXED_LISTS = ("cities", "roads")
+DOC_FIELDS = ("date", "severity", "title", "cities", "roads")
+FILTER_KEYS = frozenset({"severity", "year", "date_from", "date_to", "city", "road"})
+PREFIX_CACHE_SIZE = 1024
+# maggiore di qualunque carattere dei termini (a-z, 0-9): chiude l'intervallo dei termini con un prefisso
+_PREFIX_END = "\x7f"
+
+
+def tokenize(text: str) -> List[str]:
+    """Parole di ``text`` normalizzate come quelle dell'indice."""
+    return TOKEN_RE.findall(normalize(text))
+
+
+def _document_terms(record: Incident) -> Set[str]:
+    parts = [record[field] or "" for field in INDEXED_TEXT]
+    for field in INDEXED_LISTS:
+        parts.extend(record[field] or ())
+    return set(tokenize(" ".join(parts)))
+
+
+def _front_code(terms: Sequence[str]) -> Tuple[List[int], List[str]]:
+    prefix: List[int] = []
+    suffix: List[str] = []
+    previous = ""
+    for term in terms:
+        shared = len(os.path.commonprefix((previous, term)))
+        prefix.append(shared)
+        suffix.append(term[shared:])
+        previous = term
+    return prefix, suffix
+
+
+def _front_decode(prefix: Sequence[int], suffix: Sequence[str]) -> List[str]:
+    terms: List[str] = []
+    previous = ""
+    for shared, rest in zip(prefix, suffix):
+        previous = previous[:shared] + rest
+        terms.append(previous)
+    return terms
+
+
+def _delta_encode(values: Sequence[int]) -> List[int]:
+    return [value - previous for previous, value in zip((0, *values), values)]
+
+
+def _delta_decode(deltas: Sequence[int]) -> List[int]:
+    values: List[int] = []
+    total = 0
+    for delta in deltas:
+        total += delta
+        values.append(total)
+    return values
+
+
+class SearchIndex:
+    """Indice invertito in memoria: termini ordinati, documenti per termine e campi per i filtri.
+
+    I documenti sono numerati nell'ordine dei record passati a
+    :meth:`from_records`; :attr:`ids` riporta il numero all'``id`` del record.
+    """
+
+    def __init__(
+        self,
+        *,
+        ids: Sequence[int],
+        terms: Sequence[str],
+        postings: Sequence[Sequence[int]],
+        docs: Mapping[str, Sequence[Any]] | None = None,
+    ) -> None:
+        self.ids = list(ids)
+        self.terms = list(terms)
+        self.postings = [list(documents) for documents in postings]
+        self.docs = {field: list(values) for field, values in (docs or {}).items()}
+        # documenti per prefisso già cercato: chi digita ripete gli stessi prefissi
+        self._prefix_cache: Dict[str, frozenset] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[Incident | Mapping[str, Any]]) -> "SearchIndex":
+        incidents = [Incident.coerce(record) for record in records]
+        by_term: Dict[str, List[int]] = defaultdict(list)
+        for number, incident in enumerate(incidents):
+            for term in _document_terms(incident):
+                by_term[term].append(number)
+        terms = sorted(by_term)
+        return cls(
+            ids=[incident.id for incident in incidents],
+            terms=terms,
+            # i documenti sono aggiunti in ordine: le liste sono già crescenti
+            postings=[by_term[term] for term in terms],
+            docs={field: [incident[field] for incident in incidents] for field in DOC_FIELDS},
+        )
+
+    def to_dict(self, *, include_docs: bool = True) -> Dict[str, Any]:
+        """Forma serializzabile; con ``include_docs=False`` solo ciò che serve alla ricerca (export dashboard)."""
+        prefix, suffix = _front_code(self.terms)
+        data: Dict[str, Any] = {
+            "version": INDEX_VERSION,
+            "ids": self.ids,
+            "terms": {"prefix": prefix, "suffix": suffix},
+            "postings": [_delta_encode(documents) for documents in self.postings],
+        }
+        if include_docs and self.docs:
+            data["docs"] = self.docs
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "SearchIndex":
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Versione dell'indice non supportata: {data.get('version')!r}")
+        return cls(
+            ids=data["ids"],
+            terms=_front_decode(data["terms"]["prefix"], data["terms"]["suffix"]),
+            postings=[_delta_decode(deltas) for deltas in data["postings"]],
+            docs=data.get("docs"),
+        )
+
+    def _matching(self, token: str) -> frozenset:
+        """Documenti con almeno un termine che inizia con ``token``."""
+        matched = self._prefix_cache.get(token)
+        if matched is None:
+            start = bisect.bisect_left(self.terms, token)
+            end = bisect.bisect_left(self.terms, token + _PREFIX_END, lo=start)
+            found: Set[int] = set()
+            for position in range(start, end):
+                found.update(self.postings[position])
+            if len(self._prefix_cache) >= PREFIX_CACHE_SIZE:
+                self._prefix_cache.clear()
+            matched = self._prefix_cache[token] = frozenset(found)
+        return matched
+
+    def _accepts(self, number: int, filters: Mapping[str, Any]) -> bool:
+        docs = self.docs
+        date = docs["date"][number]
+        for key, value in filters.items():
+            if key == "severity":
+                allowed = {value} if isinstance(value, str) else set(value)
+                if docs["severity"][number] not in allowed:
+                    return False
+            elif key == "year":
+                allowed = {value} if isinstance(value, int) else set(value)
+                if int(date[:4]) not in allowed:
+                    return False
+            elif key == "date_from":
+                if date < value:
+                    return False
+            elif key == "date_to":
+                if date > value:
+                    return False
+            else:
+                names = docs["cities" if key == "city" else "roads"][number]
+                if normalize(value).strip() not in {normalize(name).strip() for name in names}:
+                    return False
+        return True
+
+    def search(
+        self,
+        query: str,
+        filters: Mapping[str, Any] | None = None,
+        *,
+        limit: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Record che contengono tutte le parole di ``query``, nell'ordine dei record indicizzati.
+
+        Ogni parola della ricerca vale anche come prefisso (``"tamponam"``
+        trova "tamponamento"); una ricerca vuota restituisce tutti i record
+        che passano i filtri. ``filters`` accetta ``severity`` e ``year``
+        (valore singolo o collezione), ``date_from``/``date_to`` (date ISO,
+        estremi compresi), ``city`` e ``road`` (nome esatto, senza badare ad
+        accenti e maiuscole). Ogni risultato ha ``id`` e i campi di
+        :data:`DOC_FIELDS`.
+        """
+        filters = dict(filters or {})
+        unknown = set(filters) - FILTER_KEYS
+        if unknown:
+            raise ValueError(f"Filtri non supportati: {', '.join(sorted(unknown))}")
+        if filters and not self.docs:
+            raise ValueError("Indice senza campi dei documenti: i filtri non sono disponibili")
+
+        tokens = sorted(set(tokenize(query)), key=len, reverse=True)
+        if tokens:
+            # le parole più lunghe hanno meno documenti: si parte da quelle
+            numbers = set(self._matching(tokens[0]))
+            for token in tokens[1:]:
+                if not numbers:
+                    break
+                numbers &= self._matching(token)
+            candidates: Iterable[int] = sorted(numbers)
+        else:
+            candidates = range(len(self.ids))
+
+        results: List[Dict[str, Any]] = []
+        for number in candidates:
+            if filters and not self._accepts(number, filters):
+                continue
+            result = {"id": self.ids[number]}
+            result.update((field, values[number]) for field, values in self.docs.items())
+            results.append(result)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+def build_search_index(records: Iterable[Incident | Mapping[str, Any]]) -> SearchIndex:
+    return SearchIndex.from_records(records)
+
+
+def save_search_index(index: SearchIndex, path: str | pathlib.Path, *, include_docs: bool = True) -> str:
+    write_json(index.to_dict(include_docs=include_docs), path, pretty=False)
+    return str(path)
+
+
+# indice caricato per percorso, riletto solo se il file cambia
+_LOADED: Dict[pathlib.Path, Tuple[int, SearchIndex]] = {}
+
+
+def load_search_index(path: str | pathlib.Path) -> SearchIndex:
+    """Indice salvato da :func:`save_search_index`, tenuto in memoria finché il file non cambia."""
+    path = pathlib.Path(path).resolve()
+    mtime = path.stat().st_mtime_ns
+    cached = _LOADED.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    index = SearchIndex.from_dict(read_json(path))
+    _LOADED[path] = (mtime, index)
+    return index
+
+
+def search(
+    query: str,
+    filters: Mapping[str, Any] | None = None,
+    *,
+    index_path: str | pathlib.Path = "data/search_index.json",
+    limit: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Cerca nell'indice scritto dalla pipeline (vedi :meth:`SearchIndex.search`).
+
+    Il primo uso carica l'indice; le ricerche successive lavorano in memoria
+    senza rileggere né il file né il dataset.
+    """
+    return load_search_index(index_path).search(query, filters, limit=limit)
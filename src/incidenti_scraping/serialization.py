@@ -0,0 +1,116 @@
+"""Lettura e scrittura JSON dei dataset, con orjson se disponibile e scritture atomiche."""
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import threading
+from typing import Any, Iterable, List
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dipendenza opzionale
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Oggetti con ``to_dict()`` (es. :class:`.models.Incident`) vengono scritti come il loro dict."""
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Oggetto di tipo {type(obj).__name__} non serializzabile in JSON")
+    return to_dict()
+
+
+class StdlibSerializer:
+    """Serializzatore basato sul modulo ``json`` della libreria standard."""
+
+    name = "json"
+
+    def dumps(self, obj: Any, *, pretty: bool = True, sort_keys: bool = False) -> bytes:
+        if pretty:
+            text = json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys, default=_default)
+        else:
+            text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=_default)
+        return text.encode("utf-8")
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """Serializzatore basato su ``orjson``; con ``pretty=True`` produce gli stessi byte di :class:`StdlibSerializer`."""
+
+    name = "orjson"
+
+    def dumps(self, obj: Any, *, pretty: bool = True, sort_keys: bool = False) -> bytes:
+        # le chiavi non stringa (es. gli anni nelle metriche) diventano stringhe come con json
+        option = orjson.OPT_NON_STR_KEYS
+        # i dataclass passano da _default, così i record includono anche i campi derivati
+        option |= orjson.OPT_PASSTHROUGH_DATACLASS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def loads(self, data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+
+SERIALIZERS = {"json": StdlibSerializer}
+if orjson is not None:
+    SERIALIZERS["orjson"] = OrjsonSerializer
+
+
+def get_serializer(name: str | None = None):
+    """Serializzatore richiesto per nome; senza nome il più veloce disponibile."""
+    if name is None:
+        name = "orjson" if "orjson" in SERIALIZERS else "json"
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Serializzatore JSON non disponibile: {name}") from None
+
+
+DEFAULT_SERIALIZER = get_serializer()
+
+
+def atomic_write_bytes(path: str | pathlib.Path, data: bytes) -> pathlib.Path:
+    """Scrive ``data`` in un file temporaneo nella stessa cartella e lo rinomina su ``path``.
+
+    Chi legge il file (es. la dashboard) vede sempre la versione precedente
+    completa oppure quella nuova, mai un file scritto a metà.
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # open() invece di mkstemp: il file nuovo riceve i permessi standard (umask)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with tmp_path.open("wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+    return path
+
+
+def write_json(
+    obj: Any,
+    path: str | pathlib.Path,
+    *,
+    pretty: bool = True,
+    sort_keys: bool = False,
+    mirrors: Iterable[str | pathlib.Path] = (),
+    serializer=None,
+) -> List[pathlib.Path]:
+    """Codifica ``obj`` una sola volta e lo scrive in modo atomico in ``path`` e in ``mirrors``."""
+    data = (serializer or DEFAULT_SERIALIZER).dumps(obj, pretty=pretty, sort_keys=sort_keys)
+    return [atomic_write_bytes(target, data) for target in (path, *mirrors)]
+
+
+def read_json(path: str | pathlib.Path, *, serializer=None) -> Any:
+    return (serializer or DEFAULT_SERIALIZER).loads(pathlib.Path(path).read_bytes())
@@ -1,14 +1,34 @@
 """Utility per pulire il testo HTML e generare feature."""
 from __future__ import annotations
 
+import functools
+import hashlib
+import logging
 import re
-from datetime import datetime
-from typing import Iterable, List, Sequence
+import types
+from html.parser import HTMLParser
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Tuple
 
+import bs4
 from bs4 import BeautifulSoup
-from dateutil import parser as date_parser
 from unidecode import unidecode
 
+from .dates import date_parts
+
+try:
+    from bs4.builder import HTMLParserTreeBuilder
+    from bs4.builder._htmlparser import BeautifulSoupHTMLParser
+except ImportError:  # pragma: no cover - layout interno di bs4 diverso
+    BeautifulSoupHTMLParser = None
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_constants
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
 WHITESPACE_RE = re.compile(r"\s+")
 ROAD_RE = re.compile(
     r"\b(?:sp\s?\d+|ss\s?\d+|ex\s?\d+|strada\s+provinciale\s+\d+|strada\s+statale\s+\d+|via\s+[A-ZÀ-Ù][^,.;]+|piazza\s+[A-ZÀ-Ù][^,.;]+)",
@@ -28,11 +48,138 @@ SEVERITY_MAP = {
     "feriti": "moderato",
     "ferito": "moderato",
 }
+SEVERITY_RANKING = ("fatale", "grave", "moderato")
+
+# Da incrementare quando cambia il codice di estrazione; le regole (regex,
+# mappa di severità) entrano già da sole nell'impronta FEATURES_VERSION.
+EXTRACTOR_REVISION = 1
+FEATURES_VERSION = hashlib.sha1(
+    repr(
+        (
+            EXTRACTOR_REVISION,
+            WHITESPACE_RE.pattern,
+            ROAD_RE.pattern,
+            ROAD_RE.flags,
+            CITY_RE.pattern,
+            CITY_RE.flags,
+            sorted(SEVERITY_MAP.items()),
+        )
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+
+if BeautifulSoupHTMLParser is not None:
+    _TREE_BUILDER = HTMLParserTreeBuilder()
+    _VOID_TAGS = frozenset(_TREE_BUILDER.empty_element_tags)
+    # Testo dentro script/style/template/rt/rp: escluso da get_text()
+    _CONTAINER_TAGS = frozenset(_TREE_BUILDER.string_containers)
+
+    class _TextExtractor(BeautifulSoupHTMLParser):
+        """Estrae il testo come ``BeautifulSoup(..., "html.parser").get_text(" ")``.
+
+        Usa lo stesso tokenizer e la stessa gestione delle entità di bs4, ma
+        senza costruire l'albero: tiene solo la pila dei tag aperti, che
+        serve a sapere dove una stringa si interrompe e se va esclusa.
+        """
+
+        def __init__(self) -> None:
+            HTMLParser.__init__(self, convert_charrefs=False)
+            # handle_charref di bs4 legge questi attributi dalla soup
+            self.soup = types.SimpleNamespace(original_encoding=None, contains_replacement_characters=False)
+            self.already_closed_empty_element: List[str] = []
+            self.strings: List[str] = []
+            self._data: List[str] = []
+            self._open: List[str] = []
+            self._containers = 0
+
+        def _end_data(self) -> None:
+            if self._data:
+                if not self._containers:
+                    self.strings.append("".join(self._data))
+                self._data = []
+
+        def handle_data(self, data: str) -> None:
+            self._data.append(data)
+
+        def handle_starttag(self, tag, attrs, handle_empty_element: bool = True) -> None:
+            self._end_data()
+            self._open.append(tag)
+            if tag in _CONTAINER_TAGS:
+                self._containers += 1
+            if handle_empty_element and tag in _VOID_TAGS:
+                self.handle_endtag(tag, check_already_closed=False)
+                self.already_closed_empty_element.append(tag)
+
+        def handle_endtag(self, tag, check_already_closed: bool = True) -> None:
+            if check_already_closed and tag in self.already_closed_empty_element:
+                self.already_closed_empty_element.remove(tag)
+                return
+            self._end_data()
+            if tag in self._open:
+                while True:
+                    popped = self._open.pop()
+                    if popped in _CONTAINER_TAGS:
+                        self._containers -= 1
+                    if popped == tag:
+                        break
+
+        def handle_comment(self, data: str) -> None:
+            self._end_data()
+
+        handle_decl = handle_pi = handle_comment
+
+        def unknown_decl(self, data: str) -> None:
+            self._end_data()
+            if data.upper().startswith("CDATA["):
+                self.strings.append(data[len("CDATA["):])
+
+        def get_text(self, value: str) -> str:
+            self.feed(value)
+            self.close()
+            self._end_data()
+            return " ".join(self.strings)
+
+
+def _soup_text(value: str) -> str:
+    return BeautifulSoup(value, "html.parser").get_text(" ")
+
+
+def _streaming_text(value: str) -> str:
+    return _TextExtractor().get_text(value)
+
+
+def _select_html_backend():
+    """Usa l'estrattore senza albero solo se riproduce bs4 sui casi limite noti.
+
+    Dipende da API interne di bs4 (versioni provate in ``requirements.txt``):
+    se non è utilizzabile lo segnala, perché l'estrazione diventa molto più lenta.
+    """
+    fallback = "Estrattore HTML veloce non compatibile con beautifulsoup4 %s (%s): uso BeautifulSoup, più lento"
+    if BeautifulSoupHTMLParser is None:
+        logger.warning(fallback, bs4.__version__, "bs4.builder._htmlparser non importabile")
+        return _soup_text
+    probes = (
+        "a<b>b</b>c<br>d</br>e",
+        "<p>x<!-- c --><script>s</script><template>t<b>u</b></template>y",
+        "caf&eacute; &amp &notit; &#150;&#x27;&#12a;",
+        "<![CDATA[z]]><?pi ?><!DOCTYPE html>q</span>r",
+    )
+    try:
+        mismatches = [probe for probe in probes if _streaming_text(probe) != _soup_text(probe)]
+    except Exception as exc:  # pragma: no cover - API interna di bs4 cambiata
+        logger.warning(fallback, bs4.__version__, f"errore: {exc!r}")
+        return _soup_text
+    if mismatches:
+        logger.warning(fallback, bs4.__version__, f"testo diverso su {mismatches[0]!r}")
+        return _soup_text
+    return _streaming_text
+
+
+_html_text = _select_html_backend()
 
 
 def strip_html(value: str) -> str:
-    soup = BeautifulSoup(value, "html.parser")
-    text = soup.get_text(" ")
+    text = _html_text(value)
     return WHITESPACE_RE.sub(" ", text).strip()
 
 
@@ -40,11 +187,69 @@ def normalize(text: str) -> str:
     return unidecode(text or "").lower()
 
 
+def _first_chars(items) -> FrozenSet[str] | None:
+    """Caratteri con cui può iniziare un match di una sequenza già analizzata da ``sre_parse``.
+
+    Riconosce solo ancore, letterali, classi di caratteri senza categorie e
+    alternative; per qualunque altra struttura restituisce ``None``.
+    """
+    for op, av in items:
+        if op is sre_constants.AT:
+            continue
+        if op is sre_constants.LITERAL:
+            return frozenset(chr(av))
+        if op is sre_constants.IN:
+            chars = set()
+            for item_op, item_av in av:
+                if item_op is sre_constants.LITERAL:
+                    chars.add(chr(item_av))
+                elif item_op is sre_constants.RANGE and item_av[1] - item_av[0] < 256:
+                    chars.update(map(chr, range(item_av[0], item_av[1] + 1)))
+                else:
+                    return None
+            return frozenset(chars)
+        if op is sre_constants.BRANCH:
+            chars = set()
+            for branch in av[1]:
+                first = _first_chars(branch)
+                if first is None:
+                    return None
+                chars |= first
+            return frozenset(chars)
+        return None
+    return None
+
+
+def _guarded(pattern: re.Pattern) -> re.Pattern:
+    """``pattern`` preceduto da un lookahead sui caratteri con cui può iniziare.
+
+    Il lookahead non consuma testo e, con gli stessi flag, accetta almeno
+    tutti i caratteri che accetterebbe il primo elemento del pattern: i match
+    sono gli stessi, ma nelle posizioni che non possono iniziare un match il
+    motore si ferma a un solo controllo invece di provare ogni alternativa.
+    """
+    try:
+        first = _first_chars(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception:  # pragma: no cover - API interna di re cambiata
+        first = None
+    if not first:
+        return pattern
+    chars = "".join(re.escape(char) for char in sorted(first))
+    return re.compile(f"(?=[{chars}])(?:{pattern.pattern})", pattern.flags)
+
+
+_ROAD_SCAN = _guarded(ROAD_RE)
+_CITY_SCAN = _guarded(CITY_RE)
+
+
 def extract_mentions(pattern: re.Pattern, text: str, limit: int = 5) -> List[str]:
     found = []
+    seen = set()
     for match in pattern.finditer(text):
         mention = WHITESPACE_RE.sub(" ", match.group().strip())
-        if mention.lower() not in {m.lower() for m in found}:
+        key = mention.lower()
+        if key not in seen:
+            seen.add(key)
             found.append(mention)
         if len(found) >= limit:
             break
@@ -52,26 +257,22 @@ def extract_mentions(pattern: re.Pattern, text: str, limit: int = 5) -> List[str
 
 
 def extract_date_parts(date_str: str) -> dict:
-    dt = date_parser.parse(date_str)
-    return {
-        "date": dt.date().isoformat(),
-        "datetime": dt.isoformat(),
-        "year": dt.year,
-        "month": dt.month,
-        "month_name": dt.strftime("%B"),
-        "weekday": dt.strftime("%A"),
-    }
+    return date_parts(date_str)
+
+
+def _severity_rank(level: str) -> int:
+    # "informativo" vale come "moderato": un termine moderato non basta a cambiarlo
+    return SEVERITY_RANKING.index(level if level != "informativo" else "moderato")
+
+
+def _severity(levels: Iterable[str]) -> str:
+    # a pari grado resta il valore già assegnato, come nel confronto stretto originale
+    return min(("informativo", *sorted(set(levels))), key=_severity_rank)
 
 
 def guess_severity(text: str) -> str:
     ntext = normalize(text)
-    ranking = ["fatale", "grave", "moderato"]
-    severity = "informativo"
-    for keyword, level in SEVERITY_MAP.items():
-        if keyword in ntext:
-            if ranking.index(level if level != "informativo" else "moderato") < ranking.index(severity if severity != "informativo" else "moderato"):
-                severity = level
-    return severity
+    return _severity(level for keyword, level in SEVERITY_MAP.items() if keyword in ntext)
 
 
 def flag_keywords(text: str, keywords: Sequence[str]) -> List[str]:
@@ -80,6 +281,29 @@ def flag_keywords(text: str, keywords: Sequence[str]) -> List[str]:
 
 
 def detect_locations(text: str) -> dict:
-    mentions = extract_mentions(ROAD_RE, text)
-    cities = extract_mentions(CITY_RE, text)
+    mentions = extract_mentions(_ROAD_SCAN, text)
+    cities = extract_mentions(_CITY_SCAN, text)
     return {"roads": mentions, "cities": cities}
+
+
+@functools.lru_cache(maxsize=32)
+def _needles(keywords: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Termini di severità e keyword da cercare nel testo normalizzato, senza ripetizioni."""
+    return tuple(dict.fromkeys([*SEVERITY_MAP, *(kw.lower() for kw in keywords)]))
+
+
+def extract_features(text: str, keywords: Sequence[str]) -> Dict[str, object]:
+    """Severità, keyword, strade e città di ``text`` in un solo passaggio.
+
+    Restituisce gli stessi valori di :func:`guess_severity`,
+    :func:`flag_keywords` e :func:`detect_locations`, ma normalizza il testo
+    una volta sola e cerca ogni termine (di severità o keyword) una volta sola.
+    """
+    ntext = normalize(text)
+    found = {needle for needle in _needles(tuple(keywords)) if needle in ntext}
+    return {
+        "severity": _severity(level for keyword, level in SEVERITY_MAP.items() if keyword in found),
+        "keywords": [kw for kw in keywords if kw.lower() in found],
+        "roads": extract_mentions(_ROAD_SCAN, text),
+        "cities": extract_mentions(_CITY_SCAN, text),
+    }
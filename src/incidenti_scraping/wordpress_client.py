@@ -2,17 +2,113 @@
 from __future__ import annotations
 
 import logging
+import threading
 import time
-from typing import Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from .config import USER_AGENT, WP_API_BASE
+from .http_cache import ResponseCache
+from .instrumentation import RunMetrics
 
 logger = logging.getLogger(__name__)
 
+# Politica di retry condivisa con AsyncWordPressClient
+RETRY_TOTAL = 7
+RETRY_BACKOFF_FACTOR = 1.0
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+# Campi dei post effettivamente usati dalla pipeline (per ``_fields``)
+POST_FIELDS = ("id", "date", "modified", "link", "title", "excerpt", "content", "categories", "tags")
+# Campi sufficienti per la fase di scoperta (dedup + watermark)
+DISCOVERY_FIELDS = ("id", "date", "modified")
+# Massimo numero di id per ``include`` (limite di ``per_page`` dell'API)
+INCLUDE_BATCH_SIZE = 100
+
+
+class IncompleteFetch(RuntimeError):
+    """Una pagina della query non è stata scaricata: i risultati sono parziali.
+
+    Sollevata solo con ``strict=True``. ``posts`` contiene i post ottenuti
+    prima dell'errore quando il client li restituisce tutti insieme (client
+    asincrono); il client sincrono li ha già generati.
+    """
+
+    def __init__(self, message: str, posts: Iterable[Dict] = ()) -> None:
+        super().__init__(message)
+        self.posts = list(posts)
+
+
+def build_post_params(
+    *,
+    search: Optional[str] = None,
+    tags: Optional[List[int]] = None,
+    categories: Optional[List[int]] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    modified_after: Optional[str] = None,
+    modified_before: Optional[str] = None,
+    include: Optional[Sequence[int]] = None,
+    per_page: int = 100,
+    embed: bool = True,
+    fields: Optional[Sequence[str]] = None,
+) -> Dict:
+    """Costruisce i parametri di query per ``/posts`` (senza ``page``).
+
+    Con ``fields`` la risposta contiene solo i campi indicati (``_fields``).
+    """
+    params: Dict = {
+        "per_page": per_page,
+        "orderby": "date",
+        "order": "desc",
+    }
+    if search:
+        params["search"] = search
+    if tags:
+        params["tags"] = ",".join(str(tag) for tag in tags)
+    if categories:
+        params["categories"] = ",".join(str(cat) for cat in categories)
+    if after:
+        params["after"] = after
+    if before:
+        params["before"] = before
+    if modified_after:
+        params["modified_after"] = modified_after
+    if modified_before:
+        params["modified_before"] = modified_before
+    if include:
+        params["include"] = ",".join(str(post_id) for post_id in include)
+    if embed:
+        params["_embed"] = "1"
+    if fields:
+        params["_fields"] = ",".join(fields)
+    return params
+
+
+class RateLimiter:
+    """Limita globalmente la frequenza delle richieste, anche tra più thread."""
+
+    def __init__(self, min_interval: float) -> None:
+        self.min_interval = max(0.0, min_interval)
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        """Blocca finché non è disponibile il prossimo slot di richiesta."""
+        if not self.min_interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
 
 class WordPressClient:
     """Client minimale per leggere i post da WordPress."""
@@ -22,22 +118,70 @@ class WordPressClient:
         base_api: str = WP_API_BASE,
         *,
         throttle_seconds: float = 0.5,
+        max_workers: int = 1,
         session: Optional[requests.Session] = None,
+        cache: Optional[ResponseCache] = None,
+        metrics: Optional[RunMetrics] = None,
     ) -> None:
         self.base_api = base_api.rstrip("/")
         self.throttle_seconds = throttle_seconds
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = RateLimiter(throttle_seconds)
+        self.cache = cache
+        self.metrics = metrics
+        self._terms: Dict[str, Dict[int, str]] = {"categories": {}, "tags": {}}
         self.session = session or requests.Session()
         self.session.headers.update({"User-Agent": USER_AGENT})
         retry = Retry(
-            total=7,
-            backoff_factor=1.0,
-            status_forcelist=[429, 500, 502, 503, 504],
+            total=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS_CODES,
             allowed_methods=["GET"],
         )
-        adapter = HTTPAdapter(max_retries=retry)
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=max(10, self.max_workers))
         self.session.mount("https://", adapter)
         self.session.mount("http://", adapter)
 
+    def _get_page(self, url: str, params: Dict) -> Optional[requests.Response]:
+        """Scarica una pagina rispettando il rate limit; ``None`` in caso di errore di rete."""
+        logger.debug("Richiesta pagina %s: %s params=%s", params.get("page"), url, params)
+        started = time.perf_counter()
+
+        def before_request() -> None:
+            # la durata misurata parte dopo l'attesa del rate limit
+            nonlocal started
+            self.rate_limiter.wait()
+            started = time.perf_counter()
+
+        try:
+            if self.cache is not None:
+                resp = self.cache.get(self.session, url, params, timeout=90, before_request=before_request)
+            else:
+                before_request()
+                resp = self.session.get(url, params=params, timeout=90)
+        except requests.RequestException as exc:
+            logger.warning("Errore durante la richiesta a %s: %s", url, exc)
+            if self.metrics is not None:
+                self.metrics.record_request(url, seconds=time.perf_counter() - started)
+            return None
+        if self.metrics is not None:
+            self._record(url, resp, time.perf_counter() - started)
+        resp.raise_for_status()
+        return resp
+
+    def _record(self, url: str, resp: requests.Response, seconds: float) -> None:
+        """Passa a ``metrics`` la risposta, con i tentativi ripetuti da urllib3 prima di ottenerla."""
+        retries = getattr(resp.raw, "retries", None)
+        history = retries.history if retries is not None else ()
+        self.metrics.record_request(
+            url,
+            seconds=seconds,
+            status=resp.status_code,
+            size=len(resp.content),
+            attempts=[attempt.status for attempt in history],
+            cached=getattr(resp, "from_cache", False),
+        )
+
     def fetch_posts(
         self,
         *,
@@ -46,42 +190,52 @@ class WordPressClient:
         categories: Optional[List[int]] = None,
         after: Optional[str] = None,
         before: Optional[str] = None,
+        modified_after: Optional[str] = None,
+        modified_before: Optional[str] = None,
+        include: Optional[Sequence[int]] = None,
         per_page: int = 100,
         max_pages: Optional[int] = None,
         embed: bool = True,
+        fields: Optional[Sequence[str]] = None,
+        strict: bool = False,
     ) -> Iterable[Dict]:
-        """Genera i post rispettando la paginazione dell'API."""
+        """Genera i post rispettando la paginazione dell'API.
+
+        Con ``max_workers > 1`` il numero di pagine viene letto dall'header
+        ``X-WP-TotalPages`` della prima risposta e le pagine successive sono
+        scaricate in parallelo; i post restano comunque in ordine di data.
+        Se una pagina non si scarica il recupero si ferma lì; con ``strict``
+        viene sollevata :class:`IncompleteFetch` (es. per non far avanzare
+        un watermark oltre pagine mai lette).
+        """
 
+        params = build_post_params(
+            search=search,
+            tags=tags,
+            categories=categories,
+            after=after,
+            before=before,
+            modified_after=modified_after,
+            modified_before=modified_before,
+            include=include,
+            per_page=per_page,
+            embed=embed,
+            fields=fields,
+        )
+
+        if self.max_workers > 1:
+            yield from self._fetch_concurrent(params, per_page, max_pages, strict)
+            return
+
+        url = f"{self.base_api}/posts"
         page = 1
         total_yielded = 0
         while True:
-            params = {
-                "per_page": per_page,
-                "page": page,
-                "orderby": "date",
-                "order": "desc",
-            }
-            if search:
-                params["search"] = search
-            if tags:
-                params["tags"] = ",".join(str(tag) for tag in tags)
-            if categories:
-                params["categories"] = ",".join(str(cat) for cat in categories)
-            if after:
-                params["after"] = after
-            if before:
-                params["before"] = before
-            if embed:
-                params["_embed"] = "1"
-
-            url = f"{self.base_api}/posts"
-            logger.debug("Richiesta pagina %d: %s params=%s", page, url, params)
-            try:
-                resp = self.session.get(url, params=params, timeout=90)
-            except requests.RequestException as exc:
-                logger.warning("Errore durante la richiesta a %s: %s", url, exc)
+            resp = self._get_page(url, {**params, "page": page})
+            if resp is None:
+                if strict:
+                    raise IncompleteFetch(f"pagina {page} di {url} non scaricata")
                 break
-            resp.raise_for_status()
             data: List[Dict] = resp.json()
             if not data:
                 logger.debug("Pagina %d vuota, fine recupero", page)
@@ -97,7 +251,91 @@ class WordPressClient:
             if max_pages and page > max_pages:
                 logger.debug("Raggiunto limite di %d pagine", max_pages)
                 break
-            time.sleep(self.throttle_seconds)
-        
+
         if page > 1:
             logger.info("Recuperate %d pagine, totale %d post", page - 1, total_yielded)
+
+    def fetch_posts_by_ids(self, post_ids: Iterable[int], **options) -> Iterable[Dict]:
+        """Scarica i post indicati con ``include``, a blocchi di 100 id."""
+        ids = sorted(set(post_ids), reverse=True)
+        for start in range(0, len(ids), INCLUDE_BATCH_SIZE):
+            batch = ids[start:start + INCLUDE_BATCH_SIZE]
+            yield from self.fetch_posts(include=batch, per_page=INCLUDE_BATCH_SIZE, max_pages=1, **options)
+
+    def resolve_terms(self, taxonomy: str, term_ids: Iterable[int]) -> Dict[int, str]:
+        """Restituisce ``{id: nome}`` per categorie o tag, con cache in memoria.
+
+        Alternativa leggera a ``_embed``: vengono richiesti (a blocchi di 100
+        con ``include``) solo gli id non ancora noti.
+        """
+        known = self._terms.setdefault(taxonomy, {})
+        missing = sorted({int(term_id) for term_id in term_ids} - known.keys())
+        url = f"{self.base_api}/{taxonomy}"
+        for start in range(0, len(missing), INCLUDE_BATCH_SIZE):
+            batch = missing[start:start + INCLUDE_BATCH_SIZE]
+            params = {
+                "include": ",".join(str(term_id) for term_id in batch),
+                "per_page": INCLUDE_BATCH_SIZE,
+                "_fields": "id,name",
+            }
+            resp = self._get_page(url, params)
+            if resp is None:
+                continue
+            for term in resp.json():
+                known[term["id"]] = term["name"]
+        return known
+
+    def _fetch_concurrent(self, params: Dict, per_page: int, max_pages: Optional[int], strict: bool) -> Iterable[Dict]:
+        url = f"{self.base_api}/posts"
+        first = self._get_page(url, {**params, "page": 1})
+        if first is None:
+            if strict:
+                raise IncompleteFetch(f"pagina 1 di {url} non scaricata")
+            return
+        data: List[Dict] = first.json()
+        yield from data
+        total_yielded = len(data)
+
+        try:
+            total_pages = int(first.headers.get("X-WP-TotalPages", 1))
+        except ValueError:
+            total_pages = 1
+        logger.debug(
+            "Header WP: totale post=%s, totale pagine=%d",
+            first.headers.get("X-WP-Total", "?"),
+            total_pages,
+        )
+        if not data or len(data) < per_page:
+            total_pages = 1
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+
+        pages_done = 1
+        if total_pages > 1:
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            futures = [
+                executor.submit(self._get_page, url, {**params, "page": page})
+                for page in range(2, total_pages + 1)
+            ]
+            try:
+                # I risultati vengono consumati nell'ordine delle pagine,
+                # così l'ordinamento per data resta quello dell'API.
+                for page, future in enumerate(futures, start=2):
+                    resp = future.result()
+                    if resp is None:
+                        if strict:
+                            raise IncompleteFetch(f"pagina {page} di {url} non scaricata")
+                        break
+                    data = resp.json()
+                    if not data:
+                        break
+                    yield from data
+                    total_yielded += len(data)
+                    pages_done += 1
+            finally:
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=False)
+
+        if pages_done > 1:
+            logger.info("Recuperate %d pagine (in parallelo), totale %d post", pages_done, total_yielded)